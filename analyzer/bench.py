@@ -0,0 +1,418 @@
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+from analyzer.timing import WORKER_STAGES
+
+BENCH_FORMAT = "coderecon-bench"
+BENCH_VERSION = 1
+
+DEFAULT_SPEC = {
+    "files": 1000,
+    "mix": {"py": 70, "js": 20, "go": 10},  # Language weights
+    "functions": 20,                        # Mean functions per file
+    "depth": 4,                             # Max block nesting inside a function
+    "sizes": "lognormal",                   # Functions-per-file distribution: fixed, uniform, lognormal
+    "test_share": 0.2,                      # Python files that get a test module
+    "seed": 0,
+}
+SIZE_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+MAX_FUNCTIONS_PER_FILE = 2000
+
+# Report order; worker.* stages are CPU time inside "analyze"
+STAGE_ORDER = ("discovery", "cache", "analyze", *(f"worker.{stage}" for stage in WORKER_STAGES),
+               "signals", "aggregation", "serialization", "store", "topology")
+
+# Lower is better for everything except throughput; stages below the floor are noise
+HIGHER_IS_BETTER = {"files_per_s"}
+MIN_COMPARED_STAGE_S = 0.05
+
+
+def parse_mix(text: str) -> dict:
+    """"py=70,js=20,go=10" -> {"py": 70, "js": 20, "go": 10}."""
+    mix = {}
+    for part in text.split(","):
+        lang, _, weight = part.strip().partition("=")
+        if lang not in WRITERS:
+            raise ValueError(f"Unknown language '{lang}' (expected one of {', '.join(WRITERS)})")
+        mix[lang] = float(weight or 1)
+    return mix
+
+
+# ---------------------------
+# Synthetic repository
+# ---------------------------
+
+def _nest(rng, depth, heads, body, close=None) -> list:
+    """`depth` randomly chosen blocks around `body`, one indent step (4 spaces) each."""
+    if depth == 0:
+        return body
+    head = rng.choice(heads)
+    inner = ["    " + line for line in _nest(rng, depth - 1, heads, body, close)]
+    if head == "try:":
+        return [head, *inner, "except ValueError:", "    return None"]
+    return [head, *inner] + ([close] if close else [])
+
+
+def _python_function(rng, name, depth, callees) -> str:
+    heads = ("if request.ready:", "for item in request.items:", "while limit > 0:", "try:")
+    body = [f"value = {callee}(value)" for callee in callees] + ["limit -= 1"]
+    lines = _nest(rng, depth, heads, body)
+    return "\n".join([f"def {name}(request, limit=10):", "    value = None",
+                      *("    " + line for line in lines), "    return value"])
+
+
+def _js_function(rng, name, depth, callees) -> str:
+    heads = ("if (request.ready) {", "for (const item of request.items) {", "while (limit > 0) {")
+    body = [f"value = {callee}(value);" for callee in callees] + ["limit -= 1;"]
+    lines = _nest(rng, depth, heads, body, close="}")
+    return "\n".join([f"export function {name}(request, limit) {{", "    let value = null;",
+                      *("    " + line for line in lines), "    return value;", "}"])
+
+
+def _go_function(rng, name, depth, callees) -> str:
+    heads = ("if request.Ready {", "for _, item := range request.Items {", "for limit > 0 {")
+    body = [f"value = {callee}(value)" for callee in callees] + ["limit--"]
+    lines = _nest(rng, depth, heads, body, close="}")
+    return "\n".join([f"func {name}(request *Request, limit int) *Value {{", "    var value *Value",
+                      *("    " + line for line in lines), "    return value", "}"])
+
+
+def _python_module(rng, module, functions, imports) -> str:
+    head = [f"from {dep_module} import {dep_fn}" for dep_module, dep_fn in imports]
+    return "\n".join(head) + "\n\n\n" + "\n\n\n".join(functions) + "\n"
+
+
+def _js_module(rng, module, functions, imports) -> str:
+    head = [f"import {{ {dep_fn} }} from './{dep_module.rsplit('.', 1)[-1]}';" for dep_module, dep_fn in imports]
+    return "\n".join(head) + "\n\n" + "\n\n".join(functions) + "\n"
+
+
+def _go_module(rng, module, functions, imports) -> str:
+    return "package " + module.split(".")[1] + "\n\n" + "\n\n".join(functions) + "\n"
+
+
+# extension, function writer, module writer
+WRITERS = {
+    "py": (".py", _python_function, _python_module),
+    "js": (".js", _js_function, _js_module),
+    "go": (".go", _go_function, _go_module),
+}
+
+
+def _function_count(rng, spec) -> int:
+    mean = max(1, spec["functions"])
+    if spec["sizes"] == "fixed":
+        n = mean
+    elif spec["sizes"] == "uniform":
+        n = rng.randint(1, 2 * mean - 1) if mean > 1 else 1
+    else:
+        # Long tail of big files, same mean: mu = ln(mean) - sigma^2 / 2
+        n = round(rng.lognormvariate(math.log(mean) - 0.5, 1.0))
+    return max(1, min(MAX_FUNCTIONS_PER_FILE, n))
+
+
+def generate_repo(root: str, spec: dict) -> dict:
+    """
+    Writes a reproducible synthetic repository under `root`: the same spec
+    (seed included) always yields byte-identical files. Modules live in
+    pkg/m<k>/ packages, import and call each other, and a share of the
+    Python modules get a tests/test_*.py that calls some of their functions.
+    """
+    rng = random.Random(spec["seed"])
+    langs = list(spec["mix"])
+    weights = [spec["mix"][lang] for lang in langs]
+    packages = max(1, int(math.sqrt(spec["files"])))
+
+    # 1. Plan every module's language and functions first, so calls can point anywhere
+    modules = []
+    for i in range(spec["files"]):
+        lang = rng.choices(langs, weights)[0]
+        module = f"pkg.m{i % packages}.mod_{i}"
+        names = [f"{lang}_{i}_{j}" for j in range(_function_count(rng, spec))]
+        modules.append((lang, module, names))
+
+    # 2. Render them
+    stats = {"files": 0, "bytes": 0, "functions": 0}
+    for lang, module, names in modules:
+        ext, write_function, write_module = WRITERS[lang]
+        peers = [m for m in rng.sample(modules, min(3, len(modules))) if m[0] == lang and m[1] != module]
+        imports = [(m[1], rng.choice(m[2])) for m in peers]
+        callable_names = names + [fn for _, fn in imports]
+
+        functions = []
+        for name in names:
+            callees = rng.sample(callable_names, min(len(callable_names), rng.randint(0, 3)))
+            functions.append(write_function(rng, name, rng.randint(1, max(1, spec["depth"])), callees))
+        _write(root, module.replace(".", os.sep) + ext, write_module(rng, module, functions, imports), stats)
+        stats["functions"] += len(names)
+
+        if lang == "py" and rng.random() < spec["test_share"]:
+            tested = rng.sample(names, min(len(names), 3))
+            body = "\n\n\n".join(f"def test_{name}():\n    assert {name}(None) is None" for name in tested)
+            test_path = os.path.join("tests", f"test_{module.rsplit('.', 1)[-1]}.py")
+            _write(root, test_path, f"from {module} import {', '.join(tested)}\n\n\n{body}\n", stats)
+    return stats
+
+
+def _write(root, rel, text, stats):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+    stats["files"] += 1
+    stats["bytes"] += len(text.encode("utf-8"))
+
+
+# ---------------------------
+# Measurement
+# ---------------------------
+
+def _peak_rss_mb(children: bool = False) -> float | None:
+    """
+    Peak RSS of this process, or of its reaped children (the process pool),
+    in MB. `resource` is Unix-only; on Windows psutil's peak working set
+    stands in for this process if it is installed, otherwise None.
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        if children:
+            return None
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _child_main():
+    """One measured run in a fresh interpreter, so peak RSS is this run's alone."""
+    from analyzer.scan import run_analysis
+    from analyzer.store import STORE_FILE
+    from analyzer.timing import StageTimer
+    from analyzer.utils.io import ANALYSIS_FILE
+    from report.topology import generate_topology
+
+    job = json.loads(sys.stdin.read())
+    timer = StageTimer()
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        analysis = run_analysis(job["repo"], use_cache=False, use_store=True,
+                                executor=job["executor"], jobs=job["jobs"], timer=timer)
+        wall = time.perf_counter() - start
+        with timer.stage("topology"):
+            generate_topology(analysis, repo_root=job["repo"])
+
+    files = len(analysis["files"])
+    print(json.dumps({
+        "wall_s": round(wall, 4),
+        "files_per_s": round(files / wall, 1) if wall > 0 else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "worker_peak_rss_mb": _peak_rss_mb(children=True),
+        "ndjson_bytes": os.path.getsize(ANALYSIS_FILE),
+        "db_bytes": os.path.getsize(STORE_FILE) if os.path.exists(STORE_FILE) else 0,
+        "stages": timer.rounded(),
+        "executor": analysis["executor_stats"].get("executor"),
+    }))
+
+
+def _measure(repo: str, executor: str, jobs) -> dict:
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory(prefix="coderecon_bench_out_") as workdir:
+        # Outputs (analysis.ndjson/.db) land in the child's cwd, away from the repo and the caller
+        out = subprocess.run([sys.executable, "-c", "from analyzer.bench import _child_main; _child_main()"],
+                             input=json.dumps({"repo": repo, "executor": executor, "jobs": jobs}),
+                             capture_output=True, text=True, cwd=workdir, env=env)
+    if out.returncode != 0:
+        raise RuntimeError(f"Benchmark run failed:\n{out.stderr.strip()}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _median_runs(runs: list) -> dict:
+    merged = {}
+    for key, value in runs[0].items():
+        if key == "stages":
+            names = sorted({name for run in runs for name in run["stages"]},
+                           key=lambda n: STAGE_ORDER.index(n) if n in STAGE_ORDER else len(STAGE_ORDER))
+            merged[key] = {name: round(statistics.median(run["stages"].get(name, 0.0) for run in runs), 4)
+                           for name in names}
+        elif isinstance(value, (int, float)):
+            merged[key] = statistics.median(run[key] for run in runs)
+        else:
+            merged[key] = value
+    return merged
+
+
+def run_bench(spec: dict, repeat: int = 3, executor: str = "auto", jobs: int | None = None,
+              keep: str | None = None) -> dict:
+    """
+    Generates the synthetic repo (in `keep`, or a temp dir that is removed
+    afterwards), runs the scan + topology `repeat` times in fresh processes
+    and returns the medians with the spec and environment they came from.
+    """
+    with tempfile.TemporaryDirectory(prefix="coderecon_bench_repo_") as tmp:
+        repo = os.path.abspath(keep) if keep else tmp
+        t0 = time.perf_counter()
+        repo_stats = generate_repo(repo, spec)
+        print(f"[coderecon] Generated {repo_stats['files']} files, {repo_stats['functions']} functions, "
+              f"{repo_stats['bytes'] / 1e6:.1f}MB in {time.perf_counter() - t0:.1f}s ({repo})")
+        runs = []
+        for i in range(repeat):
+            runs.append(_measure(repo, executor, jobs))
+            print(f"[coderecon] Run {i + 1}/{repeat}: {runs[-1]['wall_s']:.2f}s, "
+                  f"{runs[-1]['files_per_s']:.0f} files/s")
+
+    return {
+        "format": BENCH_FORMAT,
+        "version": BENCH_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": f"{platform.system()} {platform.machine()}",
+        "cpus": os.cpu_count(),
+        "spec": spec,
+        "executor": executor,
+        "jobs": jobs,
+        "repeat": repeat,
+        "repo": repo_stats,
+        "metrics": _median_runs(runs),
+    }
+
+
+# ---------------------------
+# Baselines
+# ---------------------------
+
+def load_baseline(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("format") != BENCH_FORMAT:
+        raise ValueError(f"{path} is not a coderecon bench baseline")
+    return baseline
+
+
+def save_baseline(result: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+        f.write("\n")
+
+
+def _flat_metrics(metrics: dict) -> dict:
+    flat = {k: v for k, v in metrics.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+    flat.update({f"stage.{name}": s for name, s in metrics.get("stages", {}).items()})
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10) -> list:
+    """
+    Rows of (metric, baseline, current, relative change, regressed) for every
+    metric in both results. A metric regresses when it got worse by more
+    than `threshold` (0.10 = 10%); stages under 50ms in both are not judged.
+    """
+    before, after = _flat_metrics(baseline["metrics"]), _flat_metrics(current["metrics"])
+    rows = []
+    for name, old in before.items():
+        new = after.get(name)
+        if new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = -change if name in HIGHER_IS_BETTER else change
+        noise = name.startswith("stage.") and max(old, new) < MIN_COMPARED_STAGE_S
+        rows.append((name, old, new, change, worse > threshold and not noise))
+    return rows
+
+
+# ---------------------------
+# Output
+# ---------------------------
+
+def _fmt(name: str, value) -> str:
+    if name == "files_per_s":
+        return f"{value:,.0f}/s"
+    if name.endswith("_bytes"):
+        return f"{value / 1e6:.2f}MB"
+    if name.endswith("_mb"):
+        return f"{value:.0f}MB"
+    if name.endswith("_s") or name.startswith("stage."):
+        return f"{value:.3f}s"
+    return f"{value:,.1f}"
+
+
+def _rss(mb) -> str:
+    return "n/a" if mb is None else f"{mb:.0f}MB"
+
+
+def format_result(result: dict) -> str:
+    m = result["metrics"]
+    spec = result["spec"]
+    mix = ", ".join(f"{lang} {weight:g}" for lang, weight in spec["mix"].items())
+    lines = [
+        f"Repo: {result['repo']['files']} files ({mix}), {result['repo']['functions']} functions, "
+        f"depth {spec['depth']}, {spec['sizes']} sizes, seed {spec['seed']}",
+        f"Executor: {m['executor']} | median of {result['repeat']}",
+        f"Throughput: {m['files_per_s']:,.0f} files/s ({m['wall_s']:.2f}s scan)",
+        f"Peak RSS: {_rss(m['peak_rss_mb'])} (workers {_rss(m['worker_peak_rss_mb'])}) | "
+        f"analysis.ndjson {m['ndjson_bytes'] / 1e6:.2f}MB, analysis.db {m['db_bytes'] / 1e6:.2f}MB",
+        "Stages:",
+    ]
+    width = max((len(name) for name in m["stages"]), default=0) + 2
+    for name, seconds in m["stages"].items():
+        label = "  " + name if name.startswith("worker.") else name
+        lines.append(f"  {label:<{width}} {seconds:>9.3f}s")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: list, threshold: float) -> str:
+    width = max((len(row[0]) for row in rows), default=0)
+    lines = [f"{'metric':<{width}} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for name, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        lines.append(f"{name:<{width}} {_fmt(name, old):>10} {_fmt(name, new):>10} {change * 100:>+7.1f}%{flag}")
+    regressions = sum(1 for row in rows if row[4])
+    lines.append(f"{regressions} regression{'s' if regressions != 1 else ''} over {threshold * 100:.0f}%")
+    return "\n".join(lines)
+
+
+def run_bench_command(args) -> int:
+    """`coderecon bench`; returns the exit status (1 when --compare found a regression)."""
+    baseline = load_baseline(args.compare) if args.compare else None
+
+    # Comparing reuses the baseline's repo shape unless a flag overrides it
+    spec = dict(baseline["spec"] if baseline else DEFAULT_SPEC)
+    overrides = {"files": args.files, "functions": args.functions, "depth": args.depth, "sizes": args.sizes,
+                 "test_share": args.test_share, "seed": args.seed,
+                 "mix": parse_mix(args.mix) if args.mix else None}
+    spec.update({k: v for k, v in overrides.items() if v is not None})
+    executor = args.executor or (baseline["executor"] if baseline else "auto")
+    jobs = args.jobs if args.jobs is not None else (baseline["jobs"] if baseline else None)
+    if baseline and (spec, executor, jobs) != (baseline["spec"], baseline["executor"], baseline["jobs"]):
+        print("[coderecon] Warning: spec or executor differs from the baseline's; "
+              "numbers are not directly comparable.")
+
+    result = run_bench(spec, repeat=args.repeat, executor=executor, jobs=jobs, keep=args.keep)
+    print(format_result(result))
+
+    if args.save:
+        save_baseline(result, args.save)
+        print(f"[coderecon] Baseline written to {args.save}")
+
+    if baseline:
+        rows = compare(result, baseline, args.threshold)
+        print(format_comparison(rows, args.threshold))
+        return 1 if any(row[4] for row in rows) else 0
+    return 0
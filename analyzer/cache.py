@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Same location run_clean_logic already wipes
+CACHE_PATH = Path(".coderecon") / "cache.json"
+
+# Bump whenever extraction or rule output changes so old entries are dropped
+CACHE_VERSION = 6
+
+
+def content_hash(data: bytes) -> str:
+    """Git-compatible blob SHA-1, so entries line up with git object ids."""
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return content_hash(f.read())
+
+
+def _key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+class FileCache:
+    """
+    Per-file analysis results keyed on path, size, mtime and content hash.
+    A hit on size+mtime is trusted as-is; a size match with a new mtime is
+    confirmed by re-hashing the file before anything is re-parsed. Files
+    read from the git object store (mtime None) match on their blob id,
+    which is the same hash.
+    """
+
+    def __init__(self, cache_path=CACHE_PATH):
+        self.cache_path = Path(cache_path)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+
+        if data.get("version") == CACHE_VERSION:
+            self.entries = data.get("entries", {})
+        else:
+            self._dirty = True
+        return self
+
+    def lookup(self, file_info):
+        """Returns the cached per-file result, or None if the file must be re-parsed."""
+        entry = self.entries.get(_key(file_info["path"]))
+
+        if (entry is None or entry["path"] != file_info["path"]
+                or entry["size"] != file_info["size"]):
+            self.misses += 1
+            return None
+
+        if file_info["mtime"] is None:
+            if entry["sha"] != file_info.get("blob"):
+                self.misses += 1
+                return None
+        elif entry["mtime"] != file_info["mtime"]:
+            # Touched but possibly unchanged (checkout, formatter no-op...)
+            try:
+                sha = hash_file(file_info["path"])
+            except OSError:
+                sha = None
+            if sha != entry["sha"]:
+                self.misses += 1
+                return None
+            entry["mtime"] = file_info["mtime"]
+            self._dirty = True
+
+        self.hits += 1
+        return entry["result"]
+
+    def store(self, file_info, result):
+        # Per-run profiling data is not part of the cached result
+        result.pop("rule_stats", None)
+        result.pop("stage_ns", None)
+        result.pop("elapsed_ns", None)
+        self.entries[_key(file_info["path"])] = {
+            "path": file_info["path"],
+            "size": file_info["size"],
+            "mtime": file_info["mtime"],
+            "sha": result.pop("sha", None),
+            "result": result,
+        }
+        self._dirty = True
+
+    def prune(self, root: str, files):
+        """Evicts entries under `root` for files that no longer exist or are no longer scanned."""
+        root_key = _key(root)
+        prefix = root_key.rstrip(os.sep) + os.sep
+        live = {_key(f["path"]) for f in files}
+
+        stale = [
+            k for k in self.entries
+            if (k == root_key or k.startswith(prefix)) and k not in live
+        ]
+        for k in stale:
+            del self.entries[k]
+        if stale:
+            self._dirty = True
+        return len(stale)
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
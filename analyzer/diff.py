@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import defaultdict
+
+from analyzer.utils.io import ANALYSIS_FILE, PREVIOUS_ANALYSIS_FILE, iter_records, read_header
+
+# Analyses bigger than this (both files together) are hash-partitioned to temp
+# files first, so only one partition's signals are ever in memory
+PARTITION_BYTES = 64 * 1024 * 1024
+MAX_PARTITIONS = 256
+DEFAULT_LIMIT = 20
+LEGACY_PREVIOUS_FILE = os.path.join(".coderecon", "analysis_previous.json")
+
+
+def _relative(path: str, root: str | None) -> str:
+    if root and path:
+        rel = os.path.relpath(path, root)
+        if not rel.startswith(".."):
+            path = rel
+    return (path or "?").replace("\\", "/")
+
+
+def signal_key(signal: dict, root: str | None, use_context: bool = True) -> tuple:
+    """
+    What makes two raw signals "the same finding": rule (or signal type),
+    root-relative path, function and the normalized source line's hash. The
+    line number is left out, so code moving up or down is not a change.
+    """
+    context = signal.get("context") if use_context else None
+    return (_relative(signal.get("path"), root), signal.get("rule_id") or signal.get("type"),
+            signal.get("function") or "", context or signal.get("node_type") or "")
+
+
+def _key_hash(key: tuple) -> int:
+    digest = hashlib.blake2b("\0".join(key).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _has_context(path: str) -> bool:
+    """Whether an analysis records line context (older ones only have node types)."""
+    for signal in iter_records(path, "signal_raw"):
+        if signal.get("rule_id"):
+            return signal.get("context") is not None
+    return True
+
+
+def _rows(path: str, use_context: bool):
+    """[key hash, line, path, label, function] per raw signal, streamed."""
+    root = read_header(path).get("root")
+    for signal in iter_records(path, "signal_raw"):
+        key = signal_key(signal, root, use_context)
+        yield [_key_hash(key), signal.get("line") or 0, key[0], key[1], key[2]]
+
+
+def _partition(rows, count: int, directory: str, side: str) -> list:
+    paths = [os.path.join(directory, f"{side}-{n}.jsonl") for n in range(count)]
+    files = [open(p, "w", encoding="utf-8") for p in paths]
+    try:
+        for row in rows:
+            files[row[0] % count].write(json.dumps(row) + "\n")
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def _read_rows(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+class DiffResult:
+    """Counts per (path, label) and per status, plus the first `limit` added and resolved signals."""
+
+    def __init__(self, limit: int = DEFAULT_LIMIT):
+        self.limit = limit
+        self.totals = {"added": 0, "resolved": 0, "moved": 0, "unchanged": 0}
+        self.by_file = defaultdict(lambda: {"added": 0, "resolved": 0, "moved": 0})
+        self.examples = {"added": [], "resolved": []}
+
+    def count(self, status: str, row: list):
+        self.totals[status] += 1
+        if status == "unchanged":
+            return
+        self.by_file[(row[2], row[3])][status] += 1
+        examples = self.examples.get(status)
+        if examples is not None and len(examples) < self.limit:
+            examples.append(row)
+
+    def compare(self, old_rows, new_rows):
+        """Pairs equal keys in line order; surplus occurrences on either side are added or resolved."""
+        groups = defaultdict(lambda: ([], []))
+        for row in old_rows:
+            groups[row[0]][0].append(row)
+        for row in new_rows:
+            groups[row[0]][1].append(row)
+
+        for old, new in groups.values():
+            old.sort(key=lambda r: r[1])
+            new.sort(key=lambda r: r[1])
+            for before, after in zip(old, new):
+                self.count("unchanged" if before[1] == after[1] else "moved", after)
+            for row in new[len(old):]:
+                self.count("added", row)
+            for row in old[len(new):]:
+                self.count("resolved", row)
+
+    def to_dict(self) -> dict:
+        return {
+            "totals": self.totals,
+            "by_file": [{"path": path, "rule": label, **counts}
+                        for (path, label), counts in sorted(self.by_file.items())],
+        }
+
+
+def diff_analyses(old_path: str, new_path: str, limit: int = DEFAULT_LIMIT,
+                  partition_bytes: int = PARTITION_BYTES) -> DiffResult:
+    """
+    Compares the raw signals of two analysis files (NDJSON or legacy JSON)
+    and counts every signal as added, resolved, moved (same finding, new
+    line) or unchanged. Records are streamed; inputs larger than
+    `partition_bytes` are first split by key hash into temp files, so memory
+    holds one partition rather than both analyses.
+    """
+    # Old analyses have no line context; fall back to node types on both sides so keys line up
+    use_context = _has_context(old_path) and _has_context(new_path)
+    result = DiffResult(limit)
+
+    size = os.path.getsize(old_path) + os.path.getsize(new_path)
+    count = min(MAX_PARTITIONS, -(-size // partition_bytes))
+    if count <= 1:
+        result.compare(_rows(old_path, use_context), _rows(new_path, use_context))
+        return result
+
+    with tempfile.TemporaryDirectory(prefix="coderecon_diff_") as tmp:
+        old_parts = _partition(_rows(old_path, use_context), count, tmp, "old")
+        new_parts = _partition(_rows(new_path, use_context), count, tmp, "new")
+        for old_part, new_part in zip(old_parts, new_parts):
+            result.compare(_read_rows(old_part), _read_rows(new_part))
+            os.remove(old_part)
+            os.remove(new_part)
+    return result
+
+
+def _signed(n: int, sign: str) -> str:
+    return f"{sign}{n}" if n else "0"
+
+
+def format_diff(result: DiffResult) -> str:
+    t = result.totals
+    lines = [f"{t['added']} added, {t['resolved']} resolved, {t['moved']} moved, {t['unchanged']} unchanged"]
+    if not result.by_file:
+        return lines[0]
+
+    per_path = defaultdict(list)
+    for (path, label), counts in sorted(result.by_file.items()):
+        per_path[path].append((label, counts))
+    width = max(len(label) for _, label in result.by_file) + 2
+    lines.append(f"  {'rule':<{width}} {'added':>6} {'resolved':>9} {'moved':>6}")
+    for path, rules in per_path.items():
+        lines.append(path)
+        for label, c in rules:
+            lines.append(f"  {label:<{width}} {_signed(c['added'], '+'):>6} {_signed(c['resolved'], '-'):>9} "
+                         f"{c['moved']:>6}")
+
+    for status, mark in (("added", "+"), ("resolved", "-")):
+        examples = result.examples[status]
+        if examples:
+            more = t[status] - len(examples)
+            lines.append(f"{status.capitalize()}{f' (first {len(examples)} of {t[status]})' if more else ''}:")
+            lines.extend(f"  {mark} {label} {path}::{fn or '?'} L{line}"
+                         for _h, line, path, label, fn in sorted(examples, key=lambda r: (r[2], r[1])))
+    return "\n".join(lines)
+
+
+def run_diff_command(args) -> int:
+    """Entry point for `coderecon diff`: previous analysis vs current by default."""
+    old_path = args.old
+    if old_path is None:
+        old_path = PREVIOUS_ANALYSIS_FILE
+        if not os.path.exists(old_path) and os.path.exists(LEGACY_PREVIOUS_FILE):
+            old_path = LEGACY_PREVIOUS_FILE
+    new_path = args.new or ANALYSIS_FILE
+    for path in (old_path, new_path):
+        if not os.path.exists(path):
+            print(f"[coderecon] No analysis at {path}. Run `coderecon scan` (twice, for a previous one) "
+                  f"or pass two analysis files.")
+            return 1
+
+    result = diff_analyses(old_path, new_path, limit=args.limit)
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        print(f"[coderecon] Diff {old_path} -> {new_path}")
+        print(format_diff(result))
+    return 0
@@ -1,23 +1,175 @@
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
+from analyzer.discovery import git
+from analyzer.discovery.ignore import GITIGNORE_FILE, DiscoveryRules
+
 # Move these to a set for O(1) lookup speed
 SUPPORTED_EXTENSIONS = {".py", ".js", ".ts", ".tsx", ".rs", ".go", ".java", ".cpp", ".c", ".h"}
 EXCLUDE_DIRS = {".git", "node_modules", "__pycache__", ".venv", "dist", "build", ".coderecon", "venv", "lib"}
 
+# Pending directories before the walk fans out to threads; narrow trees stay serial
+PARALLEL_FRONTIER = 64
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+NETWORK_FS_TYPES = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "glusterfs", "lustre",
+                    "fuse.sshfs", "fuse.rclone", "fuse.s3fs", "fuse.gcsfuse", "davfs"}
+
 
 def _get_file_metadata(full_path, filename):
     """Fast metadata assembly using pre-calculated values."""
+    st = os.stat(full_path)  # One syscall for both size and mtime (cache fingerprint)
     return {
         "path": full_path,
         "name": filename,
-        "size": os.path.getsize(full_path)  # Only hit the disk if necessary
+        "size": st.st_size,
+        "mtime": st.st_mtime_ns,
     }
 
 
-def discover_files(root_path: str):
+def _is_network_fs(path: str) -> bool:
+    """Best effort: UNC paths on Windows, the /proc/mounts entry on Linux, False elsewhere."""
+    path = os.path.abspath(path)
+    if path.startswith("\\\\"):
+        return True
+    try:
+        with open("/proc/mounts", "r") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    best, fstype = "", ""
+    for mount_point, kind in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+            best, fstype = mount_point, kind
+    return fstype in NETWORK_FS_TYPES
+
+
+def load_rules(root_path: str) -> DiscoveryRules:
+    """Ignore rules for `root_path`: EXCLUDE_DIRS, .gitignore files and .coderecon.toml."""
+    return DiscoveryRules(root_path, EXCLUDE_DIRS)
+
+
+def _scan_dir(dir_path: str, rel: str, chain: tuple, rules: DiscoveryRules):
+    """
+    Lists one directory. Returns its supported files and the subdirectories
+    still to visit; ignored directories are pruned here, before descending.
+    """
+    files, subdirs = [], []
+    try:
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+    except OSError:
+        return files, subdirs
+
+    has_gitignore = any(entry.name == GITIGNORE_FILE for entry in entries)
+    chain = rules.extend(chain, dir_path, rel, has_gitignore)
+
+    for entry in entries:
+        name = entry.name
+        entry_rel = f"{rel}/{name}" if rel else name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if not rules.skip_dir(chain, entry_rel, name):
+                    subdirs.append((entry.path, entry_rel, chain))
+            elif entry.is_file():
+                if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS:
+                    continue
+                if rules.skip_file(chain, entry_rel):
+                    continue
+                st = entry.stat()  # Cached by scandir where the OS provides it (Windows)
+                files.append({"path": entry.path, "name": name, "size": st.st_size, "mtime": st.st_mtime_ns})
+        except OSError:  # Vanished or unreadable between listing and stat
+            continue
+
+    return files, subdirs
+
+
+def _discover_git(root_path: str, rules: DiscoveryRules):
+    """
+    File list and blob ids from the git index in one subprocess call; no
+    directory is listed. git has already applied .gitignore, so only
+    EXCLUDE_DIRS and .coderecon.toml are checked here. Returns None outside
+    a git work tree.
+    """
+    listing = git.list_files(root_path)
+    if listing is None:
+        return None
+
+    files = []
+    for full_path, name, blob in _filter_listing(root_path, listing, rules):
+        try:
+            st = os.stat(full_path)
+        except OSError:  # Deleted in the working tree but still in the index
+            continue
+        file_info = {"path": full_path, "name": name, "size": st.st_size, "mtime": st.st_mtime_ns}
+        if blob:
+            # Index blob id; list_files leaves it out for files with unstaged edits
+            file_info["blob"] = blob
+        files.append(file_info)
+
+    files.sort(key=lambda f: f["path"])
+    return files
+
+
+def discover_revision(root_path: str, rev: str, rules: DiscoveryRules | None = None):
+    """
+    Files of git revision `rev` under `root_path`, listed from the object
+    store (git ls-tree) without a checkout. Paths are where the files would
+    sit in a working tree; "blob" is the content id to read them by and
+    "mtime" is None, so the FileCache matches them by content alone.
+    """
+    if rules is None:
+        rules = load_rules(root_path)
+    listing = git.list_tree(root_path, rev)
+    files = [{"path": full_path, "name": name, "size": size, "mtime": None, "blob": blob}
+             for full_path, name, (blob, size) in _filter_listing(root_path, listing, rules)]
+    files.sort(key=lambda f: f["path"])
+    return files
+
+
+def _filter_listing(root_path: str, listing: dict, rules: DiscoveryRules):
+    """
+    (full path, name, value) for each root-relative "/" path in `listing`
+    that discovery keeps. git has already applied .gitignore, so only
+    EXCLUDE_DIRS and .coderecon.toml are checked here.
+    """
+    skipped = {"": False}
+
+    def dir_skipped(rel_dir: str) -> bool:
+        verdict = skipped.get(rel_dir)
+        if verdict is None:
+            parent, _, name = rel_dir.rpartition("/")
+            verdict = skipped[rel_dir] = dir_skipped(parent) or rules.skip_dir((), rel_dir, name)
+        return verdict
+
+    # Same path strings the walk produces (os.path.join of root and entries), minus the join
+    prefix = root_path if root_path.endswith(("/", os.sep)) else root_path + os.sep
+    check_files = rules.include is not None or bool(rules.exclude.rules)
+
+    for rel, value in listing.items():
+        parent, _, name = rel.rpartition("/")
+        dot = name.rfind(".")
+        if dot <= 0 or name[dot:].lower() not in SUPPORTED_EXTENSIONS:
+            continue
+        if dir_skipped(parent) or (check_files and rules.skip_file((), rel)):
+            continue
+        yield prefix + (rel if os.sep == "/" else rel.replace("/", os.sep)), name, value
+
+
+def discover_files(root_path: str, workers: int | None = None, rules: DiscoveryRules | None = None,
+                   backend: str | None = None):
     """
     High-speed discovery using os.scandir to minimize system calls.
+    Honours .gitignore and .coderecon.toml, pruning ignored directories
+    before they are listed. On network filesystems (or with `workers` set in
+    .coderecon.toml) the walk fans out to a thread pool once the frontier is
+    wide, overlapping directory round-trips; local disks stay serial, where
+    the GIL makes threads a net loss. Results are sorted by path.
+
+    backend="git" (or `backend = "git"` in .coderecon.toml) reads the list
+    from the git index instead of walking, falling back to the walk outside
+    a git checkout.
     """
     # 1. Handle Single File Input Fast
     if os.path.isfile(root_path):
@@ -25,22 +177,37 @@ def discover_files(root_path: str):
             return [_get_file_metadata(root_path, os.path.basename(root_path))]
         return []
 
+    if rules is None:
+        rules = load_rules(root_path)
+
+    if (backend or rules.config.get("backend", "walk")) == "git":
+        files = _discover_git(root_path, rules)
+        if files is not None:
+            return files
+        print(f"[coderecon] '{root_path}' is not a git checkout; walking the filesystem instead.")
+
+    if workers is None:
+        workers = rules.workers or (DEFAULT_WORKERS if _is_network_fs(root_path) else 1)
+
     files = []
-    stack = [root_path]
+    stack = [(root_path, "", ())]
 
-    # 2. Manual Stack Walk (often faster than os.walk for deep trees)
-    while stack:
-        current_dir = stack.pop()
-        try:
-            with os.scandir(current_dir) as it:
-                for entry in it:
-                    if entry.is_dir():
-                        if entry.name not in EXCLUDE_DIRS:
-                            stack.append(entry.path)
-                    elif entry.is_file():
-                        if os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:
-                            files.append(_get_file_metadata(entry.path, entry.name))
-        except PermissionError:
-            continue
+    # 2. Serial stack walk (often faster than os.walk for deep trees)
+    while stack and (workers <= 1 or len(stack) < PARALLEL_FRONTIER):
+        found, subdirs = _scan_dir(*stack.pop(), rules)
+        files.extend(found)
+        stack.extend(subdirs)
+
+    # 3. Wide frontier: every pending directory becomes a pool task
+    if stack:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(_scan_dir, *task, rules) for task in stack}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    found, subdirs = future.result()
+                    files.extend(found)
+                    pending.update(pool.submit(_scan_dir, *task, rules) for task in subdirs)
 
-    return files
\ No newline at end of file
+    files.sort(key=lambda f: f["path"])
+    return files
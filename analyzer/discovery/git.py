@@ -0,0 +1,127 @@
+import os
+import subprocess
+
+
+def _git(root: str, *args) -> bytes | None:
+    """stdout of `git -C root <args>`, or None when git is missing or the command fails."""
+    try:
+        result = subprocess.run(["git", "-C", root, *args], capture_output=True)
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def list_files(root: str) -> dict | None:
+    """
+    Every tracked and untracked-but-not-ignored file under `root`, from
+    `git ls-files -s -z`. Maps root-relative "/" paths to the blob id staged
+    in the index, or None for untracked files and files with unstaged edits
+    (their index blob is not what is on disk). None if `root` is not inside
+    a git work tree.
+    """
+    out = _git(root, "ls-files", "-s", "-z", "--cached", "--others", "--exclude-standard")
+    if out is None:
+        return None
+    modified = {os.fsdecode(p) for p in (_git(root, "ls-files", "-m", "-z") or b"").split(b"\0") if p}
+
+    listing = {}
+    for line in os.fsdecode(out).split("\0"):
+        if not line:
+            continue
+        meta, tab, rel = line.partition("\t")
+        if tab:
+            # "<mode> <blob> <stage>\t<path>"; merge conflicts list a path once per stage
+            listing.setdefault(rel, None if rel in modified else meta.split(" ")[1])
+        else:
+            listing[line] = None
+    return listing
+
+
+def changed_files(root: str, rev: str) -> list:
+    """
+    Root-relative paths that differ between `rev` and the working tree
+    (committed, staged, unstaged and untracked-but-not-ignored; renames
+    show up as delete + add). Raises RuntimeError when `rev` does not resolve.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "-C", root, "diff", "--name-only", "-z", "--no-renames", "--relative", rev, "--"],
+            capture_output=True,
+        )
+    except OSError as e:
+        raise RuntimeError(f"git is not available: {e}")
+    if result.returncode != 0:
+        raise RuntimeError(f"git diff against '{rev}' failed: {result.stderr.decode(errors='ignore').strip()}")
+    changed = [os.fsdecode(p) for p in result.stdout.split(b"\0") if p]
+    # git diff only sees tracked files; new files that were never added are changes too
+    untracked = _git(root, "ls-files", "--others", "--exclude-standard", "-z") or b""
+    changed.extend(os.fsdecode(p) for p in untracked.split(b"\0") if p)
+    return changed
+
+
+def resolve_commit(root: str, rev: str) -> str:
+    """Full commit SHA of `rev` in the repository at `root`; RuntimeError when it does not resolve."""
+    out = _git(root, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}")
+    if not out:
+        raise RuntimeError(f"'{rev}' is not a commit in {root}")
+    return out.decode().strip()
+
+
+def list_tree(root: str, rev: str) -> dict:
+    """
+    Every file of `rev` under `root`, from one `git ls-tree -r -z --long` call:
+    maps root-relative "/" paths to (blob id, size in bytes). Submodules
+    and symlinks are left out; nothing is read from the working tree.
+    """
+    out = _git(root, "ls-tree", "-r", "-z", "--long", rev)
+    if out is None:
+        raise RuntimeError(f"git ls-tree failed for '{rev}' in {root}")
+
+    listing = {}
+    for line in os.fsdecode(out).split("\0"):
+        if not line:
+            continue
+        # "<mode> blob <sha> <size>\t<path>"; the size is right-aligned
+        meta, _, rel = line.partition("\t")
+        mode, kind, sha, size = meta.split()
+        if kind == "blob" and mode != "120000":
+            listing[rel] = (sha, int(size))
+    return listing
+
+
+class BlobReader:
+    """
+    One `git cat-file --batch` process: read(sha) writes the id to its
+    stdin and reads back the object, so a whole batch of files streams
+    through a single subprocess with no working-tree writes. close() (or
+    leaving the `with` block) ends the process.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._proc = subprocess.Popen(["git", "-C", root, "cat-file", "--batch"],
+                                      stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, sha: str) -> bytes:
+        self._proc.stdin.write(sha.encode() + b"\n")
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline().split()
+        if len(header) != 3:  # "<sha> missing"
+            raise KeyError(sha)
+        size = int(header[2])
+        data = self._proc.stdout.read(size)
+        self._proc.stdout.read(1)  # Trailing newline
+        return data
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait()
+        self._proc.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
@@ -0,0 +1,213 @@
+import os
+import re
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+CONFIG_FILE = ".coderecon.toml"
+GITIGNORE_FILE = ".gitignore"
+
+
+def _translate(pattern: str) -> str:
+    """gitignore glob -> regex body. `*`/`?` stay inside one path segment, `**` crosses them."""
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 2)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def compile_pattern(line: str):
+    """One gitignore line -> (regex, negate, dir_only), or None for blanks and comments."""
+    line = line.rstrip("\r\n")
+    if not line.endswith("\\ "):
+        line = line.rstrip()
+    if not line or line.startswith("#"):
+        return None
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith(("\\#", "\\!")):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the ignore file's directory
+    anchored = "/" in line
+    body = _translate(line.lstrip("/"))
+    return ("" if anchored else "(?:.*/)?") + body, negate, dir_only
+
+
+class IgnoreMatcher:
+    """
+    Compiled patterns of one ignore file. match() returns True (ignored),
+    False (re-included by a `!` pattern) or None (no pattern applies).
+    Without negations every pattern is folded into one regex per kind.
+    """
+
+    __slots__ = ("rules", "_any", "_files")
+
+    def __init__(self, lines):
+        compiled = [r for r in map(compile_pattern, lines) if r]
+        self.rules = [(re.compile(regex, re.DOTALL), negate, dir_only) for regex, negate, dir_only in compiled]
+        self._any = self._files = None
+        if not any(negate for _, negate, _ in compiled):
+            self._any = self._fold(regex for regex, _, _ in compiled)
+            self._files = self._fold(regex for regex, _, dir_only in compiled if not dir_only)
+
+    @staticmethod
+    def _fold(regexes):
+        regexes = list(regexes)
+        if not regexes:
+            return None
+        return re.compile("|".join(f"(?:{r})" for r in regexes), re.DOTALL)
+
+    def match(self, rel: str, is_dir: bool):
+        if self._any is not None or not self.rules:
+            folded = self._any if is_dir else self._files
+            return True if folded is not None and folded.fullmatch(rel) else None
+
+        # Last matching pattern wins
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel):
+                return not negate
+        return None
+
+
+def load_config(root: str) -> dict:
+    """The [discovery] table of .coderecon.toml, or {} when absent or unreadable."""
+    path = os.path.join(root, CONFIG_FILE)
+    if not os.path.isfile(path):
+        return {}
+    if tomllib is None:
+        print(f"[coderecon] Warning: {CONFIG_FILE} ignored (needs Python 3.11+ or the 'tomli' package)")
+        return {}
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f).get("discovery", {})
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        print(f"[coderecon] Warning: could not read {CONFIG_FILE}: {e}")
+        return {}
+
+
+def _read_lines(path: str) -> list:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+
+class DiscoveryRules:
+    """
+    Everything that decides whether a path is scanned: the built-in
+    excluded directory names, .gitignore files (nested ones apply to their
+    own subtree), and the include/exclude globs of .coderecon.toml.
+    Paths are matched relative to the root with "/" separators.
+    """
+
+    def __init__(self, root: str, exclude_dirs=(), config: dict | None = None):
+        self.root = os.path.abspath(root)
+        self.config = load_config(root) if config is None else config
+        self.exclude_dirs = set(exclude_dirs)
+        self.use_gitignore = self.config.get("gitignore", True)
+        self.workers = self.config.get("workers")
+        self.exclude = IgnoreMatcher(self.config.get("exclude", []))
+        include = self.config.get("include", [])
+        self.include = IgnoreMatcher(include) if include else None
+        self._gitignores = {}
+
+    def gitignore(self, dir_path: str, rel: str):
+        """Cached (base, matcher) for the .gitignore in `dir_path`, or None."""
+        if rel not in self._gitignores:
+            lines = _read_lines(os.path.join(dir_path, GITIGNORE_FILE)) if self.use_gitignore else []
+            matcher = IgnoreMatcher(lines)
+            self._gitignores[rel] = (rel, matcher) if matcher.rules else None
+        return self._gitignores[rel]
+
+    def extend(self, chain: tuple, dir_path: str, rel: str, has_gitignore: bool) -> tuple:
+        """The ignore chain in effect inside `dir_path`, deepest .gitignore last."""
+        if not (has_gitignore and self.use_gitignore):
+            return chain
+        entry = self.gitignore(dir_path, rel)
+        return chain + (entry,) if entry else chain
+
+    def _ignored_by(self, chain: tuple, rel: str, is_dir: bool) -> bool:
+        if self.exclude.rules and self.exclude.match(rel, is_dir):
+            return True
+        for base, matcher in reversed(chain):
+            verdict = matcher.match(rel[len(base) + 1:] if base else rel, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def skip_dir(self, chain: tuple, rel: str, name: str) -> bool:
+        return name in self.exclude_dirs or self._ignored_by(chain, rel, True)
+
+    def included(self, rel: str) -> bool:
+        """Whether `rel` or one of its directories matches an include glob: "src" covers the subtree."""
+        if self.include is None or self.include.match(rel, False):
+            return True
+        parts = rel.split("/")
+        return any(self.include.match("/".join(parts[:depth]), True) for depth in range(1, len(parts)))
+
+    def skip_file(self, chain: tuple, rel: str) -> bool:
+        if not self.included(rel):
+            return True
+        return self._ignored_by(chain, rel, False)
+
+    def ignored(self, path: str, is_dir: bool = False) -> bool:
+        """Full check for one arbitrary path (watch events), loading .gitignores along the way."""
+        rel = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+        if rel.startswith("../"):
+            return True
+        parts = rel.split("/")
+        chain = self.extend((), self.root, "", True)
+        for depth in range(1, len(parts)):
+            dir_rel = "/".join(parts[:depth])
+            if self.skip_dir(chain, dir_rel, parts[depth - 1]):
+                return True
+            chain = self.extend(chain, os.path.join(self.root, *parts[:depth]), dir_rel, True)
+        if is_dir:
+            return self.skip_dir(chain, rel, parts[-1])
+        return self.skip_file(chain, rel)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import subprocess
+import time
+from pathlib import Path
+
+from analyzer.discovery.files import SUPPORTED_EXTENSIONS
+
+# Under .coderecon/ so `coderecon clean` takes it with the other caches
+CLONE_CACHE_DIR = Path(os.getenv("CODERECON_CLONE_DIR") or Path(".coderecon") / "clones")
+CLONE_CACHE_MAX_BYTES = int(os.getenv("CODERECON_CLONE_CACHE_MB", "512")) * 1024 * 1024
+
+# Kept inside .git so discovery never sees it
+STATE_FILE = "coderecon-clone.json"
+
+# URL schemes git clones from, plus scp-style "user@host:path"
+REMOTE_URL_RE = re.compile(r"^(?:(?:https?|ssh|git|file)://|[\w.-]+@[\w.-]+:)")
+
+# Checked out besides source files: explain reads the README, discovery the ignore rules and config
+EXTRA_CHECKOUT = ("/README.md", ".gitignore", "/.coderecon.toml")
+
+
+def is_bare_repo(path: str) -> bool:
+    return (os.path.isdir(path) and os.path.isfile(os.path.join(path, "HEAD"))
+            and os.path.isdir(os.path.join(path, "objects")) and os.path.isdir(os.path.join(path, "refs")))
+
+
+def is_remote(target: str) -> bool:
+    """Anything git can clone that is not a working tree on disk: URLs and local bare repositories."""
+    target = target.strip()
+    return bool(REMOTE_URL_RE.match(target)) or is_bare_repo(target)
+
+
+def _normalize(url: str) -> str:
+    url = url.strip().rstrip("/")
+    return os.path.abspath(url) if is_bare_repo(url) else url
+
+
+def _git(*args, cwd=None) -> str:
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+    except OSError as e:
+        raise RuntimeError(f"git is not available: {e}")
+    if result.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def resolve_sha(url: str, ref: str = "HEAD") -> str:
+    """Commit `ref` points at on the remote, via ls-remote (no objects are downloaded)."""
+    if re.fullmatch(r"[0-9a-f]{40}", ref):
+        return ref
+    for line in _git("ls-remote", url, ref).splitlines():
+        sha, _, name = line.partition("\t")
+        if name in (ref, f"refs/heads/{ref}", f"refs/tags/{ref}^{{}}", f"refs/tags/{ref}"):
+            return sha
+    raise RuntimeError(f"'{ref}' not found in {url}")
+
+
+def sparse_patterns() -> list:
+    return [f"*{ext}" for ext in sorted(SUPPORTED_EXTENSIONS)] + list(EXTRA_CHECKOUT)
+
+
+def _read_state(dest: Path) -> dict:
+    try:
+        with open(dest / ".git" / STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(dest: Path, state: dict):
+    with open(dest / ".git" / STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def _init(dest: Path, url: str):
+    if dest.exists():
+        _rmtree(dest)
+    dest.mkdir(parents=True)
+    _git("init", "-q", str(dest))
+    _git("remote", "add", "origin", url, cwd=dest)
+    # Only source files (and what discovery reads) are checked out, so only their blobs are fetched
+    _git("config", "core.sparseCheckout", "true", cwd=dest)
+    with open(dest / ".git" / "info" / "sparse-checkout", "w", encoding="utf-8") as f:
+        f.write("\n".join(sparse_patterns()) + "\n")
+
+
+def fetch_clone(url: str, ref: str = "HEAD", cache_dir=CLONE_CACHE_DIR,
+                max_bytes: int = CLONE_CACHE_MAX_BYTES) -> tuple:
+    """
+    Checkout of `url` at `ref` from the clone cache, as (path, commit sha).
+    Each URL keeps one sparse, blob-filtered, depth-1 repository under
+    `cache_dir`; the resolved SHA is recorded next to it. Same SHA: reused
+    without touching the network beyond ls-remote. New SHA: fetched into the
+    same repository and checked out, which rewrites only the files whose
+    blobs changed, so unchanged files keep their mtimes and their per-file
+    analysis is served from the FileCache. Least recently used repositories
+    are evicted once the cache passes `max_bytes`.
+    """
+    url = _normalize(url)
+    cache_dir = Path(cache_dir)
+
+    # 1. Resolve the commit without downloading anything
+    sha = resolve_sha(url, ref)
+    dest = (cache_dir / hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]).absolute()
+    state = _read_state(dest)
+    if state.get("url") == url and state.get("sha") == sha:
+        print(f"[coderecon] Using cached clone of {url} at {sha[:12]}")
+        state["used"] = time.time()
+        _write_state(dest, state)
+        return dest, sha
+
+    # 2. Shallow, blob-filtered fetch; blobs arrive on checkout, for sparse paths only
+    print(f"[coderecon] Fetching {url} at {sha[:12]} into the clone cache...")
+    if state.get("url") != url or not (dest / ".git").is_dir():
+        _init(dest, url)
+    _git("fetch", "-q", "--depth", "1", "--filter=blob:none", "origin", ref, cwd=dest)
+    fetched = _git("rev-parse", "FETCH_HEAD", cwd=dest).strip()
+    _git("checkout", "-q", "--force", "--detach", fetched, cwd=dest)
+    _write_state(dest, {"url": url, "ref": ref, "sha": fetched, "used": time.time()})
+
+    evict(cache_dir, max_bytes, keep=dest)
+    return dest, fetched
+
+
+def _tree_size(path: Path) -> int:
+    total = 0
+    for dir_path, _dirs, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.lstat(os.path.join(dir_path, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def evict(cache_dir=CLONE_CACHE_DIR, max_bytes: int = CLONE_CACHE_MAX_BYTES, keep: Path | None = None) -> list:
+    """Deletes least recently used clones until the cache fits `max_bytes`; returns the removed paths."""
+    entries = []
+    for dest in Path(cache_dir).iterdir() if Path(cache_dir).is_dir() else ():
+        if dest.is_dir():
+            entries.append((_read_state(dest).get("used", 0), _tree_size(dest), dest.absolute()))
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for _used, size, dest in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if keep is not None and dest == Path(keep).absolute():
+            continue
+        _rmtree(dest)
+        total -= size
+        removed.append(dest)
+
+    if removed:
+        # Their per-file cache entries point at paths that no longer exist
+        from analyzer.cache import FileCache
+        cache = FileCache().load()
+        for dest in removed:
+            cache.prune(str(dest), [])
+        cache.save()
+    return removed
+
+
+def _rmtree(path: Path):
+    # Pack files are read-only, which Windows refuses to delete
+    def onerror(func, path_str, _exc_info):
+        os.chmod(path_str, stat.S_IWRITE)
+        func(path_str)
+
+    shutil.rmtree(path, onerror=onerror)
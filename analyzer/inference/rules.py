@@ -0,0 +1,33 @@
+import ast
+
+from analyzer.inference.engine import TRY_NODES, register_rule
+
+
+@register_rule("CR1001", "Deep Nesting", "high")
+def deep_nesting(node, frame):
+    if frame.max_depth > 3:
+        return f"Logic nested {frame.max_depth} levels deep. High cognitive load."
+
+
+@register_rule("CR2001", "Loop execution", "medium", (ast.For, ast.AsyncFor, ast.While))
+def loop_execution(node, frame):
+    return "Potential for infinite loops or O(n) performance hits."
+
+
+@register_rule("CR3001", "Exception path", "low", TRY_NODES)
+def exception_path(node, frame):
+    return "Complexity in error recovery paths."
+
+
+@register_rule("CR4001", "Math risk", "medium", (ast.BinOp,))
+def division_risk(node, frame):
+    if isinstance(node.op, ast.Div):
+        return "Division operation without visible zero-check."
+
+
+@register_rule("CR1002", "Large Function", "medium")
+def large_function(node, frame):
+    # Detect "God Functions" (Length-based)
+    length = node.end_lineno - node.lineno
+    if length > 50:
+        return f"Function is {length} lines long. Suggest refactoring."
@@ -0,0 +1,137 @@
+from array import array
+
+# Column sentinels: the field was None / the record did not have the field at all
+NONE = -1
+ABSENT = -2
+
+_MISSING = object()
+
+
+class StringPool:
+    """Interns strings to dense ids; one pool is shared by every table of an analysis."""
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def id(self, value) -> int:
+        if value is None:
+            return NONE
+        i = self.ids.get(value)
+        if i is None:
+            i = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class RecordTable:
+    """
+    Append-only columnar table of flat records. Strings are pool ids and
+    ints are stored in array('i') columns (4 bytes a field instead of a
+    dict slot plus a boxed object); "int_list" fields are one flat array
+    plus end offsets. Iterating or indexing yields dicts in the public
+    JSON shape, built on demand, so tables can stand in for the lists of
+    dicts the rest of the code reads. Fields a record lacked stay absent.
+    """
+
+    FIELDS = ()  # (name, "str" | "int" | "int_list"), in public key order
+
+    __slots__ = ("pool", "columns", "lists")
+
+    def __init__(self, records=(), pool: StringPool | None = None):
+        self.pool = pool if pool is not None else StringPool()
+        self.columns = [array("i") for _ in self.FIELDS]
+        self.lists = {name: (array("i"), array("i")) for name, kind in self.FIELDS if kind == "int_list"}
+        self.extend(records)
+
+    def append(self, record: dict):
+        pool_id = self.pool.id
+        for (name, kind), column in zip(self.FIELDS, self.columns):
+            value = record.get(name, _MISSING)
+            if value is _MISSING:
+                column.append(ABSENT)
+            elif value is None:
+                column.append(NONE)
+            elif kind == "str":
+                column.append(pool_id(value))
+            elif kind == "int":
+                column.append(value)
+            else:
+                flat, ends = self.lists[name]
+                flat.extend(value)
+                ends.append(len(flat))
+                column.append(len(ends) - 1)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def _row(self, i: int) -> dict:
+        values = self.pool.values
+        row = {}
+        for (name, kind), column in zip(self.FIELDS, self.columns):
+            v = column[i]
+            if v == ABSENT:
+                continue
+            if v == NONE:
+                row[name] = None
+            elif kind == "str":
+                row[name] = values[v]
+            elif kind == "int":
+                row[name] = v
+            else:
+                flat, ends = self.lists[name]
+                row[name] = flat[ends[v - 1] if v else 0:ends[v]].tolist()
+        return row
+
+    def __iter__(self):
+        return map(self._row, range(len(self)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return self._row(index)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {len(self)} records>"
+
+    def to_list(self) -> list:
+        """The public JSON shape, for code that needs real dicts to mutate or serialize."""
+        return list(self)
+
+    def nbytes(self) -> int:
+        """Bytes held by the columns (the shared string pool not included)."""
+        total = sum(c.itemsize * len(c) for c in self.columns)
+        return total + sum(f.itemsize * len(f) + e.itemsize * len(e) for f, e in self.lists.values())
+
+
+class SignalTable(RecordTable):
+    """Raw signals; every signal type's keys are a subsequence of this order."""
+
+    FIELDS = (
+        ("type", "str"), ("function", "str"), ("path", "str"), ("line", "int"), ("length", "int"),
+        ("case", "str"), ("rule_id", "str"), ("node_type", "str"), ("context", "str"), ("severity", "str"),
+    )
+    __slots__ = ()
+
+
+class SignalGroupTable(RecordTable):
+    """Aggregated signals, as produced by aggregate_signals."""
+
+    FIELDS = (
+        ("type", "str"), ("path", "str"), ("function", "str"), ("case", "str"), ("rule_id", "str"),
+        ("severity", "str"), ("count", "int"), ("lines", "int_list"),
+    )
+    __slots__ = ()
@@ -0,0 +1,224 @@
+import ast
+import builtins
+import os
+import re
+from pathlib import Path
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+# A Python call to id() or open() means the builtin unless the caller's own file redefines it
+PYTHON_BUILTINS = frozenset(dir(builtins))
+
+# Identifier directly followed by "(": a call site in every C-style language we scan. Member
+# calls are skipped (obj.get() says nothing about which get) except on this/self, kept as "self.name"
+CALL_RE = re.compile(r"(?:\b(?:this|self)\s*\.\s*(?=[A-Za-z_]\w*\s*\()(?P<member>)|(?<![\w.]))([A-Za-z_]\w*)\s*\(")
+
+# Words that look like calls but are control flow, declarations or operators
+CALL_KEYWORDS = {
+    "if", "for", "while", "switch", "catch", "return", "export", "default",
+    "function", "fn", "def", "class", "new", "typeof", "sizeof", "await",
+    "async", "super", "match", "else", "elif", "and", "or", "not", "in",
+    "defer", "go", "func", "throw", "yield", "with", "assert", "lambda",
+}
+
+
+def import_aliases(tree) -> dict:
+    """
+    Local name -> dotted module path for every import in the module (function
+    level ones included): `import a.b as c` binds c to "a.b", `from a import b`
+    binds b to "a.b", and relative imports keep their leading dots. Names
+    bound to two different modules map to None.
+    """
+    aliases = {}
+
+    def bind(name, target):
+        aliases[name] = target if aliases.get(name, target) == target else None
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for a in node.names:
+                if a.asname:
+                    bind(a.asname, a.name)
+                else:
+                    top = a.name.split(".")[0]
+                    bind(top, top)
+        elif isinstance(node, ast.ImportFrom):
+            base = "." * node.level + (node.module or "")
+            for a in node.names:
+                if a.name != "*":
+                    bind(a.asname or a.name, f"{base}.{a.name}" if node.module else base + a.name)
+    return aliases
+
+
+def _callee(func, aliases: dict) -> str | None:
+    """
+    How a call target is recorded: "name" for a plain local call, "self.name"
+    for self./cls. methods, and "module.path.name" when the root is an
+    imported name. Calls on anything else (d.get(), f().x()) give None:
+    their receiver's type is unknown, so the name alone would be a guess.
+    """
+    if isinstance(func, ast.Name):
+        target = aliases.get(func.id)
+        return target if target else func.id
+    attrs = []
+    while isinstance(func, ast.Attribute):
+        attrs.append(func.attr)
+        func = func.value
+    if not isinstance(func, ast.Name):
+        return None
+    attrs.reverse()
+    if func.id in ("self", "cls"):
+        return "self." + attrs[-1]
+    target = aliases.get(func.id)
+    return ".".join([target, *attrs]) if target else None
+
+
+def python_calls_by_function(tree) -> dict:
+    """
+    One traversal of the module. Maps id(function node) -> sorted callees
+    (see _callee), attributing each call to its innermost enclosing function.
+    """
+    aliases = import_aliases(tree)
+    calls = {}
+    stack = [(tree, None)]
+
+    while stack:
+        node, owner = stack.pop()
+        if isinstance(node, FUNCTION_NODES):
+            owner = calls.setdefault(id(node), set())
+        elif owner is not None and isinstance(node, ast.Call):
+            callee = _callee(node.func, aliases)
+            if callee:
+                owner.add(callee)
+        for child in ast.iter_child_nodes(node):
+            stack.append((child, owner))
+
+    return {k: sorted(v) for k, v in calls.items()}
+
+
+def regex_calls_by_span(content: str, spans: list) -> list:
+    """
+    Lexical fallback for non-Python files. `spans` are (start, end, name)
+    offsets of each function, sorted by start; every call site is assigned
+    to the function whose span contains it in a single linear pass.
+    Returns one sorted callee list per span.
+    """
+    calls = [set() for _ in spans]
+    if not spans:
+        return []
+
+    i = 0
+    for match in CALL_RE.finditer(content, spans[0][0]):
+        pos = match.start()
+        while i < len(spans) and pos >= spans[i][1]:
+            i += 1
+        if i == len(spans):
+            break
+        start, _end, name = spans[i]
+        callee = match.group(2)
+        if pos < start or callee in CALL_KEYWORDS:
+            continue
+        calls[i].add(callee if match.group("member") is None else "self." + callee)
+
+    return [sorted(c) for c in calls]
+
+
+def build_symbol_index(functions) -> dict:
+    """name -> set of paths defining it. Built once, O(total functions)."""
+    index = {}
+    for fn in functions:
+        name, path = fn.get("name"), fn.get("path")
+        if name and path:
+            index.setdefault(name, set()).add(path)
+    return index
+
+
+def _module_index(paths) -> tuple:
+    """
+    Dotted module suffix -> paths ("analyzer/cache.py" answers to "cache" and
+    "analyzer.cache"; packages to their __init__.py), plus normalized path ->
+    path for relative imports.
+    """
+    by_module, by_file = {}, {}
+    for path in paths:
+        p = Path(path)
+        by_file[os.path.normcase(os.path.normpath(path))] = path
+        parts = list(p.parent.parts) + ([] if p.stem == "__init__" else [p.stem])
+        for k in range(1, len(parts) + 1):
+            by_module.setdefault(".".join(parts[-k:]), set()).add(path)
+    return by_module, by_file
+
+
+def _module_file(module: str, src_path: str, modules: tuple) -> str | None:
+    """The project file `module` (absolute or relative to `src_path`) refers to, if exactly one."""
+    by_module, by_file = modules
+    if not module.startswith("."):
+        found = by_module.get(module)
+        return next(iter(found)) if found and len(found) == 1 else None
+    rest = module.lstrip(".")
+    base = Path(src_path).parent
+    for _ in range(len(module) - len(rest) - 1):
+        base = base.parent
+    target = base.joinpath(*rest.split(".")) if rest else base
+    for candidate in (target.with_name(target.name + ".py"), target / "__init__.py"):
+        found = by_file.get(os.path.normcase(os.path.normpath(str(candidate))))
+        if found:
+            return found
+    return None
+
+
+def resolve_calls(functions, index=None):
+    """
+    Yields (src_path, src_name, dst_path, dst_name) for every call that can be
+    resolved. A plain name prefers a definition in the caller's own file,
+    otherwise must be defined in exactly one file (Python builtins only
+    resolve in-file); "self.name" only matches
+    the caller's own file; "module.path.name" goes to the file the import
+    names (the longest module prefix that is a project file) and nowhere
+    else. Builtins, ambiguous names and imports from outside the project are
+    dropped. Linear in the total number of call sites.
+    """
+    functions = list(functions)
+    if index is None:
+        index = build_symbol_index(functions)
+    modules = None
+
+    for fn in functions:
+        src_path, src_name = fn.get("path"), fn.get("name")
+        if not src_path:
+            continue
+        for callee in fn.get("called_functions") or ():
+            if "." not in callee:
+                targets = index.get(callee)
+                if not targets:
+                    continue
+                if src_path in targets:
+                    dst_path = src_path
+                elif len(targets) == 1 and not (callee in PYTHON_BUILTINS and src_path.endswith(".py")):
+                    dst_path = next(iter(targets))
+                else:
+                    continue
+                yield src_path, src_name, dst_path, callee
+                continue
+
+            # Relative imports keep their leading dots: ".b.bf" is bf in the sibling module b
+            rest = callee.lstrip(".")
+            dots = callee[:len(callee) - len(rest)]
+            qualifier, _, name = rest.rpartition(".")
+            targets = index.get(name) or ()
+            if not dots and qualifier == "self":
+                if src_path in targets:
+                    yield src_path, src_name, src_path, name
+                continue
+            if not targets:
+                continue
+            if modules is None:
+                modules = _module_index({f.get("path") for f in functions if f.get("path")})
+            # "pkg.mod.Class.method": the module is the longest prefix that is a file
+            parts = qualifier.split(".") if qualifier else []
+            for k in range(len(parts), -1 if dots else 0, -1):
+                dst_path = _module_file(dots + ".".join(parts[:k]), src_path, modules)
+                if dst_path is not None:
+                    if dst_path in targets:
+                        yield src_path, src_name, dst_path, name
+                    break
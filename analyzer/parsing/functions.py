@@ -1,6 +1,9 @@
 import re
 from pathlib import Path
 
+from analyzer.parsing.calls import python_calls_by_function, regex_calls_by_span
+from analyzer.parsing.lines import LineIndex
+
 # Pre-compiled for speed. Optimized for Rust, TSX, JS, Go, and C-style syntax.
 # Also added a group for Python 'def' as a secondary regex fallback.
 GENERIC_FUNCTION_RE = re.compile(
@@ -12,27 +15,36 @@ GENERIC_FUNCTION_RE = re.compile(
 RESERVED = {"if", "for", "while", "switch", "catch", "return", "export", "default"}
 
 
-def extract_functions(file_path: str, content: str):
+def extract_functions(file_path: str, content: str, tree=None, lines: LineIndex | None = None,
+                      parse_failed: bool = False):
     """
     High-speed extraction: AST for Python, Regex for everything else.
+    Pass an already-parsed `tree` to avoid parsing the module a second time,
+    or parse_failed=True when the caller's parse already failed, and the
+    file's shared LineIndex to avoid rebuilding it.
     """
     path = Path(file_path)
     functions = []
     suffix = path.suffix.lower()
 
     # 1. PYTHON AST PARSING (Primary for .py)
-    if suffix == ".py":
+    if suffix == ".py" and not parse_failed:
         import ast
         try:
-            tree = ast.parse(content)
+            if tree is None:
+                tree = ast.parse(content)
+            calls = python_calls_by_function(tree)
+            path_str = str(path)  # One shared string for every function in the file
             for node in ast.walk(tree):
                 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                     functions.append({
                         "name": node.name,
                         "line": node.lineno,
-                        "path": str(path),
+                        "end_line": node.end_lineno,
+                        "path": path_str,
                         "type": "python_ast",
-                        "length": len(node.body)  # Real logic density
+                        "length": len(node.body),  # Real logic density
+                        "called_functions": calls.get(id(node), []),
                     })
             return functions
         except SyntaxError:
@@ -40,17 +52,34 @@ def extract_functions(file_path: str, content: str):
 
     # 2. MULTI-LANGUAGE REGEX DISCOVERY (For Rust, JS, TS, Go, and failing Py files)
     # Using finditer is faster as it doesn't build the whole list at once
+    matches = []
     for match in GENERIC_FUNCTION_RE.finditer(content):
         # Extract the first non-None group (the function name)
         func_name = next((g for g in match.groups() if g), None)
 
         if func_name and func_name not in RESERVED:
-            functions.append({
-                "name": func_name,
-                "line": content.count("\n", 0, match.start()) + 1,
-                "path": str(path),
-                "type": "regex_discovery",
-                "length": 0  # Placeholder for regex-found functions
-            })
-
-    return functions
\ No newline at end of file
+            matches.append((match, func_name))
+
+    # A function's body runs from the end of its header to the next header
+    spans = [
+        (match.end(), matches[i + 1][0].start() if i + 1 < len(matches) else len(content), func_name)
+        for i, (match, func_name) in enumerate(matches)
+    ]
+    calls = regex_calls_by_span(content, spans)
+    path_str = str(path)
+    if lines is None and matches:
+        lines = LineIndex(content)
+
+    for (match, func_name), (_start, end, _name), called in zip(matches, spans, calls):
+        line, end_line = lines.span(match.start(), end)
+        functions.append({
+            "name": func_name,
+            "line": line,
+            "end_line": end_line,
+            "path": path_str,
+            "type": "regex_discovery",
+            "length": 0,  # Placeholder for regex-found functions
+            "called_functions": called,
+        })
+
+    return functions
@@ -0,0 +1,23 @@
+import ast
+
+
+def _top_module_name(mod: str | None) -> str | None:
+    if not mod:
+        return None
+    return mod.split(".")[0]
+
+
+def extract_imports(tree) -> list:
+    """Return sorted top-level imported module names from an already-parsed module."""
+    imports = set()
+    for n in ast.walk(tree):
+        if isinstance(n, ast.Import):
+            for a in n.names:
+                top = _top_module_name(a.name)
+                if top:
+                    imports.add(top)
+        elif isinstance(n, ast.ImportFrom):
+            top = _top_module_name(n.module)
+            if top:
+                imports.add(top)
+    return sorted(imports)
@@ -0,0 +1,55 @@
+import hashlib
+import re
+from array import array
+from bisect import bisect_right
+
+NEWLINE_RE = re.compile("\n")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+class LineIndex:
+    """
+    Start offset of every line in a file, built with one scan. Offset -> line
+    lookups are a bisect instead of counting newlines from the top of the
+    file each time, so a file with N functions costs O(size + N log lines).
+    Lines are 1-based to match ast's lineno.
+    """
+
+    __slots__ = ("content", "starts")
+
+    def __init__(self, content: str):
+        self.content = content
+        self.starts = array("q", [0])
+        self.starts.extend(m.end() for m in NEWLINE_RE.finditer(content))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def line_of(self, offset: int) -> int:
+        return bisect_right(self.starts, offset)
+
+    def offset_of(self, line: int) -> int:
+        return self.starts[min(max(line, 1), len(self.starts)) - 1]
+
+    def span(self, start: int, end: int) -> tuple:
+        """(first line, last line) of the half-open character range [start, end)."""
+        return self.line_of(start), self.line_of(max(start, end - 1))
+
+    def snippet(self, line: int, end_line: int | None = None) -> str:
+        """Source text of lines line..end_line inclusive, without the trailing newline."""
+        end_line = line if end_line is None else end_line
+        if end_line >= len(self.starts):
+            stop = len(self.content)
+        else:
+            stop = self.starts[end_line] - 1
+        return self.content[self.offset_of(line):stop]
+
+
+def line_context(text: str) -> str:
+    """
+    Short hash of a source line with whitespace collapsed. Unlike the line
+    number it survives code moving up or down and re-indentation, so a
+    finding can be recognised across two analyses.
+    """
+    normalized = WHITESPACE_RE.sub(" ", text).strip()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=6).hexdigest()
@@ -0,0 +1,68 @@
+import ast
+from pathlib import Path
+from time import perf_counter_ns
+
+from analyzer.parsing.functions import extract_functions
+from analyzer.parsing.imports import extract_imports
+from analyzer.parsing.lines import LineIndex, line_context
+from analyzer.inference.edge_cases import detect_edge_cases_in_tree
+from analyzer.inference.engine import RuleEngine
+from analyzer.testing.tests import is_test_file, extract_tests
+
+
+def _parse_python(content: str):
+    """Returns the module tree, or None when the source cannot be parsed."""
+    try:
+        return ast.parse(content)
+    except (SyntaxError, ValueError, RecursionError):
+        return None
+
+
+def analyze_source(file_path: str, content: str) -> dict:
+    """
+    Single pass over one file: the source is parsed once and every stage
+    (functions, edge cases, test references, imports) reads the same tree.
+    Files without a tree share one LineIndex for offset -> line lookups.
+    Per-stage nanoseconds (analyzer.timing.WORKER_STAGES) ride along in
+    "stage_ns", like rule_stats, and are dropped before caching.
+    """
+    t0 = perf_counter_ns()
+    path = str(Path(file_path))
+    tree = None
+    if Path(file_path).suffix.lower() == ".py":
+        tree = _parse_python(content)
+
+    lines = LineIndex(content) if tree is None else None
+    t1 = perf_counter_ns()
+
+    result = {
+        "path": file_path,
+        "functions": extract_functions(file_path, content, tree=tree, lines=lines, parse_failed=tree is None),
+        "edge_cases": [],
+        "tests": [],
+        "imports": [],
+    }
+    t2 = perf_counter_ns()
+    stage_ns = result["stage_ns"] = {"parse": t1 - t0, "functions": t2 - t1}
+
+    # Regex-only files (other languages, broken Python) have no tree to inspect
+    if tree is None:
+        return result
+
+    engine = RuleEngine()
+    result["edge_cases"] = detect_edge_cases_in_tree(tree, path, engine)
+    result["rule_stats"] = engine.stats
+    if result["edge_cases"]:
+        # Line-independent identity for each finding (see `coderecon diff`)
+        lines = LineIndex(content)
+        for ec in result["edge_cases"]:
+            ec["context"] = line_context(lines.snippet(ec["line"])) if ec.get("line") else None
+    t3 = perf_counter_ns()
+    result["imports"] = extract_imports(tree)
+    t4 = perf_counter_ns()
+    if is_test_file(file_path):
+        result["tests"] = extract_tests(tree, path)
+    t5 = perf_counter_ns()
+
+    stage_ns.update(edge_cases=t3 - t2, imports=t4 - t3, tests=t5 - t4)
+    return result
@@ -1,16 +1,20 @@
-import json
-import concurrent.futures
+import functools
+import os
+import time
 from pathlib import Path
-from multiprocessing import cpu_count
 from tqdm import tqdm
 
-from analyzer.discovery.files import discover_files
-from analyzer.parsing.functions import extract_functions
+from analyzer.cache import FileCache, _key
+from analyzer.discovery.files import SUPPORTED_EXTENSIONS, _get_file_metadata, discover_files, load_rules
+from analyzer.inference.engine import merge_rule_stats, format_rule_stats
+from analyzer.model import SignalTable
+from analyzer.scheduler import BatchScheduler
+from analyzer.transport import pack_results, unpack_results
 from analyzer.signals.aggregate import aggregate_signals
-from analyzer.testing.tests import map_tests
-from analyzer.inference.edge_cases import detect_edge_cases
 from analyzer.signals.signals import generate_signals
-from schemas.analysis import AnalysisSchema
+from analyzer.store import STORE_FILE, write_store
+from analyzer.timing import StageTimer
+from analyzer.utils.io import ANALYSIS_FILE, PREVIOUS_ANALYSIS_FILE, AnalysisWriter, load_analysis
 
 def detect_tech_stack(files):
     """Detects the tech stack based on marker files."""
@@ -30,66 +34,301 @@ def detect_tech_stack(files):
     return stack if stack else ["General Software"]
 
 
-def _parse_file_batch(file_batch):
-    """Processes a chunk of files in one go to reduce process overhead."""
-    from analyzer.parsing.functions import extract_functions
+def _parse_file_batch(file_batch, packed: bool = False, repo: str | None = None):
+    """
+    Processes a chunk of files in one go to reduce process overhead.
+    Each file is parsed once; functions, edge cases, tests and imports
+    all come back from the same pass. With packed=True (process workers)
+    the batch is returned as a compact analyzer.transport payload.
+    With `repo`, contents are read by blob id from that repository's
+    object store (one git cat-file process for the batch, closed with it)
+    instead of disk.
+    """
+    from analyzer.pipeline import analyze_source
+    from analyzer.cache import content_hash
+    reader = None
+    if repo is not None:
+        from analyzer.discovery.git import BlobReader
+        reader = BlobReader(repo)
     results = []
-    for file_info in file_batch:
-        file_path = file_info["path"]
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-            results.extend(extract_functions(file_path, content))
-        except Exception:
+    try:
+        for file_info in file_batch:
+            file_path = file_info["path"]
+            start = time.perf_counter_ns()
+            try:
+                if reader is not None:
+                    data = reader.read(file_info["blob"])
+                else:
+                    with open(file_path, "rb") as f:
+                        data = f.read()
+                content = data.decode("utf-8", errors="ignore")
+                if "\r" in content:
+                    # Match text-mode universal newlines
+                    content = content.replace("\r\n", "\n").replace("\r", "\n")
+                result = analyze_source(file_path, content)
+                result["sha"] = content_hash(data)
+                result["elapsed_ns"] = time.perf_counter_ns() - start
+                results.append(result)
+            except Exception:
+                continue
+    finally:
+        if reader is not None:
+            reader.close()
+    return pack_results(results) if packed else results
+
+
+def _previous_results(previous: dict, changed_keys: set) -> list:
+    """Regroups a previous analysis into per-file results, leaving out the changed files."""
+    grouped = {}
+    for f in previous.get("files", []):
+        key = _key(f["path"])
+        if key not in changed_keys:
+            grouped[key] = {"path": f["path"], "functions": [], "edge_cases": [], "tests": [],
+                            "imports": f.get("imports", [])}
+
+    for records, field, path_key in (("functions", "functions", "path"),
+                                      ("edge_cases", "edge_cases", "file"),
+                                      ("tests", "tests", "file")):
+        for record in previous.get(records, []):
+            result = grouped.get(_key(record.get(path_key) or ""))
+            if result is not None:
+                result[field].append(record)
+    return list(grouped.values())
+
+
+def _incremental_plan(path: str, since: str | None, changed_paths):
+    """
+    Files to (re)analyze for a --since / --files-from scan, merged with the
+    previous analysis.ndjson of the same root. Returns (all files, changed
+    files, reused per-file results), or None when there is nothing to merge
+    into and a full scan is needed.
+    """
+    from analyzer.discovery import git
+
+    root = str(Path(path).absolute())
+    if not os.path.isdir(path):
+        return None
+    if not os.path.exists(ANALYSIS_FILE):
+        print(f"[coderecon] No previous {ANALYSIS_FILE} to merge into; running a full scan.")
+        return None
+    previous = load_analysis(ANALYSIS_FILE)
+    if previous.get("root") != root:
+        print(f"[coderecon] Previous analysis is for '{previous.get('root')}'; running a full scan.")
+        return None
+
+    # Paths from git and --files-from are relative to the scanned root
+    rels = list(changed_paths or [])
+    if since is not None:
+        rels.extend(git.changed_files(path, since))
+
+    rules = load_rules(path)
+    changed_keys = set()
+    changed = {}
+    for rel in rels:
+        full_path = rel if os.path.isabs(rel) else os.path.join(path, *rel.replace("\\", "/").split("/"))
+        key = _key(full_path)
+        changed_keys.add(key)
+        if key in changed or not os.path.isfile(full_path):
+            continue  # Deleted: dropping it from the previous analysis is the whole update
+        if os.path.splitext(full_path)[1].lower() not in SUPPORTED_EXTENSIONS or rules.ignored(full_path):
             continue
-    return results
+        changed[key] = _get_file_metadata(full_path, os.path.basename(full_path))
 
+    reused = _previous_results(previous, changed_keys)
+    kept = [f for f in previous.get("files", []) if _key(f["path"]) not in changed_keys]
+    files = sorted(kept + list(changed.values()), key=lambda f: f["path"])
+    removed = len(previous.get("files", [])) - len(kept)
+    print(f"[coderecon] Incremental scan: {len(changed)} changed files, {removed} replaced or removed, "
+          f"{len(kept)} reused from the previous analysis.")
+    return files, list(changed.values()), reused
 
-def run_analysis(path: str) -> dict:
-    from analyzer.discovery.files import discover_files
-    files = discover_files(path)
-    all_functions = []
 
-    # Optimization: Chunking
-    # Spawning processes is expensive; processing in batches is 3x faster for small files.
-    chunk_size = 20
-    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+def run_analysis(path: str, use_cache: bool = True, use_store: bool = True,
+                 since: str | None = None, changed_paths=None,
+                 executor: str = "auto", jobs: int | None = None, timer: StageTimer | None = None,
+                 rev: str | None = None, keep_previous: bool = False, backend: str | None = None) -> dict:
+    """
+    Scans `path` and streams the result to analysis.ndjson: records are
+    appended as each worker batch finishes, signals once every file is in.
+    With use_store, an indexed analysis.db is written alongside for slicing.
+    With keep_previous (an explicit `scan`), the analysis being replaced is
+    kept for `coderecon diff`; read-only commands leave that copy alone.
+    Returns the same analysis as an in-memory dict.
+
+    With `since` (a git revision) and/or `changed_paths` (root-relative),
+    only those files are re-analyzed and merged into the previous analysis
+    of the same root; signals are regenerated over the merged result.
+
+    With `rev` (any git revision), the files of that commit are listed with
+    git ls-tree and read through git cat-file instead of the working tree,
+    which is never touched; file records carry their blob ids.
 
-    max_workers = max(1, int(cpu_count() * 0.8))
+    `backend` ("walk" or "git") picks how the working tree is listed; None
+    defers to .coderecon.toml (see discover_files).
 
-    print(f"[coderecon] Analyzing {len(files)} files using {max_workers} cores...")
+    Parsing is scheduled in byte-balanced batches (analyzer.scheduler);
+    executor is "auto", "serial", "thread" or "process", jobs the worker count.
 
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(_parse_file_batch, chunk): chunk for chunk in chunks}
+    Wall time per stage goes to `timer` (analyzer.timing.StageTimer) and to
+    analysis["stage_timings"]; worker-side stages are summed CPU-bound time.
+    Pass an analyzer.timing.Profiler to also keep spans, per-batch worker
+    timings and the slowest files and rules.
+    """
+    timer = timer if timer is not None else StageTimer()
+    files = None
+    reused_results = []
+    commit = None
+    with timer.stage("discovery"):
+        if rev is not None:
+            from analyzer.discovery import git
+            from analyzer.discovery.files import discover_revision
+            commit = git.resolve_commit(path, rev)
+            files = to_check = discover_revision(path, commit)
+        elif since is not None or changed_paths is not None:
+            plan = _incremental_plan(path, since, changed_paths)
+            if plan is not None:
+                files, to_check, reused_results = plan
+        if files is None:
+            files = discover_files(path, backend=backend)
+            to_check = files
+    files_by_path = {f["path"]: f for f in files}
+    seen_paths = set()
+    all_functions = []
+    tests = []
+    edge_cases = []
+    rule_stats = {}  # Rule cost for files parsed this run; cache hits cost nothing
+
+    # Incremental: only files whose fingerprint changed go to the pool
+    with timer.stage("cache"):
+        cache = FileCache().load() if use_cache else None
+        cached_results = reused_results
+        pending = []
+        for file_info in to_check:
+            cached = cache.lookup(file_info) if cache else None
+            if cached is not None:
+                cached_results.append(cached)
+            else:
+                pending.append(file_info)
+
+    # Batches are bin-packed by bytes, largest first; tiny workloads stay in-process
+    repo = str(Path(path).absolute()) if commit else None
+    scheduler = BatchScheduler(functools.partial(_parse_file_batch, repo=repo), executor=executor, jobs=jobs)
+    batches = scheduler.plan(pending)
+    if scheduler.kind == "process":
+        # Results cross a pipe: ship string tables and int columns, not a dict per record
+        scheduler.fn = functools.partial(_parse_file_batch, packed=True, repo=repo)
 
-        for future in tqdm(concurrent.futures.as_completed(futures),
-                           total=len(chunks),
-                           desc="[coderecon] Scanning",
-                           unit="batch",
-                           leave=False):
-            all_functions.extend(future.result())
+    cached_note = f" ({len(files) - len(pending)} unchanged, from cache)" if cache else ""
+    print(f"[coderecon] Analyzing {len(pending)} files using {scheduler.jobs} {scheduler.kind} "
+          f"worker{'s' if scheduler.jobs != 1 else ''}{cached_note}...")
 
-    # Pipeline logic...
     tech_stack = detect_tech_stack(files)
-    tests = map_tests(files)
-    edge_cases = detect_edge_cases(all_functions)
-    raw_signals = generate_signals(all_functions, edge_cases, tests)
-    aggregated_signals = aggregate_signals(raw_signals)
+    root = str(Path(path).absolute())
+
+    revision = {"rev": rev, "commit": commit} if commit else {}
+    with AnalysisWriter(ANALYSIS_FILE, previous_path=PREVIOUS_ANALYSIS_FILE if keep_previous else None) as writer:
+        writer.header(root=root, tech_stack=tech_stack, file_count=len(files), **revision)
+
+        def collect(result, rendered=None):
+            file_info = files_by_path[result["path"]]
+            file_info["imports"] = result["imports"]
+            seen_paths.add(result["path"])
+            all_functions.extend(result["functions"])
+            edge_cases.extend(result["edge_cases"])
+            tests.extend(result["tests"])
+
+            writer.write("file", file_info)
+            if rendered is not None:
+                writer.write_raw(rendered)
+                return
+            writer.write_many("function", result["functions"])
+            writer.write_many("edge_case", result["edge_cases"])
+            writer.write_many("test", result["tests"])
+
+        with timer.stage("serialization"):
+            for result in cached_results:
+                collect(result)
+
+        # "analyze" is the pool's wall time less what the parent spent caching and
+        # writing; those are summed here rather than spanned once per file
+        loop_start_ns, loop_start = time.time_ns(), time.perf_counter()
+        cache_s = write_s = 0.0
+        for batch_results in tqdm(scheduler.run(batches),
+                                  total=len(batches),
+                                  desc="[coderecon] Scanning",
+                                  unit="batch",
+                                  leave=False):
+            for result in unpack_results(batch_results, render=True):
+                rendered = result.pop("ndjson", None)
+                merge_rule_stats(rule_stats, result.get("rule_stats", {}))
+                timer.add_worker_ns(result.pop("stage_ns", {}))
+                elapsed_ns = result.pop("elapsed_ns", None)
+                if elapsed_ns is not None:
+                    timer.file(result["path"], elapsed_ns)
+                t0 = time.perf_counter()
+                if cache:
+                    cache.store(files_by_path[result["path"]], result)
+                t1 = time.perf_counter()
+                collect(result, rendered)
+                cache_s += t1 - t0
+                write_s += time.perf_counter() - t1
+        loop_s = time.perf_counter() - loop_start
+        timer.add("cache", cache_s)
+        timer.add("serialization", write_s)
+        timer.add("analyze", loop_s - cache_s - write_s)
+        timer.span("analyze", loop_start_ns, loop_s, files=len(pending), batches=len(batches))
+        for info in scheduler.batch_log:
+            timer.batch(info)
+
+        utilization = scheduler.report()
+        if utilization:
+            print(f"[coderecon] {utilization}")
+
+        if cache:
+            with timer.stage("cache"):
+                cache.prune(path, files)
+                cache.save()
+
+        # Unreadable files still belong to the inventory
+        with timer.stage("serialization"):
+            writer.write_many("file", (f for f in files if f["path"] not in seen_paths))
 
-    analysis = AnalysisSchema(
-        files=files,
-        functions=all_functions,
-        tests=tests,
-        edge_cases=edge_cases,
-        signals_raw=raw_signals,
-        signals=aggregated_signals,
-        tech_stack=tech_stack
-    )
+        # Pipeline logic...
+        # Signals are the bulk of a large analysis: keep them columnar and let
+        # the writers turn rows into dicts one at a time
+        with timer.stage("signals"):
+            raw_signals = generate_signals(all_functions, edge_cases, tests, out=SignalTable())
+        with timer.stage("aggregation"):
+            aggregated_signals = aggregate_signals(raw_signals)
+        with timer.stage("serialization"):
+            writer.write_many("signal_raw", raw_signals)
+            writer.write_many("signal", aggregated_signals)
 
-    analysis_dict = analysis.dict()
+            formatted_stats = format_rule_stats(rule_stats)
+            writer.write("footer", {"rule_stats": formatted_stats})
+        timer.rules(formatted_stats)
 
-    with open("analysis.json", "w", encoding="utf-8") as f:
-        json.dump(analysis_dict, f, indent=4)
+    # Same shape as schemas.analysis.AnalysisSchema, minus the validate-and-copy pass;
+    # the signal tables iterate as that schema's dicts
+    analysis = {
+        "root": root,
+        "files": files,
+        "functions": all_functions,
+        "tests": tests,
+        "edge_cases": edge_cases,
+        "signals": aggregated_signals,
+        "signals_raw": raw_signals,
+        "tech_stack": tech_stack,
+        "test_ratio": 0.0,
+        "severity_counts": {},
+        "rule_stats": formatted_stats,
+        "executor_stats": scheduler.stats,
+        "stage_timings": timer.stages,
+        **revision,
+    }
 
-    return analysis_dict
+    if use_store:
+        with timer.stage("store"):
+            write_store(analysis, STORE_FILE)
 
+    return analysis
@@ -0,0 +1,149 @@
+import concurrent.futures
+import functools
+import os
+import threading
+import time
+from multiprocessing import cpu_count
+
+EXECUTORS = ("auto", "serial", "thread", "process")
+
+# Below either limit a pool costs more to spawn than it saves
+SERIAL_MAX_FILES = 32
+SERIAL_MAX_BYTES = 512 * 1024
+
+# Aim for a few batches per worker so the tail evens out, within sane bounds
+BATCHES_PER_WORKER = 4
+MIN_BATCH_BYTES = 64 * 1024
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+MAX_BATCH_FILES = 200
+
+
+def default_jobs() -> int:
+    return max(1, int(cpu_count() * 0.8))
+
+
+def plan_batches(files, jobs: int) -> list:
+    """
+    Bin-packs files into batches by byte size, largest files first. A file
+    bigger than the budget gets a batch of its own, so one 5MB bundle never
+    drags 19 small files onto the same core; batches are returned in
+    submission order (heaviest first), which keeps the long tail short.
+    """
+    ordered = sorted(files, key=lambda f: f.get("size", 0), reverse=True)
+    total = sum(f.get("size", 0) for f in ordered)
+    budget = min(MAX_BATCH_BYTES, max(MIN_BATCH_BYTES, total // (jobs * BATCHES_PER_WORKER)))
+
+    batches, current, current_bytes = [], [], 0
+    for file_info in ordered:
+        size = file_info.get("size", 0)
+        if current and (current_bytes + size > budget or len(current) >= MAX_BATCH_FILES):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(file_info)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def choose_executor(files, executor: str = "auto", jobs: int | None = None) -> tuple:
+    """(executor kind, worker count). "auto" keeps tiny workloads in-process."""
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}' (expected one of {', '.join(EXECUTORS)})")
+    jobs = max(1, jobs or default_jobs())
+    if executor == "auto":
+        small = (len(files) <= SERIAL_MAX_FILES
+                 or sum(f.get("size", 0) for f in files) <= SERIAL_MAX_BYTES)
+        executor = "serial" if jobs == 1 or small else "process"
+    if executor == "serial":
+        jobs = 1
+    return executor, jobs
+
+
+def _timed(fn, batch):
+    """
+    Runs in the worker: the batch result plus which worker ran it, its CPU
+    time and its wall span (epoch ns, comparable across processes).
+    thread_time keeps GIL waits out of "busy" for the thread executor.
+    """
+    info = {"pid": os.getpid(), "tid": threading.get_ident(), "files": len(batch),
+            "bytes": sum(f.get("size", 0) for f in batch), "start_ns": time.time_ns()}
+    start = time.thread_time()
+    results = fn(batch)
+    info["cpu_s"] = time.thread_time() - start
+    info["end_ns"] = time.time_ns()
+    return info, results
+
+
+class BatchScheduler:
+    """
+    Runs `fn(batch) -> list` over byte-balanced batches on a serial, thread
+    or process executor. run() yields each batch's results as it finishes;
+    afterwards `stats` holds per-worker busy time and overall utilization
+    and `batch_log` one entry per batch (worker, size, CPU and wall span).
+    `fn` must be a module-level function for the process executor.
+    """
+
+    def __init__(self, fn, executor: str = "auto", jobs: int | None = None):
+        self.fn = fn
+        self.executor = executor
+        self.jobs = jobs
+        self.kind = None
+        self.stats = {}
+        self.batch_log = []
+
+    def plan(self, files) -> list:
+        self.kind, self.jobs = choose_executor(files, self.executor, self.jobs)
+        if self.kind == "serial":
+            return [list(files)] if files else []
+        return plan_batches(files, self.jobs)
+
+    def run(self, batches):
+        if self.kind is None:
+            self.kind, self.jobs = choose_executor([f for b in batches for f in b], self.executor, self.jobs)
+        task = functools.partial(_timed, self.fn)
+        busy = {}
+        start = time.perf_counter()
+
+        def record(outcome):
+            info, results = outcome
+            worker = info["pid"] if self.kind == "process" else info["tid"]
+            busy[worker] = busy.get(worker, 0.0) + info["cpu_s"]
+            self.batch_log.append(info)
+            return results
+
+        try:
+            if self.kind == "serial" or not batches:
+                for batch in batches:
+                    yield record(task(batch))
+            else:
+                pool_cls = (concurrent.futures.ProcessPoolExecutor if self.kind == "process"
+                            else concurrent.futures.ThreadPoolExecutor)
+                workers = min(self.jobs, len(batches))
+                with pool_cls(max_workers=workers) as pool:
+                    futures = [pool.submit(task, batch) for batch in batches]
+                    for future in concurrent.futures.as_completed(futures):
+                        yield record(future.result())
+        finally:
+            wall = time.perf_counter() - start
+            slots = 1 if self.kind == "serial" else min(self.jobs, max(1, len(batches)))
+            total_busy = sum(busy.values())
+            self.stats = {
+                "executor": self.kind,
+                "jobs": slots,
+                "batches": len(batches),
+                "wall_s": round(wall, 3),
+                "busy_s": round(total_busy, 3),
+                "utilization": round(total_busy / (wall * slots), 3) if wall > 0 else 0.0,
+                "worker_busy_s": sorted((round(s, 3) for s in busy.values()), reverse=True),
+            }
+
+    def report(self) -> str:
+        s = self.stats
+        if not s or not s["batches"]:
+            return ""
+        line = (f"Workers: {s['executor']} x{s['jobs']}, {s['batches']} batches, "
+                f"utilization {s['utilization'] * 100:.0f}% ({s['busy_s']:.2f}s CPU over {s['wall_s']:.2f}s wall)")
+        if len(s["worker_busy_s"]) > 1:
+            line += f", busiest {s['worker_busy_s'][0]:.2f}s / idlest {s['worker_busy_s'][-1]:.2f}s"
+        return line
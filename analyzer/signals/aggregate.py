@@ -1,10 +1,78 @@
+from array import array
 from collections import defaultdict
 
+from analyzer.model import ABSENT, NONE, SignalGroupTable, SignalTable
+
+SEVERITY_RANK = {"High": 3, "Medium": 2, "Low": 1}
+
+
+def _aggregate_table(raw: SignalTable) -> SignalGroupTable:
+    """
+    aggregate_signals over a SignalTable without materializing a dict per
+    signal: groups are keyed on the int columns and accumulated in arrays.
+    Only groups with more than one distinct line hold a set.
+    """
+    cols = {name: column for (name, _kind), column in zip(raw.FIELDS, raw.columns)}
+    values = raw.pool.values
+    rank = [SEVERITY_RANK.get(v, 0) if isinstance(v, str) else 0 for v in values]
+    width = len(values) + 2  # ids run from ABSENT (-2) upward
+
+    groups = {}
+    g_type, g_path, g_function, g_case = array("i"), array("i"), array("i"), array("i")
+    g_rule, g_severity, g_count, g_line = array("i"), array("i"), array("i"), array("i")
+    extra_lines = {}
+
+    for t, p, f, c, line, rule, sev in zip(cols["type"], cols["path"], cols["function"], cols["case"],
+                                           cols["line"], cols["rule_id"], cols["severity"]):
+        # A missing key groups like None, as sig.get() would
+        p, f, c = (NONE if v == ABSENT else v for v in (p, f, c))
+        key = (((t + 2) * width + p + 2) * width + f + 2) * width + c + 2
+        g = groups.get(key)
+        if g is None:
+            g = groups[key] = len(g_count)
+            g_type.append(t)
+            g_path.append(p)
+            g_function.append(f)
+            g_case.append(c)
+            g_rule.append(NONE)
+            g_severity.append(NONE)
+            g_count.append(0)
+            g_line.append(ABSENT)
+
+        g_count[g] += 1
+        if line >= 0:
+            first = g_line[g]
+            if first == ABSENT:
+                g_line[g] = line
+            elif first != line:
+                extra_lines.setdefault(g, {first}).add(line)
+        if g_rule[g] == NONE and rule >= 0:
+            g_rule[g] = rule
+        if sev >= 0 and rank[sev] > (rank[g_severity[g]] if g_severity[g] >= 0 else 0):
+            g_severity[g] = sev
+
+    table = SignalGroupTable(pool=raw.pool)
+    flat, ends = table.lists["lines"]
+    for g, first in enumerate(g_line):
+        if g in extra_lines:
+            flat.extend(sorted(extra_lines[g]))
+        elif first != ABSENT:
+            flat.append(first)
+        ends.append(len(flat))
+    table.columns = [g_type, g_path, g_function, g_case, g_rule, g_severity, g_count,
+                     array("i", range(len(g_count)))]
+    return table
+
 
 def aggregate_signals(signals):
+    if isinstance(signals, SignalTable):
+        return _aggregate_table(signals)
+
     grouped = defaultdict(lambda: {
         "count": 0,
-        "lines": set()
+        "lines": set(),
+        "rule_id": None,
+        "severity": None,
     })
 
     for sig in signals:
@@ -15,10 +83,18 @@ def aggregate_signals(signals):
             sig.get("case")
         )
 
-        grouped[key]["count"] += 1
+        data = grouped[key]
+        data["count"] += 1
 
         if sig.get("line") is not None:
-            grouped[key]["lines"].add(sig["line"])
+            data["lines"].add(sig["line"])
+
+        # Case maps to one rule; keep the worst severity seen for the group
+        if data["rule_id"] is None:
+            data["rule_id"] = sig.get("rule_id")
+        severity = sig.get("severity")
+        if SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(data["severity"], 0):
+            data["severity"] = severity
 
     aggregated = []
 
@@ -28,6 +104,8 @@ def aggregate_signals(signals):
             "path": path,
             "function": function,
             "case": case,
+            "rule_id": data["rule_id"],
+            "severity": data["severity"],
             "count": data["count"],
             "lines": sorted(data["lines"]),
         })
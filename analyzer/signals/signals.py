@@ -10,15 +10,25 @@ def assign_severity(signal_type: str) -> str:
 
     return mapping.get(signal_type, "Low")
 
-def generate_signals(functions, edge_cases, tests):
-    """Convert raw findings into structured signals with safety fallbacks."""
-
-    signals = []
-
+def collect_tested_functions(tests):
     tested_functions = set()
     for test in tests:
         # Safely handle potential missing references key
         tested_functions.update(test.get("references", []))
+    return tested_functions
+
+def generate_signals(functions, edge_cases, tests, tested_functions=None, out=None):
+    """
+    Convert raw findings into structured signals with safety fallbacks.
+    Pass a precomputed tested_functions set to generate signals for a
+    subset of files against the whole repository's tests, and `out` (e.g.
+    an analyzer.model.SignalTable) to append into instead of a new list.
+    """
+
+    signals = [] if out is None else out
+
+    if tested_functions is None:
+        tested_functions = collect_tested_functions(tests)
 
     # Untested functions
     for fn in functions:
@@ -69,6 +79,7 @@ def generate_signals(functions, edge_cases, tests):
             "case": ec.get("case"),
             "rule_id": ec.get("rule_id"),
             "node_type": ec.get("node_type"),
+            "context": ec.get("context"),
             "severity": assign_severity(signal_type),
         })
 
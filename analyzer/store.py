@@ -0,0 +1,211 @@
+import json
+import os
+from pathlib import Path
+
+try:
+    import sqlite3
+except ImportError:  # Some minimal Python builds ship without it
+    sqlite3 = None
+
+# Optional indexed companion to analysis.ndjson, written next to it
+STORE_FILE = "analysis.db"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT, resolved TEXT, dir TEXT, name TEXT, size INTEGER, imports TEXT
+);
+CREATE TABLE functions (
+    id INTEGER PRIMARY KEY,
+    path TEXT, resolved TEXT, name TEXT, line INTEGER, type TEXT, length INTEGER, calls TEXT
+);
+CREATE TABLE signals (
+    id INTEGER PRIMARY KEY,
+    path TEXT, resolved TEXT, dir TEXT, function TEXT, type TEXT,
+    rule_id TEXT, severity TEXT, line INTEGER, data TEXT
+);
+CREATE INDEX idx_files_resolved ON files(resolved);
+CREATE INDEX idx_files_dir ON files(dir);
+CREATE INDEX idx_functions_name ON functions(name);
+CREATE INDEX idx_functions_resolved ON functions(resolved);
+CREATE INDEX idx_signals_path ON signals(path);
+CREATE INDEX idx_signals_resolved ON signals(resolved);
+CREATE INDEX idx_signals_dir ON signals(dir);
+CREATE INDEX idx_signals_rule ON signals(rule_id);
+CREATE INDEX idx_signals_severity ON signals(severity);
+CREATE INDEX idx_signals_function ON signals(function);
+"""
+
+
+def _dir_range(directory: str):
+    """
+    Bounds matching every dir strictly below `directory`, so a subtree
+    query is an index range scan instead of a LIKE over every row.
+    """
+    base = directory.rstrip(os.sep)
+    return base + os.sep, base + chr(ord(os.sep) + 1)
+
+
+class _Resolver:
+    """Resolves each distinct path once at write time, never at query time."""
+
+    def __init__(self):
+        self._memo = {}
+
+    def __call__(self, path):
+        if not path:
+            return None, None
+        hit = self._memo.get(path)
+        if hit is None:
+            resolved = str(Path(path).resolve())
+            hit = self._memo[path] = (resolved, os.path.dirname(resolved))
+        return hit
+
+
+def write_store(analysis: dict, db_path=STORE_FILE):
+    """Writes the analysis into a fresh SQLite file; returns its path or None without sqlite3."""
+    if sqlite3 is None:
+        return None
+
+    db_path = str(db_path)
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    resolve = _Resolver()
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;")
+        conn.executescript(SCHEMA)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("root", analysis.get("root", "")),
+            ("tech_stack", json.dumps(analysis.get("tech_stack", []))),
+        ])
+
+        def file_rows():
+            for f in analysis.get("files", []):
+                resolved, directory = resolve(f.get("path"))
+                yield (f.get("path"), resolved, directory, f.get("name"),
+                       f.get("size"), json.dumps(f.get("imports", [])))
+
+        def function_rows():
+            for fn in analysis.get("functions", []):
+                resolved, _ = resolve(fn.get("path"))
+                yield (fn.get("path"), resolved, fn.get("name"), fn.get("line"),
+                       fn.get("type"), fn.get("length"), json.dumps(fn.get("called_functions", [])))
+
+        def signal_rows():
+            for s in analysis.get("signals", []):
+                resolved, directory = resolve(s.get("path"))
+                yield (s.get("path"), resolved, directory, s.get("function"), s.get("type"),
+                       s.get("rule_id"), s.get("severity"), s.get("line"), json.dumps(s))
+
+        conn.executemany(
+            "INSERT INTO files (path, resolved, dir, name, size, imports) VALUES (?, ?, ?, ?, ?, ?)",
+            file_rows())
+        conn.executemany(
+            "INSERT INTO functions (path, resolved, name, line, type, length, calls) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            function_rows())
+        conn.executemany(
+            "INSERT INTO signals (path, resolved, dir, function, type, rule_id, severity, line, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            signal_rows())
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+    return db_path
+
+
+class AnalysisStore:
+    """Read-side queries over analysis.db. Every slice is an indexed lookup."""
+
+    def __init__(self, db_path=STORE_FILE):
+        self.db_path = str(db_path)
+        self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _signals(self, where="", params=()):
+        sql = "SELECT data FROM signals" + (f" WHERE {where}" if where else "") + " ORDER BY id"
+        return [json.loads(row[0]) for row in self.conn.execute(sql, params)]
+
+    def meta(self) -> dict:
+        return dict(self.conn.execute("SELECT key, value FROM meta"))
+
+    def signals(self, severity=None, rule_id=None, function=None):
+        clauses, params = [], []
+        for column, value in (("severity", severity), ("rule_id", rule_id), ("function", function)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return self._signals(" AND ".join(clauses), params)
+
+    def signals_for_path(self, path):
+        """Signals recorded under this exact (as-scanned) path string."""
+        return self._signals("path = ?", (str(path),))
+
+    def signals_for_file(self, target):
+        return self._signals("resolved = ?", (str(Path(target).resolve()),))
+
+    def signals_under(self, directory):
+        """Signals in any file below `directory` (recursively)."""
+        base = str(Path(directory).resolve())
+        lo, hi = _dir_range(base)
+        return self._signals("dir = ? OR (dir >= ? AND dir < ?)", (base, lo, hi))
+
+    def signal_counts_by_path(self) -> dict:
+        return dict(self.conn.execute(
+            "SELECT path, COUNT(*) FROM signals WHERE path IS NOT NULL GROUP BY path"))
+
+    def top_files(self, limit=3):
+        return self.conn.execute(
+            "SELECT path, COUNT(*) AS n FROM signals WHERE path IS NOT NULL "
+            "GROUP BY path ORDER BY n DESC LIMIT ?", (limit,)).fetchall()
+
+    def files(self):
+        return [
+            {"path": path, "name": name, "size": size, "imports": json.loads(imports)}
+            for path, name, size, imports in self.conn.execute(
+                "SELECT path, name, size, imports FROM files ORDER BY id")
+        ]
+
+    def functions(self):
+        return [
+            {"name": name, "line": line, "path": path, "type": ftype, "length": length,
+             "called_functions": json.loads(calls or "[]")}
+            for name, line, path, ftype, length, calls in self.conn.execute(
+                "SELECT name, line, path, type, length, calls FROM functions ORDER BY id")
+        ]
+
+
+def open_store(analysis_path=None):
+    """
+    Returns an AnalysisStore for the analysis.db beside `analysis_path`, or None
+    when there is none or it is older than the analysis file it indexes.
+    """
+    if sqlite3 is None:
+        return None
+
+    base_dir = os.path.dirname(str(analysis_path)) if analysis_path else ""
+    db_path = os.path.join(base_dir, STORE_FILE)
+    if not os.path.exists(db_path):
+        return None
+    if analysis_path and os.path.exists(analysis_path):
+        if os.path.getmtime(db_path) < os.path.getmtime(analysis_path):
+            return None
+
+    try:
+        return AnalysisStore(db_path)
+    except sqlite3.Error:
+        return None
@@ -1,39 +1,32 @@
 from pathlib import Path
 import ast
 
-def map_tests(files):
+
+def is_test_file(file_path) -> bool:
+    path = Path(file_path)
+    return path.name.startswith("test_") or "test" in path.parts
+
+
+def extract_tests(tree, file_path):
     """
-    Discover test functions and infer which priduction functions they reference.
+    Collect test functions from an already-parsed module and the production
+    functions they reference.
     """
-    tests=[]
-
-    for file in files:
-        path = Path(file["path"])
-
-        if not (
-            path.name.startswith("test_") or "test" in path.parts
-        ):
-            continue
-
-        try:
-            source = open(path, "r",encoding="utf-8",errors="ignore").read()
-            tree= ast.parse(source)
-        except Exception:
-            continue
-
-        for node in ast.walk(tree):
-            if isinstance(node,ast.FunctionDef) and node.name.startswith("test_"):
-                referenced = set()
-
-                for inner in ast.walk(node):
-                    if isinstance(inner,ast.Call):
-                        if isinstance(inner.func,ast.Name):
-                            referenced.add(inner.func.id)
-
-                tests.append({
-                    "test_name": node.name,
-                    "file":str(path),
-                    "references":sorted(referenced)
-                })
-                
+    tests = []
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef) and node.name.startswith("test_"):
+            referenced = set()
+
+            for inner in ast.walk(node):
+                if isinstance(inner, ast.Call):
+                    if isinstance(inner.func, ast.Name):
+                        referenced.add(inner.func.id)
+
+            tests.append({
+                "test_name": node.name,
+                "file": str(file_path),
+                "references": sorted(referenced)
+            })
+
     return tests
@@ -0,0 +1,180 @@
+import heapq
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Per-file stages timed inside analyze_source; workers report them summed in nanoseconds
+WORKER_STAGES = ("parse", "functions", "edge_cases", "tests", "imports")
+
+PROFILE_FILE = ".coderecon/trace.json"
+
+
+class StageTimer:
+    """
+    Accumulates wall seconds per named stage of a run. Stages may repeat
+    (each entry is a running total); worker-side stage times arrive as
+    nanosecond sums and are folded in under "worker.<stage>".
+
+    span(), batch(), file() and rules() are hooks the scan calls with the
+    detail behind those totals; they cost nothing here and are recorded
+    by Profiler.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str, **args):
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.add(name, seconds)
+            self.span(name, start_ns, seconds, **args)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_worker_ns(self, stage_ns: dict):
+        for name, ns in stage_ns.items():
+            self.add(f"worker.{name}", ns / 1e9)
+
+    def rounded(self) -> dict:
+        return {name: round(seconds, 4) for name, seconds in self.stages.items()}
+
+    def span(self, name: str, start_ns: int, seconds: float, **args):
+        pass
+
+    def batch(self, info: dict):
+        pass
+
+    def file(self, path: str, ns: int):
+        pass
+
+    def rules(self, rule_stats: dict):
+        pass
+
+
+class Profiler(StageTimer):
+    """
+    A StageTimer that keeps the detail: one span per stage entry (this
+    thread), one per worker batch (the worker's pid/tid), the `top`
+    slowest files and the rule cost table. Pass it as run_analysis(timer=...)
+    and read `spans`, `slowest_files()`, `summary()` or `chrome_trace()`.
+    Span timestamps are epoch nanoseconds so worker processes line up.
+    """
+
+    def __init__(self, top: int = 10):
+        super().__init__()
+        self.top = top
+        self.spans = []
+        self.rule_stats = {}
+        self._files = []  # min-heap of (ns, path)
+        self._lock = threading.Lock()
+
+    def span(self, name: str, start_ns: int, seconds: float, cat: str = "stage", pid: int | None = None,
+             tid: int | None = None, **args):
+        record = {"name": name, "cat": cat, "start_ns": start_ns, "dur_ns": int(seconds * 1e9),
+                  "pid": os.getpid() if pid is None else pid,
+                  "tid": threading.get_ident() if tid is None else tid, "args": args}
+        with self._lock:
+            self.spans.append(record)
+
+    def batch(self, info: dict):
+        self.span("batch", info["start_ns"], (info["end_ns"] - info["start_ns"]) / 1e9, cat="worker",
+                  pid=info["pid"], tid=info["tid"], files=info["files"], bytes=info["bytes"],
+                  cpu_ms=round(info["cpu_s"] * 1000, 3))
+
+    def file(self, path: str, ns: int):
+        with self._lock:
+            if len(self._files) < self.top:
+                heapq.heappush(self._files, (ns, path))
+            elif ns > self._files[0][0]:
+                heapq.heapreplace(self._files, (ns, path))
+
+    def rules(self, rule_stats: dict):
+        self.rule_stats = dict(rule_stats)
+
+    def slowest_files(self) -> list:
+        """[(seconds, path)], slowest first; parse + rules + extraction for that one file."""
+        return [(ns / 1e9, path) for ns, path in sorted(self._files, reverse=True)]
+
+    def slowest_rules(self) -> list:
+        """[(rule_id, milliseconds, hits)], costliest first."""
+        ranked = sorted(self.rule_stats.items(), key=lambda kv: kv[1]["time_ms"], reverse=True)
+        return [(rule_id, s["time_ms"], s["hits"]) for rule_id, s in ranked[:self.top]]
+
+    def chrome_trace(self) -> dict:
+        """Trace Event Format (complete "X" events), for Perfetto or chrome://tracing."""
+        origin = min((s["start_ns"] for s in self.spans), default=0)
+        parent = os.getpid()
+        events = []
+        for pid in sorted({s["pid"] for s in self.spans}):
+            label = "coderecon" if pid == parent else f"worker {pid}"
+            events.append({"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": label}})
+        for s in sorted(self.spans, key=lambda s: (s["start_ns"], -s["dur_ns"])):
+            events.append({"ph": "X", "name": s["name"], "cat": s["cat"], "pid": s["pid"], "tid": s["tid"],
+                           "ts": (s["start_ns"] - origin) / 1000, "dur": s["dur_ns"] / 1000, "args": s["args"]})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"stages_s": self.rounded(), "slowest_files": self.slowest_files(),
+                              "slowest_rules": self.slowest_rules()}}
+
+    def write_trace(self, path: str = PROFILE_FILE) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+    def summary(self) -> str:
+        """Per-stage table (inclusive wall time, so nested stages overlap) plus the slowest files and rules."""
+        if not self.spans:
+            return "No spans recorded."
+        start = min(s["start_ns"] for s in self.spans)
+        wall = (max(s["start_ns"] + s["dur_ns"] for s in self.spans) - start) / 1e9
+
+        calls = {}
+        for s in self.spans:
+            if s["cat"] == "stage":
+                calls[s["name"]] = calls.get(s["name"], 0) + 1
+        width = max(len(name) for name in self.stages) + 2
+        lines = [f"Profile: {wall:.3f}s wall", f"{'stage':<{width}} {'calls':>6} {'total':>10} {'share':>7}"]
+        # Costliest first, with the worker stages listed under the "analyze" they ran in
+        ranked = sorted(self.stages.items(), key=lambda kv: -kv[1])
+        workers = [kv for kv in ranked if kv[0].startswith("worker.")]
+        ordered = []
+        for kv in ranked:
+            if not kv[0].startswith("worker."):
+                ordered.append(kv)
+                if kv[0] == "analyze":
+                    ordered.extend(workers)
+        for name, seconds in ordered:
+            label = "  " + name if name.startswith("worker.") else name
+            share = seconds / wall * 100 if wall > 0 else 0.0
+            count = calls.get(name, "-")
+            lines.append(f"{label:<{width}} {count:>6} {seconds:>9.3f}s {share:>6.1f}%")
+
+        batches = [s for s in self.spans if s["name"] == "batch"]
+        if batches:
+            per_worker = {}
+            for s in batches:
+                key = (s["pid"], s["tid"])
+                per_worker[key] = per_worker.get(key, 0) + s["dur_ns"]
+            longest = max(s["dur_ns"] for s in batches) / 1e9
+            lines.append(f"Batches: {len(batches)} on {len(per_worker)} workers, longest {longest:.3f}s, "
+                         f"busiest worker {max(per_worker.values()) / 1e9:.3f}s")
+        if self._files:
+            lines.append("Slowest files:")
+            lines.extend(f"  {seconds:>8.3f}s  {path}" for seconds, path in self.slowest_files())
+        if self.rule_stats:
+            lines.append("Slowest rules:")
+            lines.extend(f"  {rule_id:<8} {ms:>9.3f}ms  {hits} hits" for rule_id, ms, hits in self.slowest_rules())
+        return "\n".join(lines)
+
+
+def merge_stage_ns(total: dict, stage_ns: dict):
+    for name, ns in stage_ns.items():
+        total[name] = total.get(name, 0) + ns
@@ -0,0 +1,196 @@
+import json
+from array import array
+from itertools import accumulate
+
+from analyzer.timing import merge_stage_ns
+
+# Column names of the packed payload; strings are ids into one per-batch
+# table, whose last slot is None so that id -1 decodes to None for free.
+FILE_COLUMNS = ("file_path", "file_functions", "file_edge_cases", "file_tests")
+FUNCTION_COLUMNS = ("fn_name", "fn_line", "fn_end_line", "fn_path", "fn_type", "fn_length")
+EDGE_CASE_COLUMNS = ("ec_rule_id", "ec_function", "ec_file", "ec_case", "ec_reason", "ec_severity",
+                     "ec_line", "ec_node_type", "ec_context")
+TEST_COLUMNS = ("test_name", "test_file")
+INT_COLUMNS = {"fn_line", "fn_end_line", "fn_length", "ec_line"}
+
+
+def pack_results(results) -> dict:
+    """
+    Worker side: a batch of per-file results as a structure of arrays.
+    Paths, names and every other repeated string are stored once in
+    `strings`; each record field becomes an int column, and variable-length
+    lists (imports, callees, test references) are one flat id array plus
+    end offsets. Pickles to a few flat buffers instead of a dict per record.
+    """
+    # Insertion-ordered: a new string's id is its position, so the table doubles as the list
+    table = {None: -1}
+    intern = table.setdefault
+
+    def sid(value) -> int:
+        return intern(value, len(table) - 1)
+
+    cols = {name: array("i") for name in FILE_COLUMNS + FUNCTION_COLUMNS + EDGE_CASE_COLUMNS + TEST_COLUMNS}
+    lists = {kind: (array("i"), array("i")) for kind in ("imports", "calls", "references")}
+    shas, rule_stats, stage_ns = [], {}, {}
+    elapsed = array("q")
+
+    def add_lists(kind, groups):
+        flat, ends = lists[kind]
+        for group in groups:
+            flat.extend([intern(v, len(table) - 1) for v in group])
+            ends.append(len(flat))
+
+    def add_rows(records, columns, keys):
+        for column, key in zip(columns, keys):
+            if column in INT_COLUMNS:
+                cols[column].extend([-1 if r.get(key) is None else r[key] for r in records])
+            else:
+                cols[column].extend([intern(r.get(key), len(table) - 1) for r in records])
+
+    for result in results:
+        fns, ecs, tsts = result["functions"], result["edge_cases"], result["tests"]
+        cols["file_path"].append(sid(result["path"]))
+        cols["file_functions"].append(len(fns))
+        cols["file_edge_cases"].append(len(ecs))
+        cols["file_tests"].append(len(tsts))
+        add_lists("imports", [result["imports"]])
+        shas.append(result.get("sha"))
+        elapsed.append(result.get("elapsed_ns", -1))
+        for rule_id, (hits, ns) in result.get("rule_stats", {}).items():
+            total = rule_stats.setdefault(rule_id, [0, 0])
+            total[0] += hits
+            total[1] += ns
+        merge_stage_ns(stage_ns, result.get("stage_ns", {}))
+
+        add_rows(fns, FUNCTION_COLUMNS, ("name", "line", "end_line", "path", "type", "length"))
+        add_lists("calls", (fn["called_functions"] for fn in fns))
+        add_rows(ecs, EDGE_CASE_COLUMNS,
+                 ("rule_id", "function", "file", "case", "reason", "severity", "line", "node_type", "context"))
+        add_rows(tsts, TEST_COLUMNS, ("test_name", "file"))
+        add_lists("references", (t["references"] for t in tsts))
+
+    strings = list(table)[1:]
+    strings.append(None)
+    return {"strings": strings, "columns": cols, "lists": lists, "shas": shas, "rule_stats": rule_stats,
+            "stage_ns": stage_ns, "elapsed_ns": elapsed}
+
+
+def _ints(column) -> list:
+    values = column.tolist()
+    return [None if v == -1 else v for v in values] if -1 in values else values
+
+
+def _split(flat_and_ends, strings) -> list:
+    flat, ends = flat_and_ends
+    values = list(map(strings.__getitem__, flat))
+    return [values[a:b] for a, b in zip([0, *ends[:-1]], ends)]
+
+
+def _chunks(records: list, counts) -> list:
+    return [records[a:b] for a, b in zip(accumulate(counts[:-1], initial=0), accumulate(counts))]
+
+
+def _render(payload) -> list:
+    """
+    The batch's function, edge_case and test NDJSON records, one text block
+    per file, straight from the columns: each distinct string is JSON-encoded
+    once instead of once per record. Byte-identical to AnalysisWriter output.
+    """
+    strings, cols, lists = payload["strings"], payload["columns"], payload["lists"]
+    enc = [json.dumps(v) for v in strings[:-1]]
+    enc.append("null")
+
+    def column(name):
+        if name in INT_COLUMNS:
+            return ["null" if v == -1 else str(v) for v in cols[name]]
+        return map(enc.__getitem__, cols[name])
+
+    def arrays(kind):
+        flat, ends = lists[kind]
+        values = list(map(enc.__getitem__, flat))
+        return ["[" + ",".join(values[a:b]) + "]" for a, b in zip([0, *ends[:-1]], ends)]
+
+    functions = [
+        f'{{"record":"function","name":{n},"line":{l},"end_line":{e},"path":{p},"type":{t},"length":{ln},'
+        f'"called_functions":{c}}}'
+        for n, l, e, p, t, ln, c in zip(*map(column, FUNCTION_COLUMNS), arrays("calls"))
+    ]
+    edge_cases = [
+        f'{{"record":"edge_case","rule_id":{r},"function":{f},"file":{p},"case":{c},"reason":{why},'
+        f'"severity":{sev},"line":{l},"node_type":{nt},"context":{ctx}}}'
+        for r, f, p, c, why, sev, l, nt, ctx in zip(*map(column, EDGE_CASE_COLUMNS))
+    ]
+    tests = [
+        f'{{"record":"test","test_name":{n},"file":{p},"references":{refs}}}'
+        for n, p, refs in zip(*map(column, TEST_COLUMNS), arrays("references"))
+    ]
+
+    blocks = []
+    for fns, ecs, tsts in zip(_chunks(functions, cols["file_functions"]),
+                              _chunks(edge_cases, cols["file_edge_cases"]),
+                              _chunks(tests, cols["file_tests"])):
+        lines = fns + ecs + tsts
+        blocks.append("\n".join(lines) + "\n" if lines else "")
+    return blocks
+
+
+def unpack_results(payload, render: bool = False):
+    """
+    Parent side: yields per-file result dicts equal to what the worker
+    packed. Columns are decoded in bulk and dicts are only built here, when
+    the results are consumed. With render=True each packed result also
+    carries "ndjson": its records pre-rendered for AnalysisWriter.write_raw,
+    which skips json.dumps per record. Plain lists (serial and thread
+    executors never pack) pass straight through.
+    """
+    if isinstance(payload, list):
+        yield from payload
+        return
+
+    strings, cols, lists = payload["strings"], payload["columns"], payload["lists"]
+    if not payload["shas"]:
+        return
+
+    def column(name):
+        if name in INT_COLUMNS:
+            return _ints(cols[name])
+        return map(strings.__getitem__, cols[name])
+
+    functions = [
+        {"name": n, "line": l, "end_line": e, "path": p, "type": t, "length": ln, "called_functions": c}
+        for n, l, e, p, t, ln, c in zip(*map(column, FUNCTION_COLUMNS), _split(lists["calls"], strings))
+    ]
+    edge_cases = [
+        {"rule_id": r, "function": f, "file": p, "case": c, "reason": why, "severity": sev, "line": l,
+         "node_type": nt, "context": ctx}
+        for r, f, p, c, why, sev, l, nt, ctx in zip(*map(column, EDGE_CASE_COLUMNS))
+    ]
+    tests = [
+        {"test_name": n, "file": p, "references": refs}
+        for n, p, refs in zip(*map(column, TEST_COLUMNS), _split(lists["references"], strings))
+    ]
+
+    per_file = zip(
+        column("file_path"),
+        _chunks(functions, cols["file_functions"]),
+        _chunks(edge_cases, cols["file_edge_cases"]),
+        _chunks(tests, cols["file_tests"]),
+        _split(lists["imports"], strings),
+        payload["shas"],
+        payload["elapsed_ns"],
+    )
+    rendered = _render(payload) if render else None
+    for n, (path, fns, ecs, tsts, imports, sha, elapsed_ns) in enumerate(per_file):
+        result = {"path": path, "functions": fns, "edge_cases": ecs, "tests": tsts, "imports": imports}
+        if rendered is not None:
+            result["ndjson"] = rendered[n]
+        if sha is not None:
+            result["sha"] = sha
+        if elapsed_ns >= 0:
+            result["elapsed_ns"] = elapsed_ns
+        # Rule cost and stage times are only ever summed; the batch totals ride on the first file
+        if n == 0 and payload["rule_stats"]:
+            result["rule_stats"] = payload["rule_stats"]
+        if n == 0 and payload["stage_ns"]:
+            result["stage_ns"] = payload["stage_ns"]
+        yield result
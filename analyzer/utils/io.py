@@ -0,0 +1,156 @@
+import json
+import os
+from itertools import islice
+
+# Streaming on-disk analysis: one header line, then one tagged record per line
+ANALYSIS_FILE = "analysis.ndjson"
+# The analysis a scan replaced, kept for `coderecon diff`
+PREVIOUS_ANALYSIS_FILE = os.path.join(".coderecon", "analysis_previous.ndjson")
+FORMAT_NAME = "coderecon-ndjson"
+FORMAT_VERSION = 1
+WRITE_CHUNK = 10_000
+
+# Record tag -> key of the in-memory analysis dict
+RECORD_KEYS = {
+    "file": "files",
+    "function": "functions",
+    "test": "tests",
+    "edge_case": "edge_cases",
+    "signal_raw": "signals_raw",
+    "signal": "signals",
+}
+
+_SEPARATORS = (",", ":")
+
+
+def _prefix(record_type: str) -> str:
+    # The tag is always the first key, so a record's type is readable without decoding it
+    return f'{{"record":"{record_type}"'
+
+
+class AnalysisWriter:
+    """
+    Appends NDJSON records as results arrive. Writes go to a temp file that
+    replaces `path` only when the writer closes cleanly, so readers never see
+    a half-written analysis. With `previous_path`, the file being replaced
+    is moved there first.
+    """
+
+    def __init__(self, path=ANALYSIS_FILE, previous_path=None):
+        self.path = str(path)
+        self.previous_path = previous_path
+        self._tmp_path = self.path + ".tmp"
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self._tmp_path, "w", encoding="utf-8")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.close()
+        if exc_type is None:
+            if self.previous_path and os.path.exists(self.path):
+                os.makedirs(os.path.dirname(self.previous_path) or ".", exist_ok=True)
+                os.replace(self.path, self.previous_path)
+            os.replace(self._tmp_path, self.path)
+        else:
+            os.remove(self._tmp_path)
+        return False
+
+    def header(self, **fields):
+        self.write("header", {"format": FORMAT_NAME, "version": FORMAT_VERSION, **fields})
+
+    def write(self, record_type: str, obj: dict):
+        self._f.write(json.dumps({"record": record_type, **obj}, separators=_SEPARATORS))
+        self._f.write("\n")
+
+    def write_raw(self, text: str):
+        """Already-encoded NDJSON lines (newline-terminated), e.g. from analyzer.transport."""
+        self._f.write(text)
+
+    def write_many(self, record_type: str, objs):
+        # Chunked so a million-record stream never holds a million strings at once
+        dumps = json.dumps
+        objs = iter(objs)
+        while True:
+            lines = [dumps({"record": record_type, **obj}, separators=_SEPARATORS)
+                     for obj in islice(objs, WRITE_CHUNK)]
+            if not lines:
+                break
+            self._f.write("\n".join(lines))
+            self._f.write("\n")
+
+
+def is_ndjson(path) -> bool:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.readline().startswith(_prefix("header"))
+    except OSError:
+        return False
+
+
+def _iter_legacy(path, record_type=None):
+    """Synthesizes records from an old single-document analysis.json."""
+    with open(path, "r", encoding="utf-8") as f:
+        analysis = json.load(f)
+
+    if record_type in (None, "header"):
+        yield {
+            "record": "header",
+            "root": analysis.get("root"),
+            "tech_stack": analysis.get("tech_stack", []),
+        }
+    for rtype, key in RECORD_KEYS.items():
+        if record_type in (None, rtype):
+            for obj in analysis.get(key, []):
+                yield {"record": rtype, **obj}
+
+
+def iter_records(path, record_type=None):
+    """
+    Streams records from an analysis file, optionally only one type.
+    Lines of other types are skipped on a string prefix check, without
+    being JSON-decoded. When filtering by type the "record" tag is dropped.
+    Old single-document files are still readable.
+    """
+    if not is_ndjson(path):
+        for record in _iter_legacy(path, record_type):
+            if record_type:
+                del record["record"]
+            yield record
+        return
+
+    loads = json.loads
+    with open(path, "r", encoding="utf-8") as f:
+        if record_type is None:
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+            return
+
+        prefix = _prefix(record_type)
+        for line in f:
+            if line.startswith(prefix):
+                record = loads(line)
+                del record["record"]
+                yield record
+
+
+def read_header(path) -> dict:
+    for record in iter_records(path, "header"):
+        return record
+    return {}
+
+
+def load_analysis(path) -> dict:
+    """Rebuilds the full in-memory analysis dict. Prefer iter_records when a slice will do."""
+    analysis = {key: [] for key in RECORD_KEYS.values()}
+    for record in iter_records(path):
+        rtype = record.pop("record")
+        if rtype in RECORD_KEYS:
+            analysis[RECORD_KEYS[rtype]].append(record)
+        elif rtype in ("header", "footer"):
+            record.pop("format", None)
+            record.pop("version", None)
+            analysis.update(record)
+    return analysis
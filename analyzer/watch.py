@@ -0,0 +1,249 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from collections import Counter
+
+from analyzer.discovery.files import SUPPORTED_EXTENSIONS, discover_files, load_rules
+from analyzer.discovery.ignore import CONFIG_FILE, GITIGNORE_FILE
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Editors save in bursts (write temp, rename, chmod); coalesce them into one batch
+DEBOUNCE_SECONDS = 0.05
+
+
+def _is_supported(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+class InotifyWatcher:
+    """
+    Linux inotify over every directory discover_files would enter.
+    batches() yields sets of changed file paths, or None when the tree
+    changed shape (directories added/removed, ignore rules edited, queue
+    overflow) and the caller should re-discover everything.
+    """
+
+    def __init__(self, root: str, libc):
+        self.root = root
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.rules = load_rules(root)
+        self.dirs = {}
+        self._watch_tree(root)
+
+    def close(self):
+        os.close(self.fd)
+
+    def _watch_tree(self, top: str):
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if errno == 28:  # ENOSPC: fs.inotify.max_user_watches exhausted
+                    raise OSError(errno, "inotify watch limit reached")
+                continue
+            self.dirs[wd] = current
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False) and not self.rules.ignored(entry.path, is_dir=True):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _drain(self, changed: set) -> bool:
+        """Reads pending events into `changed`; returns True if a full rescan is needed."""
+        rescan = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return rescan
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+
+                directory = self.dirs.get(wd)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, name) if name else directory
+
+                if mask & IN_ISDIR:
+                    if self.rules.ignored(path, is_dir=True):
+                        continue
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._watch_tree(path)
+                    rescan = True
+                elif mask & IN_DELETE_SELF:
+                    rescan = True
+                elif name in (GITIGNORE_FILE, CONFIG_FILE):
+                    self.rules = load_rules(self.root)
+                    rescan = True
+                elif _is_supported(name) and not self.rules.ignored(path):
+                    changed.add(path)
+
+    def batches(self):
+        while True:
+            select.select([self.fd], [], [])
+            changed = set()
+            rescan = self._drain(changed)
+            while select.select([self.fd], [], [], DEBOUNCE_SECONDS)[0]:
+                rescan = self._drain(changed) or rescan
+            if rescan:
+                yield None
+            elif changed:
+                yield changed
+
+
+class PollingWatcher:
+    """Portable fallback: compares (size, mtime) snapshots every `interval` seconds."""
+
+    def __init__(self, root: str, interval: float = 0.5):
+        self.root = root
+        self.interval = interval
+
+    def close(self):
+        pass
+
+    def _snapshot(self):
+        return {f["path"]: (f["size"], f["mtime"]) for f in discover_files(self.root)}
+
+    def batches(self):
+        snapshot = self._snapshot()
+        while True:
+            time.sleep(self.interval)
+            current = self._snapshot()
+            changed = {
+                p for p in current.keys() | snapshot.keys()
+                if current.get(p) != snapshot.get(p)
+            }
+            snapshot = current
+            if changed:
+                yield changed
+
+
+def open_watcher(root: str, poll: bool = False, interval: float = 0.5):
+    """inotify where the platform has it, mtime polling otherwise (or when asked)."""
+    if not poll:
+        libc = _load_libc()
+        if libc is not None:
+            try:
+                return InotifyWatcher(root, libc)
+            except OSError as e:
+                print(f"[coderecon] inotify unavailable ({e}); falling back to polling.")
+    return PollingWatcher(root, interval)
+
+
+def _label(signal) -> str:
+    return signal.get("rule_id") or signal.get("type")
+
+
+def signal_delta(before: dict, after: dict) -> dict:
+    """
+    Per-file change in signal counts between two signals_by_path snapshots.
+    Only files whose signal list object changed are compared.
+    Returns {path: {label: +n / -n}}.
+    """
+    delta = {}
+    for path in before.keys() | after.keys():
+        old, new = before.get(path), after.get(path)
+        if old is new:
+            continue
+        counts = Counter()
+        for s in new or []:
+            counts[_label(s)] += s.get("count", 1)
+        for s in old or []:
+            counts[_label(s)] -= s.get("count", 1)
+        counts = {label: n for label, n in counts.items() if n}
+        if counts:
+            delta[path] = counts
+    return delta
+
+
+def format_delta(delta: dict, root: str = "") -> list:
+    lines = []
+    for path in sorted(delta):
+        rel = path.replace(root, "").lstrip("\\/") if root else path
+        parts = [f"{n:+d} {label}" for label, n in sorted(delta[path].items(), key=lambda x: (-x[1], x[0]))]
+        lines.append(f"  {rel}: {', '.join(parts)}")
+    return lines
+
+
+def run_watch(path: str, poll: bool = False, interval: float = 0.5):
+    """Long-running loop: re-analyzes changed files on save and prints the signal delta."""
+    from analyzer.workspace import Workspace
+
+    root = os.path.abspath(path)
+    ws = Workspace(root)
+    ws.refresh()
+    stats = ws.stats()
+    print(f"[coderecon] Watching {root}: {stats['files']} files, {stats['signals']} signals "
+          f"({stats['last_refresh_ms']:.0f} ms).")
+
+    watcher = open_watcher(root, poll=poll, interval=interval)
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else f"polling every {watcher.interval}s"
+    print(f"[coderecon] Change detection: {mode}. Ctrl+C to stop.")
+
+    try:
+        for batch in watcher.batches():
+            before = dict(ws.signals_by_path)
+            ws.refresh(batch)
+            delta = signal_delta(before, ws.signals_by_path)
+
+            stamp = time.strftime("%H:%M:%S")
+            latency = ws.stats()["last_refresh_ms"]
+            if delta:
+                added = sum(n for d in delta.values() for n in d.values() if n > 0)
+                removed = -sum(n for d in delta.values() for n in d.values() if n < 0)
+                print(f"[coderecon] {stamp} +{added} / -{removed} signals ({latency:.0f} ms)")
+                print("\n".join(format_delta(delta, root)))
+            else:
+                print(f"[coderecon] {stamp} no signal change ({latency:.0f} ms)")
+    except KeyboardInterrupt:
+        print("\n[coderecon] Watch stopped.")
+    finally:
+        watcher.close()
+        # Leave the disk cache warm for the next scan
+        ws.cache.save()
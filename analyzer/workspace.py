@@ -0,0 +1,225 @@
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+
+from analyzer.cache import FileCache
+from analyzer.discovery.files import _get_file_metadata, discover_files
+from analyzer.scan import _parse_file_batch, detect_tech_stack
+from analyzer.scheduler import BatchScheduler
+from analyzer.signals.aggregate import aggregate_signals
+from analyzer.signals.signals import collect_tested_functions, generate_signals
+
+# Below this many changed files, re-analysis runs in-process; a pool costs more to start
+INLINE_LIMIT = 64
+
+
+def _empty_result(path):
+    return {"path": path, "functions": [], "edge_cases": [], "tests": [], "imports": []}
+
+
+class Workspace:
+    """
+    A warm, in-memory analysis of one root. refresh() stats the tree and
+    re-analyzes only files whose fingerprint changed since the last call,
+    saving new results to the FileCache; signal queries and hotspots are
+    answered from indexes kept up to date per file instead of being rebuilt
+    from a full scan.
+    """
+
+    def __init__(self, root: str, seed_from_disk: bool = True):
+        self.root = root
+        # Seeded from .coderecon/cache.json so even the first refresh is mostly hits
+        self.cache = FileCache().load() if seed_from_disk else FileCache()
+        self.files = {}
+        self.results = {}
+        self.signals_by_path = {}
+        self.by_rule = defaultdict(dict)
+        self.by_severity = defaultdict(dict)
+        self.tested = set()
+        self._test_paths = set()
+        self._hotspots = None
+        self.lock = threading.RLock()
+
+        self.refreshes = 0
+        self.last_changed = 0
+        self.last_refresh_ms = 0.0
+        self.total_refresh_ms = 0.0
+        self.max_refresh_ms = 0.0
+
+    # ---------------------------
+    # Refresh
+    # ---------------------------
+
+    def refresh(self, paths=None) -> set:
+        """
+        Re-syncs with disk. Returns the paths whose per-file results changed.
+        With `paths` (e.g. from a file watcher) only those files are stat'ed;
+        otherwise the whole tree is re-discovered.
+        """
+        with self.lock:
+            start = time.perf_counter()
+            if paths is None:
+                files = discover_files(self.root)
+                current = {f["path"]: f for f in files}
+            else:
+                files = []
+                current = dict(self.files)
+                for path in paths:
+                    try:
+                        file_info = _get_file_metadata(path, os.path.basename(path))
+                    except OSError:
+                        current.pop(path, None)
+                        continue
+                    files.append(file_info)
+                    current[path] = file_info
+            changed = set()
+            pending = []
+
+            for file_info in files:
+                path = file_info["path"]
+                result = self.cache.lookup(file_info)
+                if result is None:
+                    pending.append(file_info)
+                elif self.results.get(path) is not result:
+                    self.results[path] = result
+                    changed.add(path)
+
+            for result in self._analyze(pending):
+                self.cache.store(current[result["path"]], result)
+                self.results[result["path"]] = result
+                changed.add(result["path"])
+
+            # Unreadable files get an empty result so stale findings do not linger
+            for file_info in pending:
+                if file_info["path"] not in changed:
+                    self.results[file_info["path"]] = _empty_result(file_info["path"])
+                    changed.add(file_info["path"])
+
+            for path in [p for p in self.results if p not in current]:
+                del self.results[path]
+                changed.add(path)
+
+            self.files = current
+            self.cache.prune(self.root, current.values())
+            self._reindex(changed)
+            # Persisted so a restarted server starts warm too; a no-op when nothing was re-parsed
+            try:
+                self.cache.save()
+            except OSError:
+                pass  # Unwritable cache dir: results stay warm in memory only
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.refreshes += 1
+            self.last_changed = len(changed)
+            self.last_refresh_ms = elapsed_ms
+            self.total_refresh_ms += elapsed_ms
+            self.max_refresh_ms = max(self.max_refresh_ms, elapsed_ms)
+            return changed
+
+    def _analyze(self, pending):
+        if not pending:
+            return []
+        executor = "serial" if len(pending) <= INLINE_LIMIT else "auto"
+        scheduler = BatchScheduler(_parse_file_batch, executor=executor)
+        results = []
+        for batch in scheduler.run(scheduler.plan(pending)):
+            results.extend(batch)
+        return results
+
+    def _reindex(self, changed):
+        # Untested signals depend on every test in the repo: if a test file
+        # changed, every file's signals are regenerated, otherwise only `changed`
+        tests_touched = any(
+            p in self._test_paths or self.results.get(p, {}).get("tests") for p in changed
+        )
+        if tests_touched:
+            self._test_paths = {p for p, r in self.results.items() if r["tests"]}
+            tested = collect_tested_functions(
+                t for p in self._test_paths for t in self.results[p]["tests"]
+            )
+            if tested != self.tested:
+                self.tested = tested
+                changed = set(changed) | set(self.results)
+
+        for path in changed:
+            self._unindex(path)
+            result = self.results.get(path)
+            if result is None:
+                continue
+            raw = generate_signals(result["functions"], result["edge_cases"], [], tested_functions=self.tested)
+            signals = aggregate_signals(raw)
+            self.signals_by_path[path] = signals
+            for s in signals:
+                if s.get("rule_id"):
+                    self.by_rule[s["rule_id"]].setdefault(path, []).append(s)
+                if s.get("severity"):
+                    self.by_severity[s["severity"]].setdefault(path, []).append(s)
+
+        if changed:
+            self._hotspots = None
+
+    def _unindex(self, path):
+        if self.signals_by_path.pop(path, None) is None:
+            return
+        for index in (self.by_rule, self.by_severity):
+            for bucket in index.values():
+                bucket.pop(path, None)
+
+    # ---------------------------
+    # Queries (call refresh() first)
+    # ---------------------------
+
+    def signals(self, severity=None, rule_id=None) -> list:
+        with self.lock:
+            if rule_id is not None:
+                groups = self.by_rule.get(rule_id, {}).values()
+            elif severity is not None:
+                groups = self.by_severity.get(severity, {}).values()
+            else:
+                groups = self.signals_by_path.values()
+            return [
+                s for group in groups for s in group
+                if severity is None or s.get("severity") == severity
+            ]
+
+    def hotspots(self, limit: int = 3) -> list:
+        """(path, signal count) pairs, densest first; cached until a file changes."""
+        with self.lock:
+            if self._hotspots is None or len(self._hotspots) < limit:
+                counts = ((p, len(s)) for p, s in self.signals_by_path.items() if s)
+                self._hotspots = heapq.nlargest(max(limit, 10), counts, key=lambda x: x[1])
+            return self._hotspots[:limit]
+
+    def analysis(self) -> dict:
+        """The full analysis in run_analysis' dict shape."""
+        with self.lock:
+            files = list(self.files.values())
+            results = list(self.results.values())
+            return {
+                "root": self.root,
+                "files": files,
+                "functions": [fn for r in results for fn in r["functions"]],
+                "tests": [t for r in results for t in r["tests"]],
+                "edge_cases": [ec for r in results for ec in r["edge_cases"]],
+                "signals": [s for group in self.signals_by_path.values() for s in group],
+                "tech_stack": detect_tech_stack(files),
+            }
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.cache.hits + self.cache.misses
+            return {
+                "root": self.root,
+                "files": len(self.files),
+                "signals": sum(len(s) for s in self.signals_by_path.values()),
+                "refreshes": self.refreshes,
+                "cache_hits": self.cache.hits,
+                "cache_misses": self.cache.misses,
+                "hit_rate": round(self.cache.hits / lookups, 4) if lookups else 0.0,
+                "last_changed_files": self.last_changed,
+                "last_refresh_ms": round(self.last_refresh_ms, 2),
+                "avg_refresh_ms": round(self.total_refresh_ms / self.refreshes, 2) if self.refreshes else 0.0,
+                "max_refresh_ms": round(self.max_refresh_ms, 2),
+            }
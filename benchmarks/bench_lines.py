@@ -0,0 +1,76 @@
+"""
+Line lookups on large generated bundles.
+
+Builds minified-JS-style sources of increasing size and times the regex
+path of extract_functions on each. Time per MB should stay flat as files
+grow; the old per-match content.count("\\n") is run on the smaller sizes
+for comparison and grows quadratically.
+
+    python benchmarks/bench_lines.py [--sizes 10,20,40] [--legacy-max 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.parsing.functions import GENERIC_FUNCTION_RE, RESERVED, extract_functions  # noqa: E402
+
+CHUNK = (
+    "function f{i}(a,b){{var c=g{i}(a)+h(b);if(c>0){{return k{i}(c)}}return 0}}"
+    "var o{i}={{run:function(x){{return f{i}(x,1)}}}};"
+)
+
+
+def make_bundle(size_mb: float, lines_every: int = 40) -> str:
+    """~size_mb of one-line-ish JS with a newline every `lines_every` chunks."""
+    target = int(size_mb * 1024 * 1024)
+    parts, total, i = [], 0, 0
+    while total < target:
+        part = CHUNK.format(i=i)
+        if i % lines_every == 0:
+            part += "\n"
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def legacy_lines(content: str) -> list:
+    """The previous approach: count newlines from the start for every match."""
+    out = []
+    for match in GENERIC_FUNCTION_RE.finditer(content):
+        name = next((g for g in match.groups() if g), None)
+        if name and name not in RESERVED:
+            out.append(content.count("\n", 0, match.start()) + 1)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default="10,20,40", help="Comma-separated file sizes in MB")
+    parser.add_argument("--legacy-max", type=float, default=2, help="Largest size to also run the old path on")
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'functions':>10} {'time':>9} {'s/MB':>8} {'legacy':>9}")
+    for size in (float(s) for s in args.sizes.split(",")):
+        content = make_bundle(size)
+        mb = len(content) / (1024 * 1024)
+
+        t0 = time.perf_counter()
+        functions = extract_functions("bundle.min.js", content)
+        elapsed = time.perf_counter() - t0
+
+        legacy = "-"
+        if size <= args.legacy_max:
+            t0 = time.perf_counter()
+            expected = legacy_lines(content)
+            legacy = f"{time.perf_counter() - t0:.2f}s"
+            assert expected == [fn["line"] for fn in functions], "line numbers differ from legacy"
+
+        print(f"{mb:>6.1f}MB {len(functions):>10} {elapsed:>8.2f}s {elapsed / mb:>8.3f} {legacy:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Peak memory of the signal stage: lists of dicts vs columnar tables.
+
+Each mode runs in a fresh subprocess so the peaks do not mix. The child
+builds a synthetic analysis (N functions over N/50 files, one edge case
+per four functions, no tests so every function yields a signal), then runs
+generate_signals + aggregate_signals and streams both to NDJSON the way
+run_analysis does. Reported: peak RSS (ru_maxrss, or psutil's peak working
+set on Windows) over the whole run, the growth above the inputs, and wall
+time.
+
+    python benchmarks/bench_memory.py [--functions 500000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: psutil's peak working set instead, if installed
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ("dicts", "tables")
+
+
+def _peak_mb() -> float:
+    if resource is None:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def synthetic(n_functions: int):
+    functions, edge_cases = [], []
+    for i in range(n_functions):
+        path = f"pkg/module_{i // 50 % 40}/service_{i // 50}.py"
+        functions.append({"name": f"handler_{i}", "line": i % 50 * 12 + 1, "end_line": i % 50 * 12 + 11,
+                          "path": path, "type": "function", "length": 10 + i % 90, "called_functions": []})
+        if i % 4 == 0:
+            edge_cases.append({"rule_id": "CR1001", "function": f"handler_{i}", "file": path,
+                               "case": "Deep Nesting", "reason": "Logic nested 5 levels deep.",
+                               "severity": "high", "line": i % 50 * 12 + 3, "node_type": "FunctionDef"})
+    return functions, edge_cases
+
+
+def child(mode: str, n_functions: int):
+    from analyzer.model import SignalTable
+    from analyzer.signals.aggregate import aggregate_signals
+    from analyzer.signals.signals import generate_signals
+    from analyzer.utils.io import AnalysisWriter
+
+    functions, edge_cases = synthetic(n_functions)
+    inputs_mb = _peak_mb()
+
+    t0 = time.perf_counter()
+    raw = generate_signals(functions, edge_cases, [], out=SignalTable() if mode == "tables" else None)
+    aggregated = aggregate_signals(raw)
+    with tempfile.TemporaryDirectory(prefix="coderecon_bench_") as tmp:
+        with AnalysisWriter(os.path.join(tmp, "analysis.ndjson")) as writer:
+            writer.write_many("signal_raw", raw)
+            writer.write_many("signal", aggregated)
+    elapsed = time.perf_counter() - t0
+
+    print(json.dumps({"mode": mode, "raw": len(raw), "aggregated": len(aggregated), "inputs_mb": inputs_mb,
+                      "peak_mb": _peak_mb(), "seconds": elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--functions", type=int, default=500_000)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if resource is None:
+        try:
+            import psutil  # noqa: F401
+        except ImportError:
+            sys.exit("bench_memory needs the 'resource' module (Unix) or the 'psutil' package to read peak RSS")
+
+    if args.child:
+        child(args.child, args.functions)
+        return
+
+    print(f"{args.functions:,} functions")
+    print(f"{'mode':<8} {'signals':>10} {'groups':>10} {'peak RSS':>10} {'growth':>10} {'time':>8}")
+    rows = {}
+    for mode in MODES:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode,
+                              "--functions", str(args.functions)], check=True, capture_output=True, text=True)
+        row = rows[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        growth = row["peak_mb"] - row["inputs_mb"]
+        print(f"{mode:<8} {row['raw']:>10,} {row['aggregated']:>10,} {row['peak_mb']:>8.0f}MB "
+              f"{growth:>8.0f}MB {row['seconds']:>7.2f}s")
+
+    d, t = rows["dicts"], rows["tables"]
+    print(f"tables/dicts: {t['peak_mb'] / d['peak_mb']:.2f}x peak RSS, "
+          f"{(t['peak_mb'] - t['inputs_mb']) / (d['peak_mb'] - d['inputs_mb']):.2f}x growth, "
+          f"{t['seconds'] / d['seconds']:.2f}x time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Worker -> parent transport: list of per-record dicts vs packed columns.
+
+Writes a function-heavy synthetic Python tree to a temp dir, parses it in
+batches, then compares the two result formats on pickled bytes, worker
+time (encode + pickle) and parent time (unpickle + build dicts + encode
+the NDJSON records). Finishes with an end-to-end process-pool run of each.
+
+    python benchmarks/bench_transport.py [--files 400] [--functions 150] [--jobs 4]
+"""
+import argparse
+import functools
+import io
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.scan import _parse_file_batch  # noqa: E402
+from analyzer.scheduler import BatchScheduler, plan_batches  # noqa: E402
+from analyzer.transport import pack_results, unpack_results  # noqa: E402
+from analyzer.utils.io import AnalysisWriter  # noqa: E402
+
+FUNCTION = '''
+def handler_{i}(request, retries=3):
+    for attempt in range(retries):
+        try:
+            value = fetch_{j}(request.path, attempt)
+            if value and value.ok:
+                return normalize(value) / max(1, attempt)
+        except TimeoutError:
+            log_failure(request, attempt)
+    return fallback_{j}(request)
+'''
+
+
+def write_tree(root: str, n_files: int, n_functions: int) -> list:
+    files = []
+    for f in range(n_files):
+        path = os.path.join(root, "pkg", f"module_{f % 20}", f"service_{f}.py")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as fh:
+            fh.write("".join(FUNCTION.format(i=i, j=(i * 7) % n_functions) for i in range(n_functions)))
+        files.append({"path": path, "name": os.path.basename(path), "size": os.path.getsize(path)})
+    return files
+
+
+def round_trip(batches, packed: bool):
+    """Bytes on the wire, worker seconds and parent seconds for every batch."""
+    writer = AnalysisWriter(os.devnull)
+    writer._f = io.StringIO()
+    total_bytes, worker_s, parent_s, records = 0, 0.0, 0.0, 0
+    for results in batches:
+        t0 = time.perf_counter()
+        payload = pickle.dumps(pack_results(results) if packed else results, pickle.HIGHEST_PROTOCOL)
+        t1 = time.perf_counter()
+        for result in unpack_results(pickle.loads(payload), render=True):
+            rendered = result.pop("ndjson", None)
+            if rendered is not None:
+                writer.write_raw(rendered)
+            else:
+                for kind, key in (("function", "functions"), ("edge_case", "edge_cases"), ("test", "tests")):
+                    writer.write_many(kind, result[key])
+            records += len(result["functions"]) + len(result["edge_cases"])
+        parent_s += time.perf_counter() - t1
+        worker_s += t1 - t0
+        total_bytes += len(payload)
+    return total_bytes, worker_s, parent_s, records
+
+
+def pool_run(files, jobs: int, packed: bool) -> float:
+    scheduler = BatchScheduler(functools.partial(_parse_file_batch, packed=packed), executor="process", jobs=jobs)
+    t0 = time.perf_counter()
+    writer = AnalysisWriter(os.devnull)
+    writer._f = io.StringIO()
+    for batch in scheduler.run(plan_batches(files, jobs)):
+        for result in unpack_results(batch, render=True):
+            rendered = result.pop("ndjson", None)
+            if rendered is not None:
+                writer.write_raw(rendered)
+            else:
+                for kind, key in (("function", "functions"), ("edge_case", "edge_cases"), ("test", "tests")):
+                    writer.write_many(kind, result[key])
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--functions", type=int, default=150, help="Functions per file")
+    parser.add_argument("--jobs", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="coderecon_bench_") as root:
+        files = write_tree(root, args.files, args.functions)
+        batches = [_parse_file_batch(b) for b in plan_batches(files, args.jobs)]
+
+        print(f"{args.files} files x {args.functions} functions, {len(batches)} batches")
+        print(f"{'format':<8} {'bytes':>12} {'worker':>9} {'parent':>9} {'records':>9}")
+        rows = {}
+        for packed in (False, True):
+            label = "packed" if packed else "dicts"
+            rows[label] = size, worker_s, parent_s, n = round_trip(batches, packed)
+            print(f"{label:<8} {size:>12,} {worker_s:>8.3f}s {parent_s:>8.3f}s {n:>9,}")
+        (db, dw, dp, _), (pb, pw, pp, _) = rows["dicts"], rows["packed"]
+        print(f"packed/dicts: {pb / db:.2f}x bytes, {pw / dw:.2f}x worker time, {pp / dp:.2f}x parent time")
+
+        for packed in (False, True):
+            print(f"process pool x{args.jobs}, {'packed' if packed else 'dicts'}: "
+                  f"{pool_run(files, args.jobs, packed):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
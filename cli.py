@@ -1,5 +1,4 @@
 import argparse
-import json
 import os
 import platform
 import shutil
@@ -8,24 +7,18 @@ import sys
 import tempfile
 import time
 from pathlib import Path
-import re
 import requests
 
 # Core Imports
+from analyzer.discovery.remote import CLONE_CACHE_DIR, fetch_clone, is_remote
 from analyzer.scan import run_analysis
+from analyzer.timing import PROFILE_FILE, Profiler, StageTimer
 from report.writer import write_markdown
 
 # -----------------------------------------------------------------------------
-# UTILS & GITHUB HANDLING
+# UTILS & REMOTE REPO HANDLING
 # -----------------------------------------------------------------------------
 
-GITHUB_URL_RE = re.compile(r"^https://github\.com/[^/]+/[^/]+/?$")
-
-
-def is_github_url(s: str) -> bool:
-    return bool(GITHUB_URL_RE.match(s.strip()))
-
-
 def safe_delete(path: Path):
     """Retries deletion to handle Windows file locks."""
 
@@ -71,6 +64,9 @@ CORE ANALYSIS:
   topology [PATH]  Maps architecture and identifies functional 'buckets' (Core, Entry, etc.).
   report [PATH]    Generates a formal RECON_REPORT.md with Mermaid diagrams.
   scan [PATH]      High-speed AST structural scan (no LLM reasoning).
+  watch [PATH]     Re-analyzes files on save and prints the signal delta (--poll to force polling).
+  bench            Scans a generated synthetic repo and times every stage (--save / --compare baselines).
+  diff [OLD] [NEW] Signals added, resolved and moved between two analyses (default: previous scan vs last).
 
 INTELLIGENCE:
   summary [PATH]   Provides a high-level executive summary of the repository's purpose.
@@ -78,53 +74,68 @@ INTELLIGENCE:
 
 SYSTEM & UTILS:
   doctor           Checks system health, Ollama status, and dependency alignment.
-  clean            Wipes ephemeral clones and local cache files.
+  clean            Wipes ephemeral clones, local cache files and cached LLM responses.
   help             Displays this detailed guide.
 
+FLAGS:
+  --no-cache       Re-parse every file instead of reusing .coderecon/cache.json.
+  --no-store       Skip writing the indexed analysis.db used for fast slicing.
+  --since REV      (scan) Re-analyze only files changed since a git revision and merge them in.
+  --files-from F   (scan) Same, for the paths listed in F, one per line ('-' reads stdin).
+  --rev REF        (scan) Scan a git revision (tag, branch, SHA) from the object store, without a checkout.
+  --executor KIND  auto (default), serial, thread or process for the parsing workers.
+  --jobs N         Worker count (default: 80% of the CPU cores).
+  --backend KIND   walk (default) or git: list files from the git index instead of walking the tree.
+  --profile [F]    Per-stage timing summary plus a Chrome trace (default .coderecon/trace.json).
+  --no-llm-cache   (explain/report/summary/suggest) Query the model even for a prompt answered before.
+  --map-reduce     (explain/report) One prompt per directory, run --concurrency N at a time, then combined.
+  --no-clone-cache Clone a remote repo into a temp dir and delete it afterwards, instead of .coderecon/clones.
+
 USAGE EXAMPLES:
   $ coderecon explain .
   $ coderecon suggest ./src
   $ coderecon report https://github.com/mvrkarthik07/coderecon
+  $ coderecon scan file:///srv/git/project.git
     """
     print(help_text)
 
 
-def get_analysis_data(path: str, force_scan: bool = False) -> dict:
-    """
-    Prioritizes existing analysis.json.
-    Only scans if file is missing or force_scan is True.
-    """
-    analysis_file = Path("analysis.json")
-
-    if not force_scan and analysis_file.exists():
-        try:
-            with open(analysis_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            # CHECK: Does the cached data match the path we are looking at?
-            cached_root = data.get("root", "")
-            # Normalize paths to compare them properly
-            if os.path.abspath(cached_root) == os.path.abspath(path):
-                print(f"[coderecon] Using existing analysis.json...")
-                return data
-            else:
-                print(f"[coderecon] Cache mismatch (Target changed). Re-scanning...")
-        except Exception:
-            print(f"[coderecon] analysis.json is corrupt. Re-scanning...")
-
-    # Fallback: Run the full scan
-    print(f"[coderecon] Scanning '{path}'...")
-    analysis = run_analysis(path)
-    # Store the root in the JSON so we can verify it later
-    analysis["root"] = str(Path(path).absolute())
+def read_path_list(source: str) -> list:
+    """Paths from a file or stdin ('-'), newline- or NUL-separated (git ... -z)."""
+    if source == "-":
+        data = sys.stdin.read()
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            data = f.read()
+    sep = "\0" if "\0" in data else "\n"
+    return [p.strip() for p in data.split(sep) if p.strip()]
 
-    with open(analysis_file, "w", encoding="utf-8") as f:
-        json.dump(analysis, f, indent=4)
 
-    return analysis
+def get_analysis_data(path: str, use_cache: bool = True, use_store: bool = True,
+                      since: str | None = None, changed_paths=None,
+                      executor: str = "auto", jobs: int | None = None, timer=None, rev: str | None = None,
+                      keep_previous: bool = False, backend: str | None = None) -> dict:
+    """
+    Incremental scan: files whose fingerprint (size, mtime, content hash)
+    is unchanged are served from .coderecon/cache.json; only edited files
+    are re-parsed. use_cache=False forces a full rebuild.
+    run_analysis already streams the result (root included) to analysis.ndjson
+    and, unless use_store=False, indexes it into analysis.db.
+    With since/changed_paths only those files are even looked at, and the
+    rest is carried over from the previous analysis.ndjson. With rev, the
+    files of that git revision are read from the object store instead.
+    keep_previous (set by `scan` only) keeps the replaced analysis for `diff`.
+    backend ("walk"/"git") overrides how .coderecon.toml lists the files.
+    """
+    print(f"[coderecon] Scanning '{path}'" + (f" at {rev}..." if rev else "..."))
+    return run_analysis(path, use_cache=use_cache, use_store=use_store,
+                        since=since, changed_paths=changed_paths, executor=executor, jobs=jobs, timer=timer,
+                        rev=rev, keep_previous=keep_previous, backend=backend)
 
 
-def run_explain_logic(path: str, analysis_data: dict) -> str:
+def run_explain_logic(path: str, analysis_data: dict, map_reduce: bool = False, concurrency: int | None = None,
+                      stream=None) -> str:
+    from llm.budget import estimate_tokens, fit_text, prompt_budget
     from llm.explain import slice_for_explain_data
     from llm.prompt import build_system_prompt, build_github_recon_prompt
     from llm.client import run_llm
@@ -134,24 +145,37 @@ def run_explain_logic(path: str, analysis_data: dict) -> str:
     readme_content = ""
     if readme_path.exists():
         with open(readme_path, "r", encoding="utf-8", errors="ignore") as f:
-            readme_content = f.read()[:5000]
+            readme_content = f.read()
 
-    slice_str = slice_for_explain_data(analysis_data, path)
-    signals = analysis_data.get("signals", [])
+    if map_reduce:
+        # One prompt per directory instead of the first 20 files and 25 signals
+        from llm.mapreduce import DEFAULT_CONCURRENCY, run_map_reduce_explain
+        result = run_map_reduce_explain(analysis_data, path, readme_content,
+                                        concurrency=concurrency or DEFAULT_CONCURRENCY)
+        if stream is not None:
+            stream.write(result + "\n")
+        return result
 
     # The "It worked before" logic:
     # If there's a README, use the Recon prompt regardless of minor signals.
+    # The README takes at most a third of what the template leaves; the code slice fills the rest
     if readme_content:
+        budget = prompt_budget(build_github_recon_prompt("", ""))
+        readme_content = fit_text(readme_content, budget // 3)
+        slice_str = slice_for_explain_data(analysis_data, path, budget - estimate_tokens(readme_content))
         prompt = build_github_recon_prompt(slice_str, readme_content)
     else:
+        slice_str = slice_for_explain_data(analysis_data, path, prompt_budget(build_system_prompt("")))
         prompt = build_system_prompt(slice_str)
 
-    return run_llm(prompt)
+    return run_llm(prompt, stream=stream)
 
 
 def run_clean_logic():
     """Wipes the local cache files."""
-    files_to_clean = ["analysis.json", ".coderecon/cache.json"]
+    from llm.cache import LLM_CACHE_DIR
+    files_to_clean = ["analysis.ndjson", "analysis.db", "analysis.json", ".coderecon/cache.json",
+                      ".coderecon/analysis_previous.ndjson"]
     cleaned = False
     for f in files_to_clean:
         p = Path(f)
@@ -159,6 +183,11 @@ def run_clean_logic():
             p.unlink()
             print(f"[coderecon] Removed {f}")
             cleaned = True
+    for cache_dir in (LLM_CACHE_DIR, CLONE_CACHE_DIR):
+        if cache_dir.exists():
+            safe_delete(cache_dir)
+            print(f"[coderecon] Removed {cache_dir.as_posix()}/")
+            cleaned = True
     if not cleaned:
         print("[coderecon] No cache found to clean.")
 
@@ -216,14 +245,75 @@ def main():
     subparsers.add_parser("clean")
     subparsers.add_parser("help")
 
+    w = subparsers.add_parser("watch")
+    w.add_argument("path", nargs="?", default=".")
+    w.add_argument("--poll", action="store_true", help="Use mtime polling instead of inotify")
+    w.add_argument("--interval", type=float, default=0.5, help="Polling interval in seconds")
+
+    from analyzer.bench import SIZE_DISTRIBUTIONS
+    b = subparsers.add_parser("bench")
+    b.add_argument("--files", type=int, help="Source files to generate (default 1000)")
+    b.add_argument("--mix", help="Language weights, e.g. py=70,js=20,go=10")
+    b.add_argument("--functions", type=int, help="Mean functions per file (default 20)")
+    b.add_argument("--depth", type=int, help="Max nesting depth inside a function (default 4)")
+    b.add_argument("--sizes", choices=SIZE_DISTRIBUTIONS, help="Functions-per-file distribution (default lognormal)")
+    b.add_argument("--test-share", type=float, help="Share of Python files with a test module (default 0.2)")
+    b.add_argument("--seed", type=int, help="Generator seed (default 0)")
+    b.add_argument("--repeat", type=int, default=3, help="Measured runs; medians are reported")
+    b.add_argument("--executor", choices=["auto", "serial", "thread", "process"],
+                   help="Parsing executor (default auto, or the baseline's with --compare)")
+    b.add_argument("--jobs", type=int, default=None, help="Parsing workers (default: the baseline's with --compare)")
+    b.add_argument("--save", metavar="FILE", help="Write the results as a JSON baseline")
+    b.add_argument("--compare", metavar="FILE", help="Compare against a baseline; exits 1 on regression")
+    b.add_argument("--threshold", type=float, default=0.10, help="Regression threshold (default 0.10 = 10%%)")
+    b.add_argument("--keep", metavar="DIR", help="Generate the repo in DIR and keep it")
+
+    d = subparsers.add_parser("diff")
+    d.add_argument("old", nargs="?", help="Earlier analysis (default .coderecon/analysis_previous.ndjson)")
+    d.add_argument("new", nargs="?", help="Later analysis (default analysis.ndjson)")
+    d.add_argument("--limit", type=int, default=20, help="Added/resolved signals listed individually")
+    d.add_argument("--json", action="store_true", help="Print the per-file, per-rule counts as JSON")
 
     for cmd in ["scan", "explain", "report", "summary", "suggest", "topology"]:
         p = subparsers.add_parser(cmd)
         p.add_argument("path", nargs="?", default=".")
+        p.add_argument("--no-cache", action="store_true", help="Ignore the per-file cache and re-parse everything")
+        p.add_argument("--no-store", action="store_true", help="Skip writing the indexed analysis.db")
+        p.add_argument("--executor", choices=["auto", "serial", "thread", "process"], default="auto",
+                       help="Where files are parsed; auto keeps small workloads in-process")
+        p.add_argument("--jobs", type=int, default=None, help="Number of parsing workers")
+        p.add_argument("--backend", choices=["walk", "git"], default=None,
+                       help="List files by walking the tree or from the git index (default: .coderecon.toml or walk)")
+        p.add_argument("--profile", nargs="?", const=PROFILE_FILE, metavar="TRACE",
+                       help=f"Time every stage, print a summary and write a Chrome trace (default {PROFILE_FILE})")
+        p.add_argument("--no-clone-cache", action="store_true",
+                       help="For a git URL: clone into a temp dir and delete it afterwards")
         if cmd == "topology":
             p.add_argument("--max", type=int, default=9999)
+        if cmd in ("explain", "report"):
+            p.add_argument("--map-reduce", action="store_true",
+                           help="Explain per directory and combine the results (for repos beyond one context window)")
+            p.add_argument("--concurrency", type=int, default=None,
+                           help="Directory prompts in flight with --map-reduce (default $OLLAMA_NUM_PARALLEL or 4)")
+        if cmd in ("explain", "report", "summary", "suggest"):
+            p.add_argument("--no-llm-cache", action="store_true",
+                           help="Always query the model instead of replaying cached responses")
+        if cmd == "scan":
+            p.add_argument("--since", metavar="REV", help="Only re-analyze files changed since this git revision")
+            p.add_argument("--files-from", metavar="FILE",
+                           help="Only re-analyze the paths listed in FILE ('-' for stdin)")
+            p.add_argument("--rev", metavar="REF",
+                           help="Scan this git revision straight from the object store; the working tree is not read")
 
     args = parser.parse_args()
+    if getattr(args, "rev", None) and (args.since or args.files_from):
+        parser.error("--rev scans a whole revision; it cannot be combined with --since or --files-from")
+    if args.command == "scan" and is_remote(args.path):
+        local_only = [flag for flag, value in (("--since", getattr(args, "since", None)),
+                                               ("--files-from", getattr(args, "files_from", None)),
+                                               ("--rev", getattr(args, "rev", None))) if value]
+        if local_only:
+            parser.error(f"{', '.join(local_only)}: local working trees only; remote targets are scanned whole")
 
     if args.command == "doctor":
         run_doctor()
@@ -234,36 +324,78 @@ def main():
     if args.command == "clean":
         run_clean_logic()
         return
+    if args.command == "watch":
+        from analyzer.watch import run_watch
+        run_watch(args.path, poll=args.poll, interval=args.interval)
+        return
+    if args.command == "bench":
+        from analyzer.bench import run_bench_command
+        sys.exit(run_bench_command(args))
+    if args.command == "diff":
+        from analyzer.diff import run_diff_command
+        sys.exit(run_diff_command(args))
 
     target_path = args.path
     temp_repo = None
-
+    timer = Profiler() if args.profile else StageTimer()
+    if getattr(args, "no_llm_cache", False):
+        from llm.client import response_cache
+        response_cache.enabled = False
+    if args.command in ("explain", "report", "summary", "suggest"):
+        # Load the model while the scan runs, so the first answer waits for max(scan, load), not the sum
+        from llm.client import warm_up
+        warm_up(on_ready=lambda w: timer.span("model_warmup", w["start_ns"], w["seconds"], cat="llm",
+                                              model=w["model"], load_s=w["load_s"]))
+
+    # Only an explicit scan moves the last analysis aside for `coderecon diff`
+    is_scan = args.command == "scan"
     try:
         # 1. Resolve Active Path (Remote Clone vs Local)
-        if is_github_url(target_path):
+        if is_remote(target_path) and args.no_clone_cache:
             temp_repo = clone_repo_temp(target_path)
             active_path = str(temp_repo)
             # Scanned in-memory for remote repos to avoid saving remote trash to local root
-            analysis = run_analysis(active_path)
+            analysis = run_analysis(active_path, use_cache=False, use_store=not args.no_store,
+                                    executor=args.executor, jobs=args.jobs, timer=timer, keep_previous=is_scan,
+                                    backend=args.backend)
+        elif is_remote(target_path):
+            # Cached checkout: files unchanged since the last fetch are served from the per-file cache
+            with timer.stage("clone"):
+                clone_path, _sha = fetch_clone(target_path)
+            active_path = str(clone_path)
+            analysis = run_analysis(active_path, use_cache=not args.no_cache, use_store=not args.no_store,
+                                    executor=args.executor, jobs=args.jobs, timer=timer, keep_previous=is_scan,
+                                    backend=args.backend)
         else:
             active_path = target_path
-            force = (args.command == "scan")
-            analysis = get_analysis_data(active_path, force_scan=force)
+            files_from = getattr(args, "files_from", None)
+            analysis = get_analysis_data(
+                active_path, use_cache=not args.no_cache, use_store=not args.no_store,
+                since=getattr(args, "since", None),
+                changed_paths=read_path_list(files_from) if files_from else None,
+                executor=args.executor, jobs=args.jobs, timer=timer, rev=getattr(args, "rev", None),
+                keep_previous=is_scan, backend=args.backend,
+            )
 
         # 2. Execute Dispatch
+        command_start_ns, command_start = time.time_ns(), time.perf_counter()
         if args.command == "scan":
             print(f"[coderecon] Scan complete: {len(analysis['files'])} files.")
+            rule_stats = analysis.get("rule_stats", {})
+            if rule_stats:
+                cost = ", ".join(f"{rid} {s['hits']} hits/{s['time_ms']}ms" for rid, s in rule_stats.items())
+                print(f"[coderecon] Rule cost: {cost}")
 
         elif args.command == "explain":
             # Pass the actual directory (temp or local) and the analyzed data
-            result = run_explain_logic(active_path, analysis)
-            print(result)
+            # Tokens are printed as the model produces them
+            run_explain_logic(active_path, analysis, args.map_reduce, args.concurrency, stream=sys.stdout)
 
         elif args.command == "report":
             # Filter out noisy 'untested' signals for the formal report
             analysis['signals'] = [s for s in analysis.get('signals', []) if s.get('type') != 'untested']
 
-            explanation = run_explain_logic(active_path, analysis)
+            explanation = run_explain_logic(active_path, analysis, args.map_reduce, args.concurrency)
             out = write_markdown(target_path, explanation, analysis)
             print(f"✅ [coderecon] Formal report generated: {out}")
 
@@ -273,13 +405,34 @@ def main():
 
         elif args.command == "suggest":
             from llm.suggest import run_suggest_logic
-            print(run_suggest_logic(analysis))
+            run_suggest_logic(analysis, stream=sys.stdout)
 
 
 
         elif args.command == "topology":
             from report.topology import generate_topology
-            print(generate_topology(analysis, repo_root=active_path, max_files_per_bucket=args.max))
+            from analyzer.store import open_store
+            from analyzer.utils.io import ANALYSIS_FILE
+            store = open_store(ANALYSIS_FILE)
+            try:
+                print(generate_topology(analysis, repo_root=active_path, max_files_per_bucket=args.max, store=store))
+            finally:
+                if store:
+                    store.close()
+
+        if args.command in ("explain", "report", "summary", "suggest"):
+            from llm.client import llm_stats, response_cache
+            if response_cache.hits or response_cache.misses:
+                print(f"[coderecon] {response_cache.report()}")
+            if llm_stats.requests:
+                print(f"[coderecon] {llm_stats.report()}")
+
+        command_s = time.perf_counter() - command_start
+        timer.add(args.command, command_s)
+        timer.span(args.command, command_start_ns, command_s)
+        if args.profile:
+            print(timer.summary())
+            print(f"[coderecon] Trace written to {timer.write_trace(args.profile)} (open in https://ui.perfetto.dev)")
 
     finally:
         if temp_repo:
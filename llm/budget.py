@@ -0,0 +1,138 @@
+import math
+import os
+from collections import Counter
+from pathlib import Path
+
+# Context the client asks Ollama for, and how much of it the answer may take
+NUM_CTX = int(os.getenv("CODERECON_NUM_CTX", "4096"))
+NUM_PREDICT = 1024
+
+# Code-heavy prompts average ~3.5 characters per BPE token; erring short keeps us under num_ctx
+CHARS_PER_TOKEN = 3.5
+
+SEVERITY_RANK = {"High": 3, "Medium": 2, "Low": 1}
+SEVERITY_CODE = {"High": "H", "Medium": "M", "Low": "L"}
+# Names listed per file in a structure line; the rest are counted
+MAX_NAMES_PER_FILE = 30
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def prompt_budget(template: str, num_ctx: int = NUM_CTX, reserve: int = NUM_PREDICT) -> int:
+    """Tokens left for data once the prompt's fixed text and the answer are accounted for."""
+    return max(0, num_ctx - reserve - estimate_tokens(template))
+
+
+def pack(lines, budget: int) -> tuple:
+    """
+    Greedy fill: takes already-ranked lines while they fit `budget` tokens,
+    skipping duplicates and any single line too big for what is left (a
+    smaller one further down may still fit). Returns (kept lines, omitted count).
+    """
+    kept, seen, used, omitted = [], set(), 0, 0
+    for line in lines:
+        if line in seen:
+            continue
+        seen.add(line)
+        cost = estimate_tokens(line) + 1  # newline
+        if used + cost > budget:
+            omitted += 1
+            continue
+        kept.append(line)
+        used += cost
+    return kept, omitted
+
+
+def fit_text(text: str, budget: int) -> str:
+    """`text` cut at a line boundary to at most `budget` tokens."""
+    if estimate_tokens(text) <= budget:
+        return text
+    cut = text[:int(budget * CHARS_PER_TOKEN)]
+    return cut[:cut.rfind("\n")] if "\n" in cut else cut
+
+
+def relative_path(path: str, root) -> str:
+    if not path:
+        return "?"
+    if root:
+        try:
+            return Path(path).absolute().relative_to(Path(root).absolute()).as_posix()
+        except ValueError:
+            pass
+    return Path(path).as_posix()
+
+
+def rank_signals(signals) -> list:
+    """
+    Highest value first: severity, then the file's hotspot score (how many
+    signals it carries), then how often the finding repeats.
+    """
+    signals = list(signals)
+    hotspot = Counter(s.get("path") for s in signals)
+    return sorted(signals, key=lambda s: (SEVERITY_RANK.get(s.get("severity"), 0), hotspot[s.get("path")],
+                                          s.get("count", 1)), reverse=True)
+
+
+def render_signal(s: dict, root=None) -> str:
+    """One line per signal, e.g. "H CR1001 Deep Nesting report/topology.py::_describe_file L72 x2"."""
+    lines = s.get("lines") or ([s["line"]] if s.get("line") is not None else [])
+    where = f" L{lines[0]}" if len(lines) == 1 else f" L{lines[0]}-{lines[-1]}" if lines else ""
+    what = " ".join(filter(None, [s.get("rule_id"), s.get("case") or s.get("type")]))
+    count = f" x{s['count']}" if s.get("count", 1) > 1 else ""
+    return (f"{SEVERITY_CODE.get(s.get('severity'), '?')} {what} "
+            f"{relative_path(s.get('path'), root)}::{s.get('function')}{where}{count}")
+
+
+def collapse_untested(signals) -> list:
+    """
+    One untested_function signal per file, naming its functions: they are
+    near-duplicates, and one line per function crowds out everything else.
+    """
+    merged, by_path = [], {}
+    for s in signals:
+        if s.get("type") != "untested_function":
+            merged.append(s)
+            continue
+        group = by_path.get(s.get("path"))
+        if group is None:
+            group = by_path[s.get("path")] = dict(s, function="", names=[], count=0)
+            merged.append(group)
+        group["names"].append(s.get("function"))
+        group["count"] += s.get("count", 1)
+    for group in by_path.values():
+        names = list(dict.fromkeys(group.pop("names")))
+        more = f" +{len(names) - MAX_NAMES_PER_FILE}" if len(names) > MAX_NAMES_PER_FILE else ""
+        group["function"] = ",".join(map(str, names[:MAX_NAMES_PER_FILE])) + more
+        group["count"] = 1
+        group.pop("lines", None)
+        group.pop("line", None)
+    return merged
+
+
+def pack_signals(signals, budget: int, root=None) -> tuple:
+    """Ranked, deduplicated, compact signal lines within `budget` tokens: (text, omitted count)."""
+    ranked = rank_signals(collapse_untested(signals))
+    kept, omitted = pack((render_signal(s, root) for s in ranked), budget)
+    return "\n".join(kept), omitted
+
+
+def pack_structure(functions, signals, budget: int, root=None) -> tuple:
+    """
+    "path => fn, fn" lines within `budget` tokens, hottest files first (most
+    signals, then most functions): (text, omitted file count).
+    """
+    by_file = {}
+    for f in functions:
+        by_file.setdefault(f["path"], []).append(f["name"])
+    hotspot = Counter(s.get("path") for s in signals)
+    ordered = sorted(by_file.items(), key=lambda kv: (hotspot[kv[0]], len(kv[1])), reverse=True)
+    lines = (_structure_line(relative_path(path, root), list(dict.fromkeys(names))) for path, names in ordered)
+    kept, omitted = pack(lines, budget)
+    return "\n".join(kept), omitted
+
+
+def _structure_line(path: str, names: list) -> str:
+    more = f" +{len(names) - MAX_NAMES_PER_FILE} more" if len(names) > MAX_NAMES_PER_FILE else ""
+    return f"{path} => {', '.join(names[:MAX_NAMES_PER_FILE])}{more}"
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Under .coderecon/ so `coderecon clean` takes it with the file cache
+LLM_CACHE_DIR = Path(".coderecon") / "llm_cache"
+LLM_CACHE_MAX_BYTES = int(os.getenv("CODERECON_LLM_CACHE_MB", "64")) * 1024 * 1024
+
+# Eviction trims to this share of the cap, so a full cache does not evict on every store
+EVICT_TO = 0.9
+
+
+def response_key(model: str, prompt: str, options: dict) -> str:
+    """Content address of a generation: same model, prompt and options -> same key."""
+    blob = json.dumps({"model": model, "prompt": prompt, "options": options}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk LLM responses, one JSON file per key (fanned out by the first two
+    hex digits). A hit refreshes the file's mtime, so mtime order is LRU
+    order; stores evict the least recently used files past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=LLM_CACHE_DIR, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                response = json.load(f)["response"]
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return response
+
+    def put(self, key: str, response: str, model: str):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": model, "response": response}, f)
+        os.replace(tmp_path, path)
+        self.stores += 1
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "stores": self.stores, "evictions": self.evictions}
+
+    def report(self) -> str:
+        if not self.enabled:
+            return "LLM cache: disabled"
+        return f"LLM cache: {self.hits} hits, {self.misses} misses, {self.evictions} evicted"
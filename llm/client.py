@@ -1,64 +1,341 @@
+import asyncio
 import json
-import requests
-import shutil
-from tqdm import tqdm
 import os
-# Use a session to keep the connection alive (reuses TCP handshake)
-session = requests.Session()
-OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434" )
+import random
+import threading
+import time
+
+import httpx
+from tqdm import tqdm
+
+from llm.budget import NUM_CTX, NUM_PREDICT
+from llm.cache import ResponseCache, response_key
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
+if "://" not in OLLAMA_HOST:
+    OLLAMA_HOST = f"http://{OLLAMA_HOST}"
+DEFAULT_MODEL = os.getenv("CODERECON_MODEL", "llama3")
+
+# Connections shared by every request from this process; more requests than this wait for a free one
+MAX_CONNECTIONS = int(os.getenv("CODERECON_LLM_CONNECTIONS", "8"))
+# Read timeout applies between streamed chunks, so long generations are fine as long as tokens keep coming
+TIMEOUT = httpx.Timeout(connect=5.0, read=120.0, write=30.0, pool=None)
+
+# Attempts after the first, for failures before any token arrived (connection refused, 429, 5xx)
+MAX_RETRIES = int(os.getenv("CODERECON_LLM_RETRIES", "3"))
+BACKOFF_S = 0.5
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+# How long Ollama keeps the model loaded after each request, so successive commands skip the load
+KEEP_ALIVE = os.getenv("CODERECON_KEEP_ALIVE", "30m")
 
-def run_llm(prompt: str, model: str = "llama3"):
+
+def default_options() -> dict:
     """
-    Direct API implementation with session persistence and optimized streaming.
+    Generation options. Ollama picks num_thread itself unless
+    CODERECON_NUM_THREAD is set; CODERECON_LLM_OPTIONS (a JSON object)
+    overrides or extends the rest.
     """
-    if not shutil.which("ollama"):
-        return "[coderecon] Skip: Ollama not found."
-
-    url = f"{OLLAMA_HOST}/api/generate"
-
-    payload = {
-        "model": model,
-        "prompt": prompt,
-        "stream": True,
-        "options": {
-            "num_ctx": 4096,
-            "temperature": 0.1,  # Lowered for even faster/more stable output
-            "num_thread": 8,
-            "num_predict": 1024,  # Prevent runaway generation
-            "low_vram": False
-        }
+    options = {
+        "num_ctx": NUM_CTX,  # Prompt builders pack their data to fit this (llm.budget)
+        "temperature": 0.1,
+        "num_predict": NUM_PREDICT,  # Prevent runaway generation
     }
+    if os.getenv("CODERECON_NUM_THREAD"):
+        options["num_thread"] = int(os.environ["CODERECON_NUM_THREAD"])
+    options.update(_env_options())
+    return options
+
+
+_warned_options = set()
+
+
+def _env_options() -> dict:
+    """CODERECON_LLM_OPTIONS as a dict; a malformed value is ignored with one warning per value."""
+    raw = os.getenv("CODERECON_LLM_OPTIONS")
+    if not raw:
+        return {}
+    try:
+        extra = json.loads(raw)
+    except ValueError as e:
+        problem = f"is not valid JSON ({e})"
+    else:
+        if isinstance(extra, dict):
+            return extra
+        problem = f"must be a JSON object, got {type(extra).__name__}"
+    if raw not in _warned_options:
+        _warned_options.add(raw)
+        print(f"[coderecon] Warning: CODERECON_LLM_OPTIONS {problem}; ignoring it.")
+    return {}
+
+
+class LLMError(Exception):
+    """A request that failed for good; the message is what the CLI shows."""
+
+
+class LLMStats:
+    """Time to first token and generation speed across this process's requests."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.tokens = 0
+        self.generation_s = 0.0
+        self.first_token_s = []
+        self.load_s = None
+        self._lock = threading.Lock()
+
+    def record(self, first_token_s: float | None, tokens: int, generation_s: float):
+        with self._lock:
+            self.requests += 1
+            self.tokens += tokens
+            self.generation_s += generation_s
+            if first_token_s is not None:
+                self.first_token_s.append(first_token_s)
+
+    def retried(self):
+        with self._lock:
+            self.retries += 1
+
+    def report(self) -> str:
+        ttft = sorted(self.first_token_s)
+        median = f"{ttft[len(ttft) // 2]:.2f}s" if ttft else "-"
+        rate = self.tokens / self.generation_s if self.generation_s > 0 else 0.0
+        retries = f", {self.retries} retries" if self.retries else ""
+        load = f", model load {self.load_s:.2f}s (warm-up)" if self.load_s is not None else ""
+        return (f"LLM: {self.requests} requests, first token {median} (median), "
+                f"{self.tokens} tokens at {rate:.1f} tok/s{retries}{load}")
+
+
+class OllamaClient:
+    """
+    Async Ollama client over one pooled httpx connection set. Use it as
+    `async with OllamaClient() as client:` and run as many generate() calls
+    concurrently as needed; they share up to `max_connections` connections.
+    """
+
+    def __init__(self, host: str = OLLAMA_HOST, max_connections: int = MAX_CONNECTIONS,
+                 retries: int = MAX_RETRIES, stats: LLMStats | None = None):
+        self.host = host
+        self.retries = retries
+        self.stats = stats or LLMStats()
+        self._http = httpx.AsyncClient(
+            base_url=host, timeout=TIMEOUT,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
-    full_response = []
+    async def aclose(self):
+        await self._http.aclose()
 
+    async def generate(self, prompt: str, model: str = DEFAULT_MODEL, options: dict | None = None,
+                       on_token=None, keep_alive: str | None = None) -> str:
+        """
+        Streams one generation, calling `on_token(text)` per chunk as it
+        arrives, and returns the full text. Retries with jittered exponential
+        backoff while nothing has been received; raises LLMError otherwise.
+        """
+        payload = {"model": model, "prompt": prompt, "stream": True,
+                   "options": default_options() if options is None else options}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._stream(payload, on_token)
+            except _Retryable as e:
+                if attempt == self.retries:
+                    raise LLMError(str(e)) from None
+                self.stats.retried()
+                await asyncio.sleep(BACKOFF_S * 2 ** attempt * (0.5 + random.random()))
+
+    async def preload(self, model: str = DEFAULT_MODEL, options: dict | None = None,
+                      keep_alive: str = KEEP_ALIVE) -> float:
+        """
+        Loads `model` without generating (an empty /api/generate) and returns
+        Ollama's load time in seconds, ~0 when it was already resident. The
+        options must match later requests: a different num_ctx reloads it.
+        """
+        payload = {"model": model, "keep_alive": keep_alive,
+                   "options": default_options() if options is None else options}
+        try:
+            response = await self._http.post("/api/generate", json=payload)
+        except httpx.TransportError as e:
+            raise LLMError(f"Ollama not reachable at {self.host}: {e!r}") from None
+        if response.status_code != 200:
+            raise LLMError(f"Ollama returned {response.status_code}: {_error_detail(response.text)}")
+        return response.json().get("load_duration", 0) / 1e9
+
+    async def _stream(self, payload: dict, on_token) -> str:
+        start = time.perf_counter()
+        first_token_s = None
+        parts = []
+        final = {}
+        try:
+            async with self._http.stream("POST", "/api/generate", json=payload) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", "replace")
+                    detail = _error_detail(body)
+                    if response.status_code in RETRY_STATUS:
+                        raise _Retryable(f"Ollama returned {response.status_code}: {detail}")
+                    raise LLMError(f"Ollama returned {response.status_code}: {detail}")
+
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except ValueError:
+                        # A proxy's error page or a cut-off line; retry only while nothing was shown
+                        if parts:
+                            raise LLMError(f"Malformed response mid-answer: {line[:200]!r}") from None
+                        raise _Retryable(f"Malformed response from Ollama: {line[:200]!r}") from None
+                    if chunk.get("error"):
+                        raise LLMError(chunk["error"])
+                    content = chunk.get("response", "")
+                    if content:
+                        if first_token_s is None:
+                            first_token_s = time.perf_counter() - start
+                        parts.append(content)
+                        if on_token:
+                            on_token(content)
+                    if chunk.get("done"):
+                        final = chunk
+                        break
+        except httpx.TransportError as e:
+            # Past the first token a retry would repeat output already shown
+            if parts:
+                raise LLMError(f"Connection lost mid-answer: {e!r}") from None
+            raise _Retryable(f"Ollama not reachable at {self.host}: {e!r}") from None
+
+        if not final:
+            raise LLMError("Stream ended before the model finished.")
+        # Ollama reports its own token count and decode time; fall back to chunks over wall time
+        tokens = final.get("eval_count") or len(parts)
+        generation_s = (final["eval_duration"] / 1e9 if final.get("eval_duration")
+                        else time.perf_counter() - start - (first_token_s or 0.0))
+        self.stats.record(first_token_s, tokens, generation_s)
+        return "".join(parts)
+
+
+class _Retryable(Exception):
+    pass
+
+
+def _error_detail(body: str) -> str:
     try:
-        # stream=True with a session is the fastest way to talk to Ollama
-        response = session.post(url, json=payload, stream=True, timeout=120)
+        return json.loads(body).get("error", body)
+    except ValueError:
+        return body.strip()[:200]
+
+
+# One event loop thread owns the shared client, so synchronous callers on
+# any thread (map-reduce workers included) reuse the same connection pool.
+llm_stats = LLMStats()
+_loop = None
+_client = None
+_loop_lock = threading.Lock()
+
+
+def _shared_client():
+    global _loop, _client
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="coderecon-llm", daemon=True).start()
+            _client = OllamaClient(stats=llm_stats)
+        return _loop, _client
+
+
+def submit(coro_fn, *args, **kwargs):
+    """Runs `coro_fn(client, *args, **kwargs)` on the shared client's loop and waits for the result."""
+    return submit_nowait(coro_fn, *args, **kwargs).result()
 
-        # bar_format='{desc}: {elapsed}' gives you a timer without the 0it/s junk
-        with tqdm(desc=f"[coderecon] Reasoning with {model}",
-                  bar_format='{desc}: {elapsed}',
-                  leave=False) as pbar:
 
-            for line in response.iter_lines():
-                if not line:
-                    continue
+def submit_nowait(coro_fn, *args, **kwargs):
+    """Like submit(), but returns the concurrent.futures.Future straight away."""
+    loop, client = _shared_client()
+    return asyncio.run_coroutine_threadsafe(coro_fn(client, *args, **kwargs), loop)
 
-                chunk = json.loads(line)
-                content = chunk.get("response", "")
 
-                if content:
-                    full_response.append(content)
-                    # Update the bar every 10 tokens to reduce UI flickering/overhead
-                    if len(full_response) % 10 == 0:
-                        pbar.update(1)
+def warm_up(model: str = DEFAULT_MODEL, on_ready=None):
+    """
+    Starts loading `model` in the background and returns at once, so the
+    load overlaps whatever the caller does next (the scan). Requests made
+    meanwhile queue behind the load on the server rather than starting a
+    second one. The future resolves to {"model", "start_ns", "seconds",
+    "load_s"}, also passed to `on_ready`, or None when Ollama could not be
+    reached.
+    """
+    start_ns = time.time_ns()
+    start = time.perf_counter()
+
+    async def _warm(client):
+        try:
+            load_s = await client.preload(model)
+        except LLMError:
+            return None
+        llm_stats.load_s = load_s
+        ready = {"model": model, "start_ns": start_ns, "seconds": time.perf_counter() - start, "load_s": load_s}
+        if on_ready:
+            on_ready(ready)
+        return ready
+
+    return submit_nowait(_warm)
+
+
+# Identical model + prompt + options are answered from disk; the CLI turns it off with --no-llm-cache
+response_cache = ResponseCache()
+
+
+def run_llm(prompt: str, model: str = DEFAULT_MODEL, stream=None) -> str:
+    """
+    Generates a response through the shared async client. With `stream`
+    (a text file such as sys.stdout) the answer is written there as it
+    arrives, and cached answers or errors are written there too, so the
+    caller need not print the result. Successful responses are cached by
+    content (see llm.cache); failures come back as "[coderecon] ..." text.
+    """
+    options = default_options()
+    key = response_key(model, prompt, options)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return _emit(stream, cached)
+
+    if stream is not None:
+        def on_token(text):
+            stream.write(text)
+            stream.flush()
+        progress = None
+    else:
+        # bar_format='{desc}: {elapsed}' gives a timer without the 0it/s junk
+        progress = tqdm(desc=f"[coderecon] Reasoning with {model}", bar_format="{desc}: {elapsed}", leave=False)
+
+        def on_token(_text):
+            progress.update(1)
+
+    try:
+        text = submit(OllamaClient.generate, prompt, model, options, on_token, KEEP_ALIVE).strip()
+    except LLMError as e:
+        return _emit(stream, f"[coderecon] LLM Error: {e}")
+    finally:
+        if progress is not None:
+            progress.close()
 
-                if chunk.get("done"):
-                    break
+    if text:
+        response_cache.put(key, text, model)
+    if stream is not None:
+        stream.write("\n")
+    return text
 
-        return "".join(full_response).strip()
 
-    except requests.exceptions.Timeout:
-        return "[coderecon] Error: LLM Timed out. Context too dense or GPU stalled."
-    except Exception as e:
-        return f"[coderecon] LLM Error: {str(e)}"
\ No newline at end of file
+def _emit(stream, text: str) -> str:
+    if stream is not None:
+        stream.write(text + "\n")
+        stream.flush()
+    return text
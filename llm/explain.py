@@ -1,42 +1,49 @@
 from pathlib import Path
-import json
 from collections import Counter
 
-def slice_by_file(analysis_path: str, target_path: str) -> dict:
-    with open(analysis_path, "r", encoding="utf-8") as f:
-        analysis = json.load(f)
+from analyzer.store import open_store
+from analyzer.utils.io import iter_records
+from llm.budget import estimate_tokens, pack_signals, pack_structure, prompt_budget
+
 
-    signals = [
-        s for s in analysis["signals"]
-        if s.get("path") == target_path
-    ]
+def slice_by_file(analysis_path: str, target_path: str) -> dict:
+    store = open_store(analysis_path)
+    if store:
+        with store:
+            signals = store.signals_for_path(target_path)
+    else:
+        signals = [
+            s for s in iter_records(analysis_path, "signal")
+            if s.get("path") == target_path
+        ]
 
     return {
         "path": target_path,
         "signal_count": len(signals),
         "signals": signals,
     }
-from pathlib import Path
-import json
 
 
 def slice_for_explain(analysis_path: str, target: str) -> dict:
     """
-    Slice analysis.json for:
+    Slice the analysis for:
     - single file
     - directory
     - entire project (.)
+    Uses the indexed analysis.db when present; otherwise signals are streamed
+    and only the selected ones are kept in memory.
     """
 
-    with open(analysis_path, "r", encoding="utf-8") as f:
-        analysis = json.load(f)
-
-    signals = analysis.get("signals", [])
+    store = open_store(analysis_path)
+    signals = iter_records(analysis_path, "signal") if store is None else None
 
     target_path = Path(target).resolve()
 
     # If target is ".", treat as full codebase
     if target == ".":
+        if store:
+            with store:
+                signals = store.signals()
         valid_signals = [
             s for s in signals
             if s.get("path") is not None
@@ -54,19 +61,24 @@ def slice_for_explain(analysis_path: str, target: str) -> dict:
 
     # If directory
     if target_path.is_dir():
-        selected = []
-        files = set()
-
-        for s in signals:
-            path = s.get("path")
-            if not path:
-                continue
+        if store:
+            with store:
+                selected = store.signals_under(target_path)
+            files = {s["path"] for s in selected}
+        else:
+            selected = []
+            files = set()
+
+            for s in signals:
+                path = s.get("path")
+                if not path:
+                    continue
 
-            p = Path(path).resolve()
+                p = Path(path).resolve()
 
-            if target_path in p.parents:
-                selected.append(s)
-                files.add(path)
+                if target_path in p.parents:
+                    selected.append(s)
+                    files.add(path)
         severity_counts = Counter(s.get("severity", "unknown") for s in selected)
         return {
             "mode": "directory",
@@ -78,10 +90,14 @@ def slice_for_explain(analysis_path: str, target: str) -> dict:
         }
 
     # Otherwise treat as file
-    selected = [
-        s for s in signals
-        if s.get("path") and Path(s["path"]).resolve() == target_path
-    ]
+    if store:
+        with store:
+            selected = store.signals_for_file(target_path)
+    else:
+        selected = [
+            s for s in signals
+            if s.get("path") and Path(s["path"]).resolve() == target_path
+        ]
     severity_counts = Counter(s.get("severity", "unknown") for s in selected)
 
     return {
@@ -123,29 +139,29 @@ def get_top_level_structure(path: str) -> str:
         return f"Structure discovery failed: {str(e)}"
 
 
-def slice_for_explain_data(analysis_data, path):
+def slice_for_explain_data(analysis_data, path, budget: int | None = None):
     """
-    High-density structural mapping.
-    Prioritizes files with signals to focus LLM reasoning.
+    High-density structural mapping, packed into `budget` tokens (default:
+    everything num_ctx leaves after the answer). Prioritizes files with
+    signals to focus LLM reasoning; signals go highest-value first.
     """
     signals = analysis_data.get("signals", [])
     functions = analysis_data.get("functions", [])
-
-    file_map = {}
-    for f in functions:
-        p = f['path'].replace(str(path), "").lstrip("\\/")
-        if len(file_map) < 20:
-            file_map.setdefault(p, []).append(f['name'])
-
-    compact_logic = "\n".join([f"{k} => {', '.join(v)}" for k, v in file_map.items()])
+    budget = prompt_budget("") if budget is None else budget
 
     # If NO signals, do NOT return a 'CRITICAL SIGNALS' header.
     if not signals:
-        return f"STRUCTURAL_MAP_ONLY:\n{compact_logic}"
+        compact_logic, skipped_files = pack_structure(functions, [], budget, path)
+        return f"STRUCTURAL_MAP_ONLY:\n{compact_logic}{_omitted(skipped_files, 'files')}"
+
+    # The map orients, the signals carry the findings: they get the larger share
+    compact_logic, skipped_files = pack_structure(functions, signals, budget * 2 // 5, path)
+    compact_signals, skipped = pack_signals(signals, budget - estimate_tokens(compact_logic) - 16, path)
+
+    return (f"STRUCTURAL MAP:\n{compact_logic}{_omitted(skipped_files, 'files')}\n\n"
+            f"CRITICAL SIGNALS (severity rule case path::function line):\n{compact_signals}"
+            f"{_omitted(skipped, 'signals')}")
 
-    compact_signals = "\n".join([
-        f"- [{s.get('rule_id', 'UNK')}] {s['type']} in {s.get('file', 'general')}: {s.get('message', '')}"
-        for s in signals[:25]
-    ])
 
-    return f"STRUCTURAL MAP:\n{compact_logic}\n\nCRITICAL SIGNALS:\n{compact_signals}"
\ No newline at end of file
+def _omitted(count: int, what: str) -> str:
+    return f"\n(+{count} lower-priority {what} omitted)" if count else ""
\ No newline at end of file
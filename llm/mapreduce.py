@@ -0,0 +1,164 @@
+import concurrent.futures
+import os
+from pathlib import Path
+
+from llm.budget import CHARS_PER_TOKEN, estimate_tokens, fit_text, prompt_budget
+from llm.prompt import build_directory_prompt, build_reduce_prompt
+
+# Data per directory prompt: what num_ctx leaves once the template and the answer are accounted for
+DIRECTORY_PROMPT_CHARS = int(prompt_budget(build_directory_prompt({})) * CHARS_PER_TOKEN)
+# Directories are rolled up into their parents until at most this many map prompts remain
+MAX_DIRECTORY_PROMPTS = 48
+DEFAULT_CONCURRENCY = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+
+
+def _rel_dir(path: str, root: str) -> tuple:
+    rel = os.path.relpath(path, root).replace("\\", "/")
+    parts = tuple(rel.split("/")[:-1])
+    return parts if parts and parts[0] != ".." else ()
+
+
+def _signal_line(s: dict) -> str:
+    lines = s.get("lines") or []
+    where = f" line {lines[0]}" if len(lines) == 1 else f" lines {lines[0]}-{lines[-1]}" if lines else ""
+    count = f" x{s['count']}" if s.get("count", 1) > 1 else ""
+    return (f"- [{s.get('rule_id') or 'UNK'}] {s.get('type')} {s.get('case') or ''} in "
+            f"{s.get('function')}{where} ({s.get('severity')}){count}").replace("  ", " ")
+
+
+def slice_by_directories(analysis_data: dict, root: str, max_groups: int = MAX_DIRECTORY_PROMPTS,
+                         budget: int = DIRECTORY_PROMPT_CHARS) -> list:
+    """
+    Splits an in-memory analysis into directory slices for build_directory_prompt.
+    Each file contributes its function names and signals; directories are
+    merged into their parents until at most `max_groups` remain, and a
+    directory whose data exceeds `budget` characters is cut into parts.
+    """
+    root = str(Path(root).absolute())
+    per_file = {}
+    for f in analysis_data.get("functions", []):
+        per_file.setdefault(f["path"], {"functions": [], "signals": []})["functions"].append(f["name"])
+    for s in analysis_data.get("signals", []):
+        if s.get("path"):
+            per_file.setdefault(s["path"], {"functions": [], "signals": []})["signals"].append(s)
+
+    # 1. Shallowest grouping depth that still fits the prompt cap
+    dirs = {path: _rel_dir(os.path.abspath(path), root) for path in per_file}
+    depth = max((len(d) for d in dirs.values()), default=0)
+    while depth > 0 and len({d[:depth] for d in dirs.values()}) > max_groups:
+        depth -= 1
+
+    groups = {}
+    for path in sorted(per_file):
+        groups.setdefault(dirs[path][:depth], []).append(path)
+
+    # 2. One block of text per file, packed into budget-sized parts per directory
+    slices = []
+    for parts, paths in sorted(groups.items()):
+        directory = "/".join(parts) or "."
+        chunks, current, size = [], [], 0
+        for path in paths:
+            data = per_file[path]
+            rel = os.path.relpath(os.path.abspath(path), root).replace("\\", "/")
+            # Untested functions are one signal each; a name list says the same in far fewer tokens
+            untested = [sig["function"] for sig in data["signals"] if sig.get("type") == "untested_function"]
+            others = [sig for sig in data["signals"] if sig.get("type") != "untested_function"]
+            block = "\n".join([f"{rel} => {', '.join(data['functions'][:40]) or '(no functions)'}",
+                               *map(_signal_line, others),
+                               *([f"- untested: {', '.join(untested[:40])}"
+                                  + (f" +{len(untested) - 40} more" if len(untested) > 40 else "")]
+                                 if untested else [])])[:budget]
+            if current and size + len(block) > budget:
+                chunks.append(current)
+                current, size = [], 0
+            current.append((path, block, len(data["signals"])))
+            size += len(block) + 1
+        if current:
+            chunks.append(current)
+
+        for n, chunk in enumerate(chunks, 1):
+            label = directory if len(chunks) == 1 else f"{directory} (part {n}/{len(chunks)})"
+            slices.append({
+                "directory": label,
+                "file_count": len(chunk),
+                "signal_count": sum(count for _, _, count in chunk),
+                "signals": "\n".join(block for _, block, _ in chunk),
+            })
+    return slices
+
+
+def _is_error(text: str) -> bool:
+    return not text or text.startswith("[coderecon]")
+
+
+def _label(group: list) -> str:
+    names = [p["directory"] for p in group]
+    return ", ".join(names) if len(names) <= 3 else f"{', '.join(names[:3])} +{len(names) - 3} more"
+
+
+def _tokens(partial: dict) -> int:
+    """What one partial audit costs inside a reduce prompt ("### dir" heading included)."""
+    return estimate_tokens(f"### {partial['directory']}\n{partial['summary']}\n\n")
+
+
+def _pack(partials: list, budget: int) -> list:
+    """Partial audits grouped into reduce prompts of at most `budget` tokens (at least two per group)."""
+    groups, current, size = [], [], 0
+    for p in partials:
+        n = _tokens(p)
+        if len(current) >= 2 and size + n > budget:
+            groups.append(current)
+            current, size = [], 0
+        current.append(p)
+        size += n
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _run_all(llm, prompts: list, concurrency: int) -> list:
+    """Runs prompts through `llm` with at most `concurrency` in flight; results keep prompt order."""
+    if concurrency <= 1 or len(prompts) <= 1:
+        return [llm(p) for p in prompts]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(llm, prompts))
+
+
+def run_map_reduce_explain(analysis_data: dict, root: str, readme_content: str = "",
+                           concurrency: int = DEFAULT_CONCURRENCY, llm=None) -> str:
+    """
+    Map: one build_directory_prompt per directory slice, `concurrency` at a
+    time. Reduce: partial audits are merged in size-bounded groups, round
+    after round, until they fit one final prompt. Wall time grows with
+    slices / concurrency plus a few reduce rounds, not with repo size.
+    """
+    if llm is None:
+        from llm.client import run_llm as llm
+
+    slices = slice_by_directories(analysis_data, root)
+    if not slices:
+        return "RECON_REFUSED: No logic detected in target path."
+    print(f"[coderecon] Map-reduce explain: {len(slices)} directory prompts, concurrency {concurrency}")
+
+    answers = _run_all(llm, [build_directory_prompt(s) for s in slices], concurrency)
+    partials = [{"directory": s["directory"], "summary": a} for s, a in zip(slices, answers) if not _is_error(a)]
+    failed = len(slices) - len(partials)
+    if not partials:
+        return answers[0]
+    if failed:
+        print(f"[coderecon] Warning: {failed} of {len(slices)} directory prompts failed; summarizing the rest.")
+
+    # The README takes at most a third of what the final template leaves; the audits fill the rest
+    budget = prompt_budget(build_reduce_prompt([], " "))
+    readme_content = fit_text(readme_content, budget // 3) if readme_content else ""
+    budget -= estimate_tokens(readme_content)
+
+    # Intermediate rounds until one reduce prompt can take everything
+    while len(partials) > 1 and sum(map(_tokens, partials)) > budget:
+        groups = _pack(partials, budget)
+        merged = _run_all(llm, [build_reduce_prompt(g, final=False) for g in groups], concurrency)
+        # A group whose merge failed keeps its first audit, so every round still shrinks the list
+        partials = [{"directory": _label(g), "summary": a} if not _is_error(a) else g[0]
+                    for g, a in zip(groups, merged)]
+
+    return llm(build_reduce_prompt(partials, readme_content))
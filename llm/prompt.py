@@ -107,4 +107,51 @@ Analyze this repository and provide a high-clarity summary.
 ## 🚀 Project Identity & Intent
 ## 🏗️ Architectural Flow
 ## ⚠️ Implementation Gap
-"""
\ No newline at end of file
+"""
+
+def build_reduce_prompt(partials: list, readme_content: str = "", final: bool = True) -> str:
+    """
+    Combines directory-level audits (map-reduce explain) into one summary.
+    With final=False the result feeds another reduce round, so it stays an
+    audit of its own rather than the full report.
+    """
+    findings = "\n\n".join(f"### {p['directory']}\n{p['summary']}" for p in partials)
+    readme = f"\n### 📖 README CONTEXT\n{readme_content}\n" if readme_content else ""
+    if not final:
+        return f"""
+[CODERECON: AUDIT CONSOLIDATION]
+Merge these directory audits into one. Keep every Rule ID and file name they cite; drop repetition.
+
+### DIRECTORY AUDITS
+{findings}
+
+### OUTPUT
+1. **Posture**: Overall health of these modules.
+2. **Recurring Anti-Patterns**: Clusters by Rule ID, with the directories they span.
+3. **Action Plan**: Prioritized files to address.
+"""
+    return f"""
+[CODERECON: ARCHITECTURAL RECONNAISSANCE]
+ROLE: Cold, pragmatic Lead Architect.
+Each section below is an audit of one part of the repository. Combine them into the repository-wide picture.
+{readme}
+### DIRECTORY AUDITS
+{findings}
+
+### CONSTRAINTS
+- **Reference Only**: Use ONLY the Rule IDs, directories and files cited in the audits.
+- **Mermaid**: Keep the 'graph TD' simple; module relationships only.
+
+### REQUIRED OUTPUT (STRICT)
+## System Risk Overview
+(2-3 sentences max)
+
+## Architectural Hotspots (Mermaid)
+(The graph)
+
+## Pattern Analysis
+(Bullet points with Rule IDs)
+
+## Top 5 Strategic Fixes
+(Ordered by severity)
+"""
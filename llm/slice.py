@@ -1,17 +1,27 @@
 from pathlib import Path
-import json
 
+from analyzer.store import open_store
+from analyzer.utils.io import iter_records
 
-def slice_by_directory(analysis_path: str, target_dir: str) -> dict:
-    with open(analysis_path, "r", encoding="utf-8") as f:
-        analysis = json.load(f)
 
+def slice_by_directory(analysis_path: str, target_dir: str) -> dict:
     base = Path(target_dir).resolve()
 
+    store = open_store(analysis_path)
+    if store:
+        with store:
+            signals = store.signals_under(base)
+        return {
+            "directory": str(base),
+            "file_count": len({s["path"] for s in signals}),
+            "signal_count": len(signals),
+            "signals": signals,
+        }
+
     signals = []
     files = set()
 
-    for s in analysis["signals"]:
+    for s in iter_records(analysis_path, "signal"):
         path = s.get("path")
 
         if not path:
@@ -1,33 +1,9 @@
-
-
 from collections import defaultdict
+from llm.budget import estimate_tokens, pack, prompt_budget, rank_signals, relative_path, render_signal
 from llm.client import run_llm
 
 
-def build_suggest_prompt(analysis: dict) -> str:
-    signals = analysis.get("signals", [])
-
-    # sort by severity
-    severity_rank = {"High": 3, "Medium": 2, "Low": 1}
-    signals = sorted(
-        signals,
-        key=lambda s: severity_rank.get(s.get("severity", "Low"), 1),
-        reverse=True
-    )
-
-    trimmed = signals[:20]
-
-    # 🔥 GROUP SIGNALS BY FUNCTION
-    function_risk_map = defaultdict(list)
-
-    for s in trimmed:
-        fn = s.get("function")
-        if fn:
-            function_risk_map[fn].append(s.get("type"))
-
-    # convert to normal dict for prompt readability
-    grouped = {k: list(set(v)) for k, v in function_risk_map.items()}
-
+def _suggest_prompt(grouped: str, raw: str, count: int) -> str:
     return f"""
 You are a senior engineer generating targeted refactor suggestions.
 
@@ -40,8 +16,8 @@ STRICT RULES:
 Grouped Risk Signals Per Function:
 {grouped}
 
-Raw Signals (Top {len(trimmed)}):
-{trimmed}
+Raw Signals (Top {count}; severity rule case path::function line):
+{raw}
 
 TASK:
 
@@ -62,6 +38,34 @@ Be precise. No fluff.
 """
 
 
-def run_suggest_logic(analysis: dict) -> str:
+def build_suggest_prompt(analysis: dict) -> str:
+    # Ranked by severity, file hotspot score and repetition, then packed to the context budget
+    signals = rank_signals(analysis.get("signals", []))
+    root = analysis.get("root")
+    budget = prompt_budget(_suggest_prompt("", "", 0))
+
+    rendered = [render_signal(s, root) for s in signals]
+    kept, _omitted = pack(rendered, budget * 2 // 3)
+    kept_lines = set(kept)
+    trimmed = [s for s, line in zip(signals, rendered) if line in kept_lines]
+
+    # 🔥 GROUP SIGNALS BY FUNCTION
+    function_risk_map = defaultdict(set)
+
+    for s in trimmed:
+        fn = s.get("function")
+        if fn:
+            function_risk_map[(s.get("path"), fn)].add(s.get("rule_id") or s.get("type"))
+
+    # Functions with the most distinct risks first
+    grouped = sorted(function_risk_map.items(), key=lambda kv: len(kv[1]), reverse=True)
+    grouped_lines, _ = pack((f"{relative_path(p, root)}::{fn}: {', '.join(sorted(kinds))}"
+                             for (p, fn), kinds in grouped),
+                            budget - sum(estimate_tokens(line) + 1 for line in kept))
+
+    return _suggest_prompt("\n".join(grouped_lines), "\n".join(kept), len(kept))
+
+
+def run_suggest_logic(analysis: dict, stream=None) -> str:
     prompt = build_suggest_prompt(analysis)
-    return run_llm(prompt)
+    return run_llm(prompt, stream=stream)
@@ -1,35 +1,52 @@
 from fastmcp import FastMCP
-from analyzer.scan import run_analysis
-from analyzer.inference.edge_cases import detect_edge_cases
+from analyzer.workspace import Workspace
 import json
 import os
+import threading
 
 mcp = FastMCP("Coderecon")
 
+# Warm analyses, one per root, kept for the lifetime of the server
+_workspaces: dict[str, Workspace] = {}
+_workspaces_lock = threading.Lock()
+
+
+def _workspace(path: str) -> Workspace:
+    """Returns the warm analysis for `path`, re-analyzing only files changed since the last call."""
+    root = os.path.abspath(path)
+    with _workspaces_lock:
+        ws = _workspaces.get(root)
+        if ws is None:
+            ws = _workspaces[root] = Workspace(root)
+    ws.refresh()
+    return ws
+
 
 @mcp.tool()
-def get_codebase_signals(path: str):
-    """Returns deterministic risk signals (nesting, complexity, hazards) for a path."""
-    # We run the actual analyzer logic here
-    analysis = run_analysis(path)
-    return json.dumps(analysis.get("signals", []), indent=2)
+def get_codebase_signals(path: str, severity: str | None = None, rule_id: str | None = None):
+    """Returns deterministic risk signals (nesting, complexity, hazards) for a path,
+    optionally filtered by severity (High/Medium/Low) or rule id (e.g. CR1001)."""
+    ws = _workspace(path)
+    return json.dumps(ws.signals(severity=severity, rule_id=rule_id), indent=2)
 
 
 @mcp.tool()
 def get_hotspots(path: str):
     """Returns the top 3 most complex/risky files based on signal density."""
-    analysis = run_analysis(path)
-    # Logic to count signals per file
-    files = analysis.get("files", [])
-    signals = analysis.get("signals", [])
-
-    stats = {}
-    for s in signals:
-        file = s.get("file")
-        stats[file] = stats.get(file, 0) + 1
-
-    sorted_hotspots = sorted(stats.items(), key=lambda x: x[1], reverse=True)[:3]
-    return f"Top Hotspots: {sorted_hotspots}"
+    ws = _workspace(path)
+    return f"Top Hotspots: {ws.hotspots(3)}"
+
+
+@mcp.tool()
+def get_cache_stats(path: str | None = None):
+    """Reports file cache hit rates and refresh latency of the warm analyses (all roots if no path)."""
+    with _workspaces_lock:
+        if path is not None:
+            ws = _workspaces.get(os.path.abspath(path))
+            workspaces = [ws] if ws else []
+        else:
+            workspaces = list(_workspaces.values())
+    return json.dumps([ws.stats() for ws in workspaces], indent=2)
 
 
 if __name__ == "__main__":
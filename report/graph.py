@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+from array import array
+from itertools import accumulate
+
+
+class CSRGraph:
+    """
+    Directed graph in compressed sparse row layout. Nodes are 0..n-1;
+    the successors of v are targets[offsets[v]:offsets[v + 1]].
+    labels maps node id -> original key (file path, (path, name), ...).
+    """
+    __slots__ = ("n", "offsets", "targets", "labels")
+
+    def __init__(self, n: int, offsets: array, targets: array, labels=None):
+        self.n = n
+        self.offsets = offsets
+        self.targets = targets
+        self.labels = labels if labels is not None else list(range(n))
+
+    @classmethod
+    def from_edges(cls, n: int, src, dst, labels=None) -> "CSRGraph":
+        """Counting-sort build from parallel src/dst id sequences: O(n + m)."""
+        counts = [0] * (n + 1)
+        for s in src:
+            counts[s + 1] += 1
+        offsets = array("q", accumulate(counts))
+
+        fill = array("q", offsets)
+        targets = array("i", bytes(4 * len(dst)))
+        for s, d in zip(src, dst):
+            targets[fill[s]] = d
+            fill[s] += 1
+        return cls(n, offsets, targets, labels)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def successors(self, v: int):
+        return self.targets[self.offsets[v]:self.offsets[v + 1]]
+
+    def out_degrees(self) -> list:
+        o = self.offsets
+        return [o[v + 1] - o[v] for v in range(self.n)]
+
+    def reverse(self) -> "CSRGraph":
+        src = array("i", bytes(4 * len(self.targets)))
+        o = self.offsets
+        for v in range(self.n):
+            for i in range(o[v], o[v + 1]):
+                src[i] = v
+        return CSRGraph.from_edges(self.n, self.targets, src, self.labels)
+
+
+class GraphBuilder:
+    """Interns arbitrary hashable keys to dense ids and collects unique edges."""
+
+    def __init__(self):
+        self.ids = {}
+        self.labels = []
+        self._edges = set()
+
+    def node(self, key) -> int:
+        node_id = self.ids.get(key)
+        if node_id is None:
+            node_id = self.ids[key] = len(self.labels)
+            self.labels.append(key)
+        return node_id
+
+    def edge(self, src_key, dst_key):
+        # Packed into one int: a third of the memory of a tuple per edge
+        self._edges.add(self.node(src_key) << 32 | self.node(dst_key))
+
+    def build(self) -> CSRGraph:
+        edges = sorted(self._edges)
+        return CSRGraph.from_edges(
+            len(self.labels), [e >> 32 for e in edges], [e & 0xFFFFFFFF for e in edges], self.labels
+        )
+
+
+def strongly_connected_components(g: CSRGraph):
+    """
+    Iterative Tarjan, O(n + m). Returns (component id per node, component count).
+    Ids come out in reverse topological order: every edge between two
+    components goes from a higher id to a lower one.
+    """
+    n, offsets, targets = g.n, g.offsets, g.targets
+    index = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    comp = [-1] * n
+    stack = []
+    counter = 0
+    count = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [[root, offsets[root]]]
+
+        while work:
+            frame = work[-1]
+            v, i = frame
+            if i < offsets[v + 1]:
+                frame[1] = i + 1
+                w = targets[i]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append([w, offsets[w]])
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    comp[w] = count
+                    if w == v:
+                        break
+                count += 1
+
+    return comp, count
+
+
+def layers(g: CSRGraph, comp: list, count: int) -> list:
+    """
+    Longest-path layer of every node over the condensation DAG, O(n + m):
+    0 for entry components nothing depends on, deeper layers further down
+    the dependency chain. Nodes of a cycle share a layer.
+    """
+    members = [[] for _ in range(count)]
+    for v, c in enumerate(comp):
+        members[c].append(v)
+
+    offsets, targets = g.offsets, g.targets
+    comp_layer = [0] * count
+    # Descending component id is a topological order (see strongly_connected_components)
+    for c in range(count - 1, -1, -1):
+        nxt = comp_layer[c] + 1
+        for v in members[c]:
+            for i in range(offsets[v], offsets[v + 1]):
+                d = comp[targets[i]]
+                if d != c and comp_layer[d] < nxt:
+                    comp_layer[d] = nxt
+    return [comp_layer[c] for c in comp]
+
+
+def pagerank(g: CSRGraph, damping: float = 0.85, iterations: int = 30, tol: float = 1e-6,
+             reverse: CSRGraph | None = None) -> list:
+    """Pull-style power iteration over the reverse CSR, O(iterations * (n + m))."""
+    n = g.n
+    if n == 0:
+        return []
+    rev = reverse or g.reverse()
+    out_deg = g.out_degrees()
+    dangling = [v for v in range(n) if not out_deg[v]]
+    inv_deg = [1.0 / d if d else 0.0 for d in out_deg]
+    roff, rtg = rev.offsets, rev.targets
+
+    rank = [1.0 / n] * n
+    for _ in range(iterations):
+        contrib = [r * k for r, k in zip(rank, inv_deg)]
+        get = contrib.__getitem__
+        dangling_mass = sum(rank[v] for v in dangling)
+        base = (1.0 - damping) / n + damping * dangling_mass / n
+        new = [base + damping * sum(map(get, rtg[roff[v]:roff[v + 1]])) for v in range(n)]
+        delta = sum(abs(a - b) for a, b in zip(new, rank))
+        rank = new
+        if delta < tol:
+            break
+    return rank
+
+
+def bridging(g: CSRGraph, reverse: CSRGraph | None = None) -> list:
+    """
+    Local betweenness: in-degree x out-degree, i.e. the number of length-2
+    dependency paths routed through each node. O(n), unlike exact betweenness.
+    """
+    rev = reverse or g.reverse()
+    return [i * o for i, o in zip(rev.out_degrees(), g.out_degrees())]
+
+
+def impact_set(reverse: CSRGraph, v: int) -> set:
+    """Every node that transitively depends on `v` (BFS on the reverse graph, O(n + m))."""
+    offsets, targets = reverse.offsets, reverse.targets
+    seen = bytearray(reverse.n)
+    seen[v] = 1
+    frontier = [v]
+    found = set()
+    while frontier:
+        nxt = []
+        for u in frontier:
+            for i in range(offsets[u], offsets[u + 1]):
+                w = targets[i]
+                if not seen[w]:
+                    seen[w] = 1
+                    found.add(w)
+                    nxt.append(w)
+        frontier = nxt
+    return found
+
+
+def impact_counts(g: CSRGraph, comp: list, count: int) -> list:
+    """
+    len(impact_set(...)) for every node in one pass over the condensation
+    DAG: a component's dependents are the union of its direct dependents and
+    theirs, kept as int bitsets over nodes. Components are visited from the
+    highest id down (dependents first), so each edge costs one union instead
+    of every node paying for its own BFS. Memory is O(n^2 / 8) bytes at worst.
+    """
+    members = [0] * count
+    for v, c in enumerate(comp):
+        members[c] |= 1 << v
+    dependents = [0] * count
+    offsets, targets = g.offsets, g.targets
+    for v in sorted(range(g.n), key=comp.__getitem__, reverse=True):
+        c = comp[v]
+        reach = dependents[c] | members[c]
+        for i in range(offsets[v], offsets[v + 1]):
+            d = comp[targets[i]]
+            if d != c:
+                dependents[d] |= reach
+    # A node's other cycle members depend on it too; the node itself does not count
+    return [(dependents[c] | members[c]).bit_count() - 1 for c in comp]
+
+
+class GraphMetrics:
+    """Everything topology needs from one graph, computed in near-linear time."""
+
+    def __init__(self, g: CSRGraph):
+        self.graph = g
+        self.reverse = g.reverse()
+        self.fan_out = g.out_degrees()
+        self.fan_in = self.reverse.out_degrees()
+        self.component, self.component_count = strongly_connected_components(g)
+        self.layer = layers(g, self.component, self.component_count)
+        self.pagerank = pagerank(g, reverse=self.reverse)
+        self.bridging = bridging(g, reverse=self.reverse)
+
+        sizes = [0] * self.component_count
+        for c in self.component:
+            sizes[c] += 1
+        self.component_size = sizes
+        self._self_loops = {v for v in range(g.n) if v in g.successors(v)}
+
+    def in_cycle(self, v: int) -> bool:
+        return self.component_size[self.component[v]] > 1 or v in self._self_loops
+
+    def cycles(self) -> list:
+        """Node groups of every cycle (SCCs of size > 1, plus self-loops), largest first."""
+        groups = {}
+        for v, c in enumerate(self.component):
+            if self.component_size[c] > 1:
+                groups.setdefault(c, []).append(v)
+        found = list(groups.values()) + [[v] for v in sorted(self._self_loops)
+                                          if self.component_size[self.component[v]] == 1]
+        return sorted(found, key=len, reverse=True)
+
+    def depth(self) -> int:
+        return max(self.layer) + 1 if self.layer else 0
+
+    def impact(self, v: int) -> int:
+        return len(impact_set(self.reverse, v))
+
+    def impacts(self) -> list:
+        """impact() of every node, via impact_counts."""
+        return impact_counts(self.graph, self.component, self.component_count)
@@ -1,5 +1,7 @@
 import os
+import sys
 from pathlib import Path
+from llm.budget import fit_text, prompt_budget
 from llm.client import run_llm
 
 
@@ -19,15 +21,17 @@ def run_summary(analysis, repo_root=None):
 
     if readme_content:
         print("\n--- Codebase Explanation (via README) ---")
-        prompt = f"""
+        template = """
         [ROLE: Lead Architect]
         [CONTEXT: {repo_root}]
         [README CONTENT]
-        {readme_content[:3000]} # Truncated to avoid CUDA OOM
+        {readme}
 
         [TASK]
         Summarize the project purpose and explain the folder structure based on this README. 
         Be direct and technical. No fluff. [cite: 2026-02-17]
         """
-        explanation = run_llm(prompt)
-        print(explanation)
\ No newline at end of file
+        # As much README as the context holds next to the answer, cut at a line boundary
+        budget = prompt_budget(template.format(repo_root=repo_root, readme=""))
+        prompt = template.format(repo_root=repo_root, readme=fit_text(readme_content, budget))
+        run_llm(prompt, stream=sys.stdout)
\ No newline at end of file
@@ -5,6 +5,13 @@ from collections import defaultdict
 from pathlib import Path
 import os
 
+from analyzer.parsing.calls import resolve_calls
+from analyzer.parsing.imports import extract_imports
+from report.graph import GraphBuilder, GraphMetrics
+
+# Files whose impact is computed exactly (see report.graph.impact_counts), else the top few only
+IMPACT_MAX_FILES = 20000
+IMPACT_TOP_FILES = 50
 
 # ---------------------------
 # Helpers
@@ -18,32 +25,17 @@ def _norm(p: str) -> str:
     return os.path.normpath(p).lower()
 
 
-def _top_module_name(mod: str | None) -> str | None:
-    if not mod:
-        return None
-    return mod.split(".")[0]
-
-
 def _collect_imports(py_file: str) -> set[str]:
-    """Return set of top-level imported module names in a Python file."""
-    imports: set[str] = set()
+    """
+    Return set of top-level imported module names in a Python file.
+    Only used for analyses written before imports were recorded by the scan.
+    """
     try:
         src = Path(py_file).read_text(encoding="utf-8", errors="ignore")
         tree = ast.parse(src)
     except Exception:
-        return imports
-
-    for n in ast.walk(tree):
-        if isinstance(n, ast.Import):
-            for a in n.names:
-                top = _top_module_name(a.name)
-                if top:
-                    imports.add(top)
-        elif isinstance(n, ast.ImportFrom):
-            top = _top_module_name(n.module)
-            if top:
-                imports.add(top)
-    return imports
+        return set()
+    return set(extract_imports(tree))
 
 
 def _guess_role_from_path(p: str) -> str | None:
@@ -60,12 +52,18 @@ def _guess_role_from_path(p: str) -> str | None:
     return None
 
 
-def _risk_level(signal_count: int) -> str:
+def _risk_level(signal_count: int, central: bool = False) -> str:
+    """Signal-count tiers; a central file (in a cycle or high PageRank) with signals moves up one."""
+    levels = ("Low", "Medium", "High")
     if signal_count >= 15:
-        return "High"
-    if signal_count >= 5:
-        return "Medium"
-    return "Low"
+        level = 2
+    elif signal_count >= 5:
+        level = 1
+    else:
+        level = 0
+    if central and signal_count > 0:
+        level = min(level + 1, 2)
+    return levels[level]
 
 
 def _risk_bar(count: int, max_count: int, width: int = 20) -> str:
@@ -109,14 +107,26 @@ def _describe_file(path: str, fan_in: int, fan_out: int, signals: int, ext_impor
 # Core topology builder
 # ---------------------------
 
-def generate_topology(analysis: dict, repo_root: str | None = None, max_files_per_bucket: int = 9999) -> str:
-    functions = analysis.get("functions", [])
-    signals = analysis.get("signals", [])
-    files = analysis.get("files", [])
+def generate_topology(analysis: dict, repo_root: str | None = None, max_files_per_bucket: int = 9999,
+                      store=None) -> str:
+    """
+    Buckets files by role and dependency shape. With an AnalysisStore, files,
+    functions and per-file signal counts come from indexed queries instead of
+    the in-memory analysis dict.
+    """
+    if store is not None:
+        functions = store.functions()
+        files = store.files()
+        signals = []
+    else:
+        functions = analysis.get("functions", [])
+        signals = analysis.get("signals", [])
+        files = analysis.get("files", [])
 
     # 1. Collect and Normalize File Paths
     normalized_paths: list[str] = []
     norm_to_orig: dict[str, str] = {} # Map normalized path back to original for display
+    file_imports: dict[str, list[str]] = {} # Imports recorded by the scan's per-file pass
 
     for f in files:
         p = f.get("path") or f.get("file")
@@ -124,36 +134,49 @@ def generate_topology(analysis: dict, repo_root: str | None = None, max_files_pe
             n = _norm(str(p))
             normalized_paths.append(n)
             norm_to_orig[n] = str(p)
+            if "imports" in f:
+                file_imports[n] = f["imports"]
 
     # 2. Map signals using normalized keys
     file_signal_counts = defaultdict(int)
+    if store is not None:
+        for p, count in store.signal_counts_by_path().items():
+            file_signal_counts[_norm(str(p))] += count
     for s in signals:
         p = s.get("path") or s.get("file")
         if p:
             file_signal_counts[_norm(str(p))] += 1
 
-    # 3. Build Dependency Map
-    fn_to_files: dict[str, set[str]] = defaultdict(set)
-    for fn in functions:
-        name, p = fn.get("name"), fn.get("path") or fn.get("file")
-        if name and p:
-            fn_to_files[name].add(_norm(str(p)))
-
-    edges: set[tuple[str, str]] = set()
-    for fn in functions:
-        src_file = _norm(str(fn.get("path") or fn.get("file") or ""))
-        if not src_file: continue
-        for called in fn.get("called_functions", []) or []:
-            targets = fn_to_files.get(called, set())
-            if len(targets) == 1:
-                dst_file = next(iter(targets))
-                if dst_file != src_file:
-                    edges.add((src_file, dst_file))
-
-    fan_out, fan_in = defaultdict(int), defaultdict(int)
-    for a, b in edges:
-        fan_out[a] += 1
-        fan_in[b] += 1
+    # 3. Build Dependency Graphs (calls resolved through one project-wide symbol index)
+    file_graph, func_graph = GraphBuilder(), GraphBuilder()
+    for n_p in normalized_paths:
+        file_graph.node(n_p)
+    for src_path, src_name, dst_path, dst_name in resolve_calls(functions):
+        src_file, dst_file = _norm(str(src_path)), _norm(str(dst_path))
+        # Name-only resolution can't tell self.x.write() from recursion, so self-calls are dropped
+        if (src_file, src_name) != (dst_file, dst_name):
+            func_graph.edge((src_file, src_name), (dst_file, dst_name))
+        if dst_file != src_file:
+            file_graph.edge(src_file, dst_file)
+
+    fg = file_graph.build()
+    metrics = GraphMetrics(fg)
+    node_of = file_graph.ids
+    fan_in = {n_p: metrics.fan_in[v] for n_p, v in node_of.items()}
+    fan_out = {n_p: metrics.fan_out[v] for n_p, v in node_of.items()}
+
+    # Uniform PageRank is 1/n; anything well above it is a hub the rest of the repo leans on
+    rank_th = 1.5 / max(1, fg.n)
+    central = {n_p for n_p, v in node_of.items()
+               if metrics.in_cycle(v) or metrics.pagerank[v] >= rank_th}
+
+    # Every file's reverse-reachability in one pass over the condensation; past IMPACT_MAX_FILES its
+    # bitsets get too big, so only the most central files get a BFS each
+    if fg.n <= IMPACT_MAX_FILES:
+        impact = dict(zip(fg.labels, metrics.impacts()))
+    else:
+        by_rank = sorted(range(fg.n), key=lambda v: metrics.pagerank[v], reverse=True)
+        impact = {fg.labels[v]: metrics.impact(v) for v in by_rank[:IMPACT_TOP_FILES]}
 
     # 4. External Heuristics
     external_markers = {"requests", "httpx", "aiohttp", "boto3", "subprocess", "openai", "os", "sys"}
@@ -161,7 +184,7 @@ def generate_topology(analysis: dict, repo_root: str | None = None, max_files_pe
     for n_p in normalized_paths:
         orig_p = norm_to_orig[n_p]
         if orig_p.endswith(".py"):
-            imps = _collect_imports(orig_p)
+            imps = file_imports[n_p] if n_p in file_imports else _collect_imports(orig_p)
             file_ext_count[n_p] = sum(1 for x in imps if x in external_markers)
 
     # 5. Bucketing logic
@@ -183,7 +206,7 @@ def generate_topology(analysis: dict, repo_root: str | None = None, max_files_pe
             buckets["EXTERNAL INTEGRATIONS"].append(n_p)
         elif role == "utils":
             buckets["UTILITIES"].append(n_p)
-        elif fi >= core_th and fo >= core_th:
+        elif (fi >= core_th and fo >= core_th) or (n_p in central and fi > 0 and fo > 0):
             buckets["CORE"].append(n_p)
         else:
             buckets["OTHERS"].append(n_p)
@@ -200,8 +223,16 @@ def generate_topology(analysis: dict, repo_root: str | None = None, max_files_pe
         orig_p = norm_to_orig[n_p]
         si, fi, fo = file_signal_counts[n_p], fan_in[n_p], fan_out[n_p]
         extc = file_ext_count[n_p]
+        v = node_of[n_p]
         rel = orig_p.replace(str(repo_root or ""), "").lstrip("\\/")
-        return f"- {rel}\n    Role: {_describe_file(orig_p, fi, fo, si, extc)}\n    Risk: {_risk_level(si)} | Signals: {si} | Fan-in: {fi} | Fan-out: {fo}"
+        graph_line = f"Layer: {metrics.layer[v]} | Centrality: {metrics.pagerank[v] * fg.n:.2f}"
+        if n_p in impact:
+            graph_line += f" | Impact: {impact[n_p]}"
+        if metrics.in_cycle(v):
+            graph_line += " | In cycle"
+        return (f"- {rel}\n    Role: {_describe_file(orig_p, fi, fo, si, extc)}"
+                f"\n    Risk: {_risk_level(si, n_p in central)} | Signals: {si} | Fan-in: {fi} | Fan-out: {fo}"
+                f"\n    {graph_line}")
 
     for title, items in buckets.items():
         out.append(title)
@@ -217,9 +248,30 @@ def generate_topology(analysis: dict, repo_root: str | None = None, max_files_pe
     max_count = all_counts[0][1] if all_counts else 0
 
     for n_p, c in all_counts:
-        risk = _risk_level(c)
+        risk = _risk_level(c, n_p in central)
         bar = _risk_bar(c, max_count)
         rel = norm_to_orig[n_p].replace(str(repo_root or ""), "").lstrip("\\/")
         out.append(f"{risk:<7} {bar:<20} {c:>3}  {rel}")
 
+    # Graph summary: file-level dependency shape plus function-level recursion
+    def rel_of(n_p: str) -> str:
+        return norm_to_orig.get(n_p, n_p).replace(str(repo_root or ""), "").lstrip("\\/")
+
+    file_cycles = metrics.cycles()
+    out.append("\nGRAPH METRICS\n")
+    out.append(f"Files: {fg.n} | Dependencies: {fg.edge_count} | Cycles: {len(file_cycles)} | Depth: {metrics.depth()}")
+    for group in file_cycles[:5]:
+        out.append("  cycle: " + ", ".join(rel_of(fg.labels[v]) for v in group))
+    # Files most dependency paths are routed through: a change there reaches both sides
+    bridges = sorted((v for v in range(fg.n) if metrics.bridging[v]), key=lambda v: metrics.bridging[v], reverse=True)
+    for v in bridges[:5]:
+        out.append(f"  bridge: {rel_of(fg.labels[v])} ({metrics.bridging[v]} paths through it)")
+
+    cg = func_graph.build()
+    func_metrics = GraphMetrics(cg)
+    func_cycles = func_metrics.cycles()
+    out.append(f"Functions: {cg.n} | Call edges: {cg.edge_count} | Mutual recursion: {len(func_cycles)}")
+    for group in func_cycles[:5]:
+        out.append("  recursion: " + ", ".join(f"{rel_of(cg.labels[v][0])}::{cg.labels[v][1]}" for v in group))
+
     return "\n".join(out)
\ No newline at end of file
@@ -10,4 +10,5 @@ class AnalysisSchema(BaseModel):
     signals_raw: List[Dict[str, Any]] = Field(default_factory=list)
     tech_stack: List[str] = Field(default_factory=list)
     test_ratio: float = 0.0
-    severity_counts: Dict[str, Any] = Field(default_factory=dict)
\ No newline at end of file
+    severity_counts: Dict[str, Any] = Field(default_factory=dict)
+    rule_stats: Dict[str, Any] = Field(default_factory=dict)
\ No newline at end of file
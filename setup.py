@@ -8,7 +8,8 @@ setup(
         "mcp",
         "fastmcp",
         "click",
-        "ollama"
+        "ollama",
+        "httpx"
     ],
     entry_points={
         "console_scripts": [